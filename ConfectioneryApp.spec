@@ -1,16 +1,23 @@
 # -*- mode: python ; coding: utf-8 -*-
+# Формы ui/ и media/ встроены в resources_rc.py (pyrcc5 resources.qrc -o resources_rc.py),
+# поэтому отдельные файлы данных не нужны. Сборка в папку (onedir): при запуске
+# ничего не распаковывается во временный каталог. Классы форм берутся из пакета
+# ui_generated (python ui_forms.py), поэтому компилятор форм PyQt5.uic не включается.
+# База данных и фото в папку сборки не попадают: они хранятся в профиле пользователя.
+from PyInstaller.utils.hooks import collect_submodules
 
 
 a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
-    datas=[('ui', 'ui'), ('media', 'media')],
-    hiddenimports=[],
+    datas=[],
+    # Модули форм импортируются по имени во время работы (ui_forms.load_form_class)
+    hiddenimports=['resources_rc'] + collect_submodules('ui_generated'),
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=['PyQt5.uic'],
     noarchive=False,
     optimize=0,
 )
@@ -19,16 +26,13 @@ pyz = PYZ(a.pure)
 exe = EXE(
     pyz,
     a.scripts,
-    a.binaries,
-    a.datas,
     [],
+    exclude_binaries=True,
     name='ConfectioneryApp',
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
-    upx_exclude=[],
-    runtime_tmpdir=None,
+    upx=False,
     console=True,
     disable_windowed_traceback=False,
     argv_emulation=False,
@@ -36,3 +40,14 @@ exe = EXE(
     codesign_identity=None,
     entitlements_file=None,
 )
+
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    # Сжатые UPX библиотеки Qt распаковываются в память при каждом запуске
+    upx=False,
+    upx_exclude=[],
+    name='ConfectioneryApp',
+)
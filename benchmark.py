@@ -0,0 +1,407 @@
+import argparse
+import inspect
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+# Таблицы интерфейса заполняются без окна на экране
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtCore import QT_VERSION_STR
+
+import datagen
+from database import DatabaseManager
+from exporter import export_table
+
+# Количество повторов каждого замера
+DEFAULT_REPEAT = 5
+
+# Размер набора данных по умолчанию
+BENCH_CLIENTS = 10000
+BENCH_DESSERTS = 200
+BENCH_ORDERS = 100000
+
+# Начальное значение генератора: одинаковый набор в каждом запуске
+BENCH_SEED = 20240101
+
+# Файл результатов по умолчанию
+DEFAULT_OUTPUT = 'benchmark_results.json'
+
+# Регрессия при сравнении запусков: медиана медленнее на эту долю
+REGRESSION_THRESHOLD = 0.2
+
+# Изменения быстрее этого времени не считаются регрессией (шум таймера), мс
+REGRESSION_MIN_MS = 0.5
+
+# Методы DatabaseManager без отдельного замера: обслуживание подключений
+# и вспомогательные методы массовых путей (измеряются в группе bulk)
+UNMEASURED_METHODS = {
+    'get_connection', 'release_connection', 'close', 'init_database', 'prune_changelog',
+    'triggers_paused', 'add_orders_to_sales_summary',
+}
+
+
+class BenchmarkRunner:
+    """Замеры с повторами: результаты копятся в списке словарей для JSON"""
+
+    def __init__(self, repeat=DEFAULT_REPEAT):
+        self.repeat = repeat
+        self.results = []
+
+    def measure(self, group, name, func, setup=None, repeat=None, rows=None):
+        """Замер func() repeat раз; setup() выполняется перед каждым повтором вне замера
+
+        Если setup возвращает кортеж, он передается в func как аргументы.
+        rows - число обработанных строк для расчета скорости.
+        """
+        times = []
+        for _ in range(repeat or self.repeat):
+            args = setup() if setup else None
+            started = time.perf_counter()
+            func(*args) if isinstance(args, tuple) else func()
+            times.append((time.perf_counter() - started) * 1000)
+
+        result = {
+            'group': group,
+            'name': name,
+            'runs': len(times),
+            'min_ms': round(min(times), 4),
+            'median_ms': round(statistics.median(times), 4),
+            'mean_ms': round(statistics.fmean(times), 4),
+            'max_ms': round(max(times), 4),
+        }
+        if rows:
+            result['rows'] = rows
+            result['rows_per_s'] = round(rows / (result['median_ms'] / 1000), 1)
+        self.results.append(result)
+        print(f"   {group + '.' + name:<52}{result['median_ms']:>12.3f} мс")
+        return result
+
+
+def _unique(prefix):
+    """Фабрика уникальных значений для повторяющихся записей"""
+    counter = iter(range(10 ** 9))
+    return lambda: f"{prefix}{next(counter)}"
+
+
+def run_bulk_benchmarks(runner, db, args, work_dir):
+    """Массовые пути: импорт синтетического набора, выгрузка, пересчеты"""
+    print("📦 Массовые операции")
+    from importer import BulkImporter
+
+    importer = BulkImporter(db)
+    reports = []
+
+    def populate():
+        reports.extend(datagen.populate(db, args.clients, args.desserts, args.orders,
+                                        args.days, args.seed, importer))
+
+    runner.measure('bulk', 'populate', populate, repeat=1,
+                   rows=args.clients + args.desserts + args.orders)
+    for report in reports:
+        print(f"      {report.summary()}")
+
+    export_path = os.path.join(work_dir, 'orders_export.csv')
+    runner.measure('bulk', 'export_orders_csv', lambda: export_table(db, 'orders', export_path),
+                   repeat=1, rows=args.orders)
+    runner.measure('bulk', 'rebuild_sales_summary', db.rebuild_sales_summary, repeat=1)
+    runner.measure('bulk', 'recompute_order_totals', db.recompute_order_totals, repeat=1,
+                   rows=args.orders)
+
+
+def run_db_benchmarks(runner, db, db_path):
+    """Каждый публичный метод DatabaseManager на заполненной БД
+
+    Возвращает множество измеренных методов.
+    """
+    print("🗄 Методы DatabaseManager")
+    conn = db.get_connection()
+    client_id, client_name, client_phone = conn.execute(
+        "SELECT id, full_name, phone FROM clients ORDER BY id LIMIT 1 OFFSET "
+        "(SELECT COUNT(*) / 2 FROM clients)"
+    ).fetchone()
+    dessert_id, dessert_name = conn.execute(
+        "SELECT id, name FROM desserts ORDER BY id LIMIT 1"
+    ).fetchone()
+    order_id = conn.execute("SELECT MAX(id) FROM orders").fetchone()[0]
+    last_date = conn.execute("SELECT MAX(order_date) FROM orders").fetchone()[0] or \
+        date.today().isoformat()
+    month_ago = (date.fromisoformat(last_date) - timedelta(days=30)).isoformat()
+    measured = set()
+
+    def measure(method, *call_args, name=None, setup=None, repeat=None):
+        measured.add(method)
+        func = getattr(db, method)
+        if setup:
+            runner.measure('db', name or method, func, setup=setup, repeat=repeat)
+        else:
+            runner.measure('db', name or method, lambda: func(*call_args), repeat=repeat)
+
+    # Открытие существующей БД: подключение и проверка версии схемы
+    runner.measure('db', 'open', lambda: DatabaseManager(db_path).close())
+    measure('get_schema_version')
+    measure('get_data_version')
+    measure('get_last_change_id')
+    last_change = db.get_last_change_id()
+    measure('get_changes_since', max(last_change - 100, 0))
+    measure('fetch_changes', max(last_change - 100, 0), 500)
+    measure('get_table_counts')
+    measure('get_cache_stats')
+
+    # Справочники: первое чтение загружает кэш, следующие идут из памяти
+    measure('get_all_clients', name='get_all_clients_cold',
+            setup=lambda: db.catalog.invalidate('clients'))
+    measure('get_all_clients')
+    measure('get_client', client_id)
+    measure('get_client_by_phone', client_phone)
+    measure('get_clients_page')
+    measure('get_clients_page', 200, (client_name, client_id), name='get_clients_page_middle')
+    measure('get_all_desserts', name='get_all_desserts_cold',
+            setup=lambda: db.catalog.invalidate('desserts'))
+    measure('get_all_desserts')
+    measure('get_dessert', dessert_id)
+    measure('get_dessert_by_name', dessert_name)
+
+    # Поиск
+    measure('search_clients', client_name.split()[0])
+    measure('find_clients', client_name[:3], name='find_clients_name')
+    measure('find_clients', client_phone[-10:-5], name='find_clients_phone')
+    measure('search_desserts', dessert_name.split()[0])
+    measure('search_orders', dessert_name.split()[0])
+
+    # Заказы
+    measure('get_all_orders', repeat=1)
+    measure('get_order', order_id)
+    measure('get_orders_page')
+    middle = conn.execute(
+        "SELECT order_date, order_time, id FROM orders ORDER BY id LIMIT 1 OFFSET "
+        "(SELECT COUNT(*) / 2 FROM orders)"
+    ).fetchone()
+    measure('get_orders_page', 200, middle, name='get_orders_page_middle')
+    measure('get_order_items', order_id)
+    measure('get_orders_with_dessert', dessert_id)
+    measure('get_dessert_quantity', dessert_id)
+
+    # Отчеты за последний месяц и за весь период
+    for method in ('get_orders_total', 'get_sales_by_day', 'get_sales_by_dessert',
+                   'get_sales_totals'):
+        measure(method, month_ago, last_date, name=f"{method}_month")
+        measure(method)
+    measure('rebuild_sales_summary', month_ago, last_date, name='rebuild_sales_summary_month')
+    measure('recompute_order_totals', month_ago, last_date, name='recompute_order_totals_month')
+
+    # Запись: каждый повтор работает со своей строкой
+    phone = _unique('+7000')
+    measure('add_client', setup=lambda: ('Тестов Тест Тестович', phone(), '1990-01-01', ''))
+    measure('update_client', setup=lambda: (client_id, client_name, client_phone,
+                                            '1990-01-01', 'bench@example.com'))
+    measure('delete_client', setup=lambda: (
+        db.add_client('Удаляемый Клиент', phone(), '1990-01-01', ''),
+    ))
+    dessert = _unique('Тестовый десерт ')
+    measure('add_dessert', setup=lambda: (dessert(), None, 100.0, 'тест'))
+    dessert_row = db.get_dessert(dessert_id)
+    measure('update_dessert', setup=lambda: (dessert_id,) + tuple(dessert_row[1:5]))
+    measure('delete_dessert', setup=lambda: (db.add_dessert(dessert(), None, 100.0, ''),))
+    # Вес нужен десерту с ценой только за кг, штучному он не мешает
+    order_args = (client_id, [(dessert_id, 2, 1.5)], last_date, '12:00', 'Самовывоз', '')
+    measure('add_order', *order_args)
+    measure('delete_order', setup=lambda: (db.add_order(*order_args),))
+    measure('execute_batch', setup=lambda: ([
+        ('add_client', ('Пакетный Клиент', phone(), '1990-01-01', '')) for _ in range(10)
+    ],))
+
+    def empty_transaction():
+        with db.transaction():
+            pass
+    runner.measure('db', 'transaction', empty_transaction)
+    measured.add('transaction')
+
+    # Фото: копирование файла в хранилище и сборка мусора
+    photo_dir = tempfile.mkdtemp(prefix='bench_photos_')
+    photo = _unique(os.path.join(photo_dir, 'photo_'))
+
+    def photo_file():
+        path = photo() + '.jpg'
+        with open(path, 'wb') as f:
+            f.write(os.urandom(200 * 1024))
+        return (path,)
+    measure('store_photo', setup=photo_file)
+    measure('collect_unused_photos', 0)
+    shutil.rmtree(photo_dir, ignore_errors=True)
+    return measured
+
+
+def run_gui_benchmarks(runner, db, work_dir):
+    """Заполнение таблиц и моделей ConfectioneryApp данными, уже полученными из БД"""
+    print("🖥 Заполнение таблиц интерфейса")
+    from PyQt5.QtWidgets import QApplication
+
+    import main
+
+    app = QApplication.instance() or QApplication([sys.argv[0]])
+    # Главное окно открывает confectionery.db в текущем каталоге
+    previous_dir = os.getcwd()
+    os.chdir(work_dir)
+    try:
+        windows = []
+        runner.measure('gui', 'main_window', lambda: windows.append(main.ConfectioneryApp()),
+                       repeat=1)
+        window = windows.pop()
+        window.show()
+        # Запросы запуска выполняются до замеров
+        deadline = time.perf_counter() + 30
+        app.processEvents()
+        while window.dbw.pending and time.perf_counter() < deadline:
+            app.processEvents()
+            time.sleep(0.005)
+        window.change_timer.stop()
+        window.prune_timer.stop()
+
+        def filled(func, *args):
+            # Отрисовка входит в замер: представления перестраиваются в цикле событий
+            def run():
+                func(*args)
+                app.processEvents()
+            return run
+
+        page = db.get_orders_page()
+        next_page = db.get_orders_page(after=page[1]) if page[1] else ([], None)
+        clients_page = db.get_clients_page()
+        desserts = db.get_all_desserts()
+        found = db.search_orders(desserts[0][1].split()[0]) if desserts else []
+        sales_by_day = db.get_sales_by_day()
+        sales_by_dessert = [row[1:] for row in db.get_sales_by_dessert()]
+
+        runner.measure('gui', 'orders_first_page', filled(window.on_orders_page_loaded, page))
+        runner.measure('gui', 'orders_next_page', filled(window.orders_model.append_page, *next_page),
+                       setup=lambda: window.orders_model.set_rows(*page))
+        runner.measure('gui', 'orders_search_results', filled(window.on_orders_found, found))
+        runner.measure('gui', 'clients_first_page', filled(window.on_clients_page_loaded,
+                                                           clients_page),
+                       rows=len(clients_page[0]))
+        runner.measure('gui', 'desserts_table', filled(window.fill_desserts_table_rows, desserts),
+                       rows=len(desserts))
+        runner.measure('gui', 'dessert_picker', filled(window.dessert_picker_model.set_desserts,
+                                                       desserts), rows=len(desserts))
+        runner.measure('gui', 'sales_by_day_table', filled(window.fill_report_table,
+                                                           window.salesByDayTable, sales_by_day),
+                       rows=len(sales_by_day))
+        runner.measure('gui', 'sales_by_dessert_table', filled(
+            window.fill_report_table, window.salesByDessertTable, sales_by_dessert
+        ), rows=len(sales_by_dessert))
+        window.close()
+        app.processEvents()
+    finally:
+        os.chdir(previous_dir)
+
+
+def compare_results(current, previous, threshold=REGRESSION_THRESHOLD):
+    """Сравнение медиан с прошлым запуском; возвращает список регрессий"""
+    old = {(result['group'], result['name']): result for result in previous['results']}
+    regressions = []
+    print(f"📈 Сравнение с запуском {previous['meta'].get('created', '?')}:")
+    for result in current['results']:
+        before = old.get((result['group'], result['name']))
+        if before is None:
+            continue
+        change = (result['median_ms'] - before['median_ms']) / max(before['median_ms'], 1e-9)
+        regressed = change > threshold and \
+            result['median_ms'] - before['median_ms'] > REGRESSION_MIN_MS
+        mark = "❌" if regressed else "  "
+        print(f" {mark} {result['group'] + '.' + result['name']:<52}"
+              f"{before['median_ms']:>10.3f} -> {result['median_ms']:>10.3f} мс ({change:+.0%})")
+        if regressed:
+            regressions.append(result['group'] + '.' + result['name'])
+    return regressions
+
+
+def main(argv=None):
+    """Точка входа командной строки для замеров производительности"""
+    parser = argparse.ArgumentParser(
+        description="Замеры производительности БД и заполнения таблиц на синтетических данных"
+    )
+    parser.add_argument('--clients', type=int, default=BENCH_CLIENTS, help="количество клиентов")
+    parser.add_argument('--desserts', type=int, default=BENCH_DESSERTS, help="количество десертов")
+    parser.add_argument('--orders', type=int, default=BENCH_ORDERS, help="количество заказов")
+    parser.add_argument('--days', type=int, default=datagen.DEFAULT_DAYS,
+                        help="за сколько последних дней создаются заказы")
+    parser.add_argument('--seed', type=int, default=BENCH_SEED, help="начальное значение генератора")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="повторов каждого замера")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="файл результатов (JSON)")
+    parser.add_argument('--compare', help="файл результатов прошлого запуска для сравнения")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help="доля замедления, считающаяся регрессией")
+    parser.add_argument('--no-gui', action='store_true', help="без замеров интерфейса")
+    parser.add_argument('--keep', action='store_true', help="не удалять рабочий каталог с БД")
+    args = parser.parse_args(argv)
+
+    work_dir = tempfile.mkdtemp(prefix='confectionery_bench_')
+    db_path = os.path.join(work_dir, 'confectionery.db')
+    print(f"🧪 Набор: клиентов {args.clients}, десертов {args.desserts}, заказов {args.orders}; "
+          f"каталог {work_dir}")
+    runner = BenchmarkRunner(args.repeat)
+    db = DatabaseManager(db_path)
+    try:
+        run_bulk_benchmarks(runner, db, args, work_dir)
+        measured = run_db_benchmarks(runner, db, db_path)
+        if not args.no_gui:
+            run_gui_benchmarks(runner, db, work_dir)
+
+        # Очистка данных - последней: после нее БД пуста
+        runner.measure('db', 'clear_test_data', db.clear_test_data, repeat=1)
+        measured.add('clear_test_data')
+    finally:
+        db.close()
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    public_methods = {
+        name for name, _ in inspect.getmembers(DatabaseManager, inspect.isfunction)
+        if not name.startswith('_')
+    }
+    not_measured = sorted(public_methods - measured - UNMEASURED_METHODS)
+    if not_measured:
+        print(f"⚠️ Методы без замера: {', '.join(not_measured)}")
+
+    results = {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'qt': QT_VERSION_STR,
+            'platform': platform.platform(),
+            'dataset': {
+                'clients': args.clients, 'desserts': args.desserts, 'orders': args.orders,
+                'days': args.days, 'seed': args.seed,
+            },
+            'repeat': args.repeat,
+        },
+        'results': runner.results,
+        'not_measured': not_measured,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"✅ Результаты записаны в {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            previous = json.load(f)
+        if previous['meta'].get('dataset') != results['meta']['dataset']:
+            print("⚠️ Наборы данных запусков различаются: сравнение приблизительное")
+        regressions = compare_results(results, previous, args.threshold)
+        if regressions:
+            print(f"❌ Регрессии: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
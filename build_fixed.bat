@@ -1,13 +1,27 @@
 @echo off
 chcp 65001
-echo === СБОРКА С ИСПРАВЛЕННЫМИ ПУТЯМИ ===
-pyinstaller --onefile --console --name ConfectioneryApp --add-data "ui;ui" --add-data "media;media" main.py
-if exist "dist\ConfectioneryApp.exe" (
+echo === СБОРКА С ВСТРОЕННЫМИ РЕСУРСАМИ ===
+rem Формы и медиафайлы компилируются в модуль ресурсов Qt
+pyrcc5 resources.qrc -o resources_rc.py
+if errorlevel 1 (
+    echo ❌ ОШИБКА компиляции ресурсов
+    pause
+    exit /b 1
+)
+rem Формы компилируются в пакет ui_generated: собранному приложению uic не нужен
+python ui_forms.py
+if errorlevel 1 (
+    echo ❌ ОШИБКА компиляции форм
+    pause
+    exit /b 1
+)
+rem Сборка в папку dist\ConfectioneryApp по ConfectioneryApp.spec.
+rem База и фото хранятся в %LOCALAPPDATA%\ConfectioneryApp и пересборкой не удаляются
+pyinstaller --noconfirm ConfectioneryApp.spec
+if exist "dist\ConfectioneryApp\ConfectioneryApp.exe" (
     echo ✅ УСПЕХ! Запускаем...
-    cd dist
-    ConfectioneryApp.exe
-    cd ..
+    dist\ConfectioneryApp\ConfectioneryApp.exe
 ) else (
     echo ❌ ОШИБКА
 )
-pause
\ No newline at end of file
+pause
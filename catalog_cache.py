@@ -0,0 +1,134 @@
+import threading
+
+# Справочники, хранящиеся в памяти: таблица -> (запрос, колонка ключа-имени, ключ сортировки)
+CATALOGS = {
+    'clients': (
+        'SELECT id, full_name, phone, birth_date, email FROM clients',
+        2,  # телефон уникален, в отличие от ФИО
+        lambda row: (row[1], row[0])
+    ),
+    'desserts': (
+        'SELECT id, name, price_per_kg, price_per_unit, composition FROM desserts',
+        1,
+        lambda row: row[1]
+    ),
+}
+
+# При большем числе измененных строк справочник перечитывается целиком
+MAX_REFRESH_ROWS = 500
+
+
+class CatalogCache:
+    """Кэш справочников клиентов и десертов в памяти
+
+    Таблица загружается целиком при первом обращении, после чего чтения
+    обслуживаются из словарей по ID и по имени. Записи DatabaseManager
+    обновляют кэш сразу, изменения других терминалов применяются
+    через журнал изменений.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._by_name = {}
+        self._sorted = {}
+        self.hits = {table: 0 for table in CATALOGS}
+        self.misses = {table: 0 for table in CATALOGS}
+
+    def _ensure_loaded(self, table):
+        """Загрузка справочника, если его нет в кэше (вызывается под блокировкой)"""
+        if table in self._rows:
+            self.hits[table] += 1
+            return
+
+        self.misses[table] += 1
+        query, name_column, _ = CATALOGS[table]
+        rows = self.db.get_connection().execute(query).fetchall()
+        self._rows[table] = {row[0]: row for row in rows}
+        self._by_name[table] = {row[name_column]: row for row in rows}
+        self._sorted.pop(table, None)
+
+    def get_all(self, table):
+        """Все строки справочника в порядке отображения"""
+        with self._lock:
+            self._ensure_loaded(table)
+            rows = self._sorted.get(table)
+            if rows is None:
+                rows = sorted(self._rows[table].values(), key=CATALOGS[table][2])
+                self._sorted[table] = rows
+            return list(rows)
+
+    def get(self, table, row_id):
+        """Строка справочника по ID или None"""
+        with self._lock:
+            self._ensure_loaded(table)
+            return self._rows[table].get(row_id)
+
+    def get_by_name(self, table, name):
+        """Строка справочника по имени (телефону для клиентов) или None"""
+        with self._lock:
+            self._ensure_loaded(table)
+            return self._by_name[table].get(name)
+
+    def refresh(self, table, row_ids):
+        """Перечитывание указанных строк после изменения в БД"""
+        row_ids = list(row_ids)
+        if not row_ids:
+            return
+
+        with self._lock:
+            if table not in self._rows:
+                # Справочник еще не загружен - обновлять нечего
+                return
+            if len(row_ids) > MAX_REFRESH_ROWS:
+                self._rows.pop(table)
+                self._by_name.pop(table)
+                self._sorted.pop(table, None)
+                return
+
+            query, name_column, _ = CATALOGS[table]
+            placeholders = ','.join('?' * len(row_ids))
+            fresh = {
+                row[0]: row for row in self.db.get_connection().execute(
+                    f"{query} WHERE id IN ({placeholders})", row_ids
+                )
+            }
+
+            rows = self._rows[table]
+            by_name = self._by_name[table]
+            for row_id in row_ids:
+                old = rows.pop(row_id, None)
+                if old is not None and by_name.get(old[name_column]) is old:
+                    del by_name[old[name_column]]
+                row = fresh.get(row_id)
+                if row is not None:
+                    rows[row_id] = row
+                    by_name[row[name_column]] = row
+            self._sorted.pop(table, None)
+
+    def invalidate(self, table=None):
+        """Сброс кэша одной таблицы или всех справочников"""
+        with self._lock:
+            for name in ([table] if table else list(CATALOGS)):
+                self._rows.pop(name, None)
+                self._by_name.pop(name, None)
+                self._sorted.pop(name, None)
+
+    def apply_changes(self, changes):
+        """Применение изменений из журнала: {таблица: множество ID строк}"""
+        for table in CATALOGS:
+            self.refresh(table, changes.get(table, ()))
+
+    def stats(self):
+        """Счетчики попаданий и промахов по таблицам"""
+        with self._lock:
+            return {
+                table: {
+                    'hits': self.hits[table],
+                    'misses': self.misses[table],
+                    'loaded': table in self._rows,
+                    'rows': len(self._rows.get(table, ())),
+                }
+                for table in CATALOGS
+            }
@@ -0,0 +1,16 @@
+from orders_model import PagedTableModel
+
+# Заголовки колонок таблицы клиентов (поля строки get_clients_page по порядку)
+CLIENT_COLUMNS = ["ID", "ФИО", "Телефон", "Дата рождения", "Email"]
+
+
+def client_sort_key(record):
+    """Ключ сортировки клиента: (ФИО, ID), как у страниц get_clients_page"""
+    return str(record[1]), int(record[0])
+
+
+class ClientsTableModel(PagedTableModel):
+    """Модель таблицы клиентов: по ФИО, страницы get_clients_page"""
+
+    columns = CLIENT_COLUMNS
+    sort_key = staticmethod(client_sort_key)
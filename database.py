@@ -1,22 +1,350 @@
+import re
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
 import os
 
+from catalog_cache import CatalogCache
+from media_store import GC_GRACE_SECONDS, MediaStore
+from pricing import PRICE_ITEM_SQL, PRICE_TYPE_KG, reprice_orders
+
+# Размер кэша подготовленных выражений для каждого подключения
+STATEMENT_CACHE_SIZE = 256
+
+# Настройки, применяемые к каждому новому подключению
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-8000",  # ~8 МБ страничного кэша
+    "PRAGMA temp_store=MEMORY",
+)
+
+# Полнотекстовые индексы: таблица -> (FTS-таблица, индексируемые колонки).
+# Отдельных примечаний у заказов нет, поэтому для заказов индексируются их
+# текстовые колонки: список десертов и способ получения
+FTS_INDEXES = {
+    'clients': ('clients_fts', ('full_name', 'phone', 'email')),
+    'desserts': ('desserts_fts', ('name', 'composition')),
+    'orders': ('orders_fts', ('dessert_types', 'delivery_type')),
+}
+
+# Таблицы, изменения которых записываются в журнал changelog, и колонки,
+# изменение которых записывается (служебные колонки не попадают в журнал)
+TRACKED_TABLES = {
+    'clients': ('full_name', 'phone', 'birth_date', 'email'),
+    'desserts': ('name', 'price_per_kg', 'price_per_unit', 'composition'),
+    'orders': ('client_id', 'dessert_types', 'order_date', 'order_time',
+               'delivery_type', 'photo_path'),
+}
+
+# Сколько последних записей журнала изменений хранить
+CHANGELOG_KEEP = 10000
+
+# Файловые системы сетевых дисков: SQLite не поддерживает на них журнал WAL
+NETWORK_FILESYSTEMS = {'nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', 'fuse.sshfs', '9p'}
+
+# Тип сетевого диска в GetDriveTypeW (Windows)
+DRIVE_REMOTE = 4
+
+# Максимальное количество строк в результатах поиска
+SEARCH_LIMIT = 200
+
+# Группы триггеров сводки продаж, которые массовые операции отключают флагом
+# в trigger_control и заменяют обновлением сводки одним запросом
+SALES_INSERT_TRIGGERS = 'sales_insert'  # sales_orders_ai, sales_items_ai
+SALES_UPDATE_TRIGGERS = 'sales_update'  # sales_items_au
+
+# Границы периода отчета, если дата не указана
+REPORT_MIN_DATE = '0000-01-01'
+REPORT_MAX_DATE = '9999-12-31'
+
+# Каталог хранилища фото заказов (рядом с файлом БД)
+MEDIA_DIR_NAME = 'photos'
+
+# Сколько клиентов возвращает поиск по началу ФИО или телефона
+CLIENT_LOOKUP_LIMIT = 50
+
+# Размеры страниц по умолчанию для постраничной выборки
+ORDERS_PAGE_SIZE = 200
+CLIENTS_PAGE_SIZE = 200
+
+
+def client_name_key(full_name):
+    """Ключ поиска клиента по началу ФИО: без учета регистра, лишних пробелов и буквы ё"""
+    return ' '.join((full_name or '').casefold().replace('ё', 'е').split())
+
+
+def client_phone_key(phone):
+    """Ключ поиска по телефону: только цифры, ведущая 8 российского номера - как 7"""
+    digits = re.sub(r'\D', '', phone or '')
+    if len(digits) == 11 and digits.startswith('8'):
+        digits = '7' + digits[1:]
+    return digits
+
+
+def _phone_prefixes(digits):
+    """Варианты начала номера, как его могли ввести: с 8, с 7 или без кода страны"""
+    if digits.startswith('8'):
+        return ['7' + digits[1:]]
+    if digits.startswith('9'):
+        return ['7' + digits, digits]
+    return [digits]
+
+
+def is_network_path(path):
+    """Находится ли файл на сетевом диске: UNC-путь, сетевой диск Windows, NFS/SMB"""
+    path = os.path.abspath(path)
+    if path.startswith(('\\\\', '//')):
+        return True
+    if os.name == 'nt':
+        import ctypes
+        drive = os.path.splitdrive(path)[0]
+        return bool(drive) and ctypes.windll.kernel32.GetDriveTypeW(drive + '\\') == DRIVE_REMOTE
+    try:
+        with open('/proc/mounts', encoding='utf-8') as f:
+            mounts = [line.split()[1:3] for line in f]
+    except OSError:
+        return False
+    # Файл принадлежит самой длинной точке монтирования, с которой начинается путь
+    mount = max(
+        (entry for entry in mounts
+         if path == entry[0] or path.startswith(entry[0].rstrip('/') + '/')),
+        key=lambda entry: len(entry[0]), default=None
+    )
+    return mount is not None and mount[1] in NETWORK_FILESYSTEMS
+
+
+def _triggers_enabled(group):
+    """Условие WHEN триггера: группа не отключена флагом в trigger_control"""
+    return f"(SELECT paused FROM trigger_control WHERE name = '{group}') = 0"
+
+
+class UnitOfWorkConnection(sqlite3.Connection):
+    """Подключение, которое внутри единицы работы не фиксирует транзакцию
+
+    Методы DatabaseManager пишут через `with conn:`; если вызов идет внутри
+    DatabaseManager.transaction(), фиксацию и откат выполняет транзакция.
+    """
+
+    in_unit_of_work = False
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.in_unit_of_work:
+            return False
+        return super().__exit__(exc_type, exc_value, traceback)
+
+
+class TracingCursor(sqlite3.Cursor):
+    """Курсор, передающий время каждого запроса трассировщику подключения"""
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self.connection.tracer.statement_finished(
+                self.connection, sql, parameters, time.perf_counter() - started
+            )
+
+    def executemany(self, sql, seq_of_parameters):
+        # План запроса строится по первому набору параметров, если он известен заранее
+        first = seq_of_parameters[0] if isinstance(seq_of_parameters, (list, tuple)) \
+            and seq_of_parameters else None
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self.connection.tracer.statement_finished(
+                self.connection, sql, first, time.perf_counter() - started
+            )
+
+
+class TracingConnection(UnitOfWorkConnection):
+    """Подключение с замером запросов (используется только при включенной трассировке)"""
+
+    tracer = None
+
+    def cursor(self, factory=TracingCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, script):
+        started = time.perf_counter()
+        try:
+            return super().executescript(script)
+        finally:
+            self.tracer.statement_finished(self, script, None, time.perf_counter() - started)
+
 
 class DatabaseManager:
     """Класс для управления базой данных кондитерской"""
 
-    def __init__(self, db_name="confectionery.db"):
+    def __init__(self, db_name="confectionery.db", persistent=True, journal_mode="WAL",
+                 media_dir=None, tracer=None, initialize=True):
+        """initialize=False откладывает init_database (создание таблиц и миграции)
+        до явного вызова - например, в фоновом потоке после показа окна"""
         self.db_name = db_name
-        self.init_database()
+        # Трассировка запросов (QueryTracer); без нее методы и подключения не оборачиваются
+        self.tracer = tracer
+        # persistent=True: одно долгоживущее подключение на поток
+        self.persistent = persistent
+        if journal_mode and journal_mode.upper() == 'WAL' and is_network_path(db_name):
+            # WAL использует общую память процессов и не работает через сеть
+            print("⚠️ База данных на сетевом диске: журнал WAL отключен (journal_mode=DELETE)")
+            journal_mode = 'DELETE'
+        self.journal_mode = journal_mode
+        # Подключения по идентификатору потока ОС: threading.local не подходит
+        # для QThread, где PyQt создает временное состояние потока на каждый слот
+        self._connections = {}
+        self._connections_lock = threading.Lock()
+        # Открытые единицы работы по идентификатору потока ОС
+        self._transactions = {}
+        # Справочники клиентов и десертов в памяти
+        self.catalog = CatalogCache(self)
+        # Фото заказов хранятся по хешу содержимого
+        self.media = MediaStore(media_dir or os.path.join(
+            os.path.dirname(os.path.abspath(db_name)), MEDIA_DIR_NAME
+        ))
+        if tracer is not None:
+            tracer.instrument(self)
+        if initialize:
+            self.init_database()
+
+    def _open_connection(self):
+        """Открытие нового подключения с настройками производительности"""
+        conn = sqlite3.connect(
+            self.db_name,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            check_same_thread=False,
+            factory=UnitOfWorkConnection if self.tracer is None else TracingConnection
+        )
+        if self.tracer is not None:
+            conn.tracer = self.tracer
+            conn.set_trace_callback(self.tracer.sqlite_step)
+        if self.journal_mode:
+            conn.execute(f"PRAGMA journal_mode={self.journal_mode}")
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
 
     def get_connection(self):
-        """Создание подключения к базе данных"""
-        return sqlite3.connect(self.db_name)
+        """Получение подключения к базе данных (переиспользуется в пределах потока)"""
+        thread_id = threading.get_ident()
+        transaction = self._transactions.get(thread_id)
+        if transaction is not None:
+            # Внутри единицы работы все вызовы идут через ее подключение
+            return transaction['conn']
+
+        if not self.persistent:
+            return self._open_connection()
+
+        conn = self._connections.get(thread_id)
+        if conn is None:
+            conn = self._open_connection()
+            with self._connections_lock:
+                self._connections[thread_id] = conn
+        return conn
+
+    def release_connection(self):
+        """Закрытие подключения текущего потока (для завершающихся фоновых потоков)"""
+        with self._connections_lock:
+            conn = self._connections.pop(threading.get_ident(), None)
+        if conn is not None:
+            conn.close()
+
+    def close(self):
+        """Закрытие всех постоянных подключений (вызывается при выходе)"""
+        with self._connections_lock:
+            connections, self._connections = list(self._connections.values()), {}
+        for conn in connections:
+            try:
+                # Обновление статистики планировщика для новых индексов
+                conn.execute("PRAGMA optimize")
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+    @contextmanager
+    def transaction(self):
+        """Единица работы: все записи внутри блока фиксируются одним COMMIT
+
+        Пример:
+            with db.transaction():
+                client_id = db.add_client(...)
+                db.add_order(client_id, ...)
+
+        При исключении изменения блока откатываются. Вложенный блок
+        становится точкой сохранения (SAVEPOINT): его ошибка откатывает
+        только его изменения, если исключение перехвачено снаружи.
+        Кэш справочников обновляется по завершении внешнего блока.
+        """
+        thread_id = threading.get_ident()
+        transaction = self._transactions.get(thread_id)
+
+        if transaction is not None:
+            transaction['depth'] += 1
+            savepoint = f"uow_{transaction['depth']}"
+            conn = transaction['conn']
+            conn.execute(f"SAVEPOINT {savepoint}")
+            try:
+                yield conn
+                conn.execute(f"RELEASE {savepoint}")
+            except BaseException:
+                conn.execute(f"ROLLBACK TO {savepoint}")
+                conn.execute(f"RELEASE {savepoint}")
+                raise
+            finally:
+                transaction['depth'] -= 1
+            return
+
+        conn = self.get_connection()
+        transaction = {'conn': conn, 'depth': 0, 'changed': {}}
+        conn.execute("BEGIN IMMEDIATE")
+        conn.in_unit_of_work = True
+        self._transactions[thread_id] = transaction
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            conn.in_unit_of_work = False
+            del self._transactions[thread_id]
+            # После отката перечитанные строки совпадут с содержимым БД
+            for table, row_ids in transaction['changed'].items():
+                self.catalog.refresh(table, row_ids)
+            if not self.persistent:
+                conn.close()
+
+    def execute_batch(self, operations):
+        """Выполнение нескольких операций записи одной транзакцией
+
+        operations - список (имя метода, аргументы), например
+        [('delete_order', (5,)), ('delete_client', (2,))].
+        Возвращает список результатов операций.
+        """
+        with self.transaction():
+            return [getattr(self, method)(*args) for method, args in operations]
+
+    def _catalog_changed(self, table, row_ids):
+        """Обновление кэша справочников после записи (в единице работы - по ее завершении)"""
+        transaction = self._transactions.get(threading.get_ident())
+        if transaction is None:
+            self.catalog.refresh(table, row_ids)
+        else:
+            transaction['changed'].setdefault(table, set()).update(row_ids)
 
     def init_database(self):
-        """Инициализация базы данных и создание таблиц"""
-        with self.get_connection() as conn:
+        """Инициализация базы данных, создание таблиц и обновление схемы"""
+        conn = self.get_connection()
+        with conn:
             cursor = conn.cursor()
 
             # Таблица клиентов
@@ -55,6 +383,15 @@ class DatabaseManager:
                 )
             ''')
 
+        # Все последующие изменения схемы - через миграции
+        self._migrate_schema(conn)
+
+        with conn:
+            # Проверка и заполнение - под блокировкой записи, чтобы тестовые данные
+            # не добавили одновременно два терминала
+            conn.execute("BEGIN IMMEDIATE")
+            cursor = conn.cursor()
+
             # Проверяем, есть ли уже данные в таблицах
             cursor.execute("SELECT COUNT(*) FROM clients")
             clients_count = cursor.fetchone()[0]
@@ -66,7 +403,631 @@ class DatabaseManager:
             if clients_count == 0 and desserts_count == 0:
                 self._add_sample_data(cursor)
 
-            conn.commit()
+        # Журнал изменений хранит только последние записи (далее - по таймеру приложения)
+        self.prune_changelog()
+
+    # Миграции схемы
+    def _schema_migrations(self):
+        """Список миграций: (версия схемы, метод миграции) в порядке применения"""
+        return [
+            (1, self._migration_order_items),
+            (2, self._migration_list_indexes),
+            (3, self._migration_keyset_indexes),
+            (4, self._migration_fts),
+            (5, self._migration_changelog),
+            (6, self._migration_sales_summary),
+            (7, self._migration_order_pricing),
+            (8, self._migration_photo_store),
+            (9, self._migration_client_lookup),
+        ]
+
+    def _migration_preparations(self):
+        """Подготовка миграций вне транзакции: версия схемы -> метод
+
+        Долгая работа с файлами выполняется до BEGIN IMMEDIATE, чтобы не
+        держать блокировку записи; результат передается миграции вторым аргументом.
+        """
+        return {
+            8: self._prepare_photo_store,
+        }
+
+    def get_schema_version(self):
+        """Текущая версия схемы (PRAGMA user_version)"""
+        return self.get_connection().execute("PRAGMA user_version").fetchone()[0]
+
+    def _migrate_schema(self, conn):
+        """Последовательное применение недостающих миграций схемы"""
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        preparations = self._migration_preparations()
+
+        for target_version, migration in self._schema_migrations():
+            if version >= target_version:
+                continue
+
+            args = ()
+            if target_version in preparations:
+                args = (preparations[target_version](conn),)
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Версия перечитывается под блокировкой записи: другой терминал
+                # или поток мог выполнить эту миграцию, пока мы ждали блокировку
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+                if version >= target_version:
+                    conn.rollback()
+                    continue
+                print(f"Обновление схемы базы данных до версии {target_version}...")
+                migration(conn.cursor(), *args)
+                conn.execute(f"PRAGMA user_version={target_version}")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            version = target_version
+
+    def _migration_order_items(self, cursor):
+        """Миграция 1: таблица позиций заказов и перенос dessert_types"""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS order_items (
+                order_id INTEGER NOT NULL,
+                dessert_id INTEGER NOT NULL,
+                quantity INTEGER NOT NULL DEFAULT 1,
+                PRIMARY KEY (order_id, dessert_id),
+                FOREIGN KEY (order_id) REFERENCES orders (id),
+                FOREIGN KEY (dessert_id) REFERENCES desserts (id)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_order_items_dessert
+            ON order_items (dessert_id, order_id)
+        ''')
+        self._migrate_order_items(cursor)
+
+    def _migration_list_indexes(self, cursor):
+        """Миграция 2: индексы для сортировки списков и соединения с клиентами"""
+        # Список заказов: ORDER BY order_date DESC, order_time DESC
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_orders_date_time
+            ON orders (order_date, order_time, client_id)
+        ''')
+        # Заказы клиента (соединение и удаление по client_id)
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_orders_client
+            ON orders (client_id)
+        ''')
+        # Список клиентов: ORDER BY full_name, покрывающий индекс
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_clients_full_name
+            ON clients (full_name, phone, birth_date, email)
+        ''')
+
+    def _migration_keyset_indexes(self, cursor):
+        """Миграция 3: индексы с ID в ключе для постраничной выборки"""
+        # rowid неявно завершает ключ индекса: (order_date, order_time, id)
+        cursor.execute("DROP INDEX IF EXISTS idx_orders_date_time")
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_orders_recent
+            ON orders (order_date, order_time)
+        ''')
+        cursor.execute("DROP INDEX IF EXISTS idx_clients_full_name")
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_clients_name_id
+            ON clients (full_name, id, phone, birth_date, email)
+        ''')
+
+    def _migration_fts(self, cursor):
+        """Миграция 4: полнотекстовые индексы FTS5, синхронизируемые триггерами"""
+        for table, (fts_table, columns) in FTS_INDEXES.items():
+            column_list = ', '.join(columns)
+            new_values = ', '.join(f'new.{column}' for column in columns)
+            old_values = ', '.join(f'old.{column}' for column in columns)
+
+            cursor.execute(f'''
+                CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5(
+                    {column_list},
+                    content='{table}', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+                )
+            ''')
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {table} BEGIN
+                    INSERT INTO {fts_table} (rowid, {column_list}) VALUES (new.id, {new_values});
+                END
+            ''')
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {table} BEGIN
+                    INSERT INTO {fts_table} ({fts_table}, rowid, {column_list})
+                    VALUES ('delete', old.id, {old_values});
+                END
+            ''')
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {fts_table}_au
+                AFTER UPDATE OF {column_list} ON {table} BEGIN
+                    INSERT INTO {fts_table} ({fts_table}, rowid, {column_list})
+                    VALUES ('delete', old.id, {old_values});
+                    INSERT INTO {fts_table} (rowid, {column_list}) VALUES (new.id, {new_values});
+                END
+            ''')
+            # Индексация уже существующих строк
+            cursor.execute(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild')")
+
+    def _migration_changelog(self, cursor):
+        """Миграция 5: журнал изменений для обнаружения записей других терминалов"""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS changelog (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                table_name TEXT NOT NULL,
+                row_id INTEGER NOT NULL,
+                operation TEXT NOT NULL
+            )
+        ''')
+        for table, columns in TRACKED_TABLES.items():
+            for suffix, event, row in (('ai', 'INSERT', 'new'),
+                                       ('au', f"UPDATE OF {', '.join(columns)}", 'new'),
+                                       ('ad', 'DELETE', 'old')):
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS changelog_{table}_{suffix}
+                    AFTER {event} ON {table} BEGIN
+                        INSERT INTO changelog (table_name, row_id, operation)
+                        VALUES ('{table}', {row}.id, '{event[0]}');
+                    END
+                ''')
+
+    def _migration_sales_summary(self, cursor):
+        """Миграция 6: сводные таблицы продаж по дням и десертам, обновляемые триггерами"""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS sales_daily (
+                day TEXT PRIMARY KEY,
+                orders INTEGER NOT NULL DEFAULT 0,
+                items INTEGER NOT NULL DEFAULT 0,
+                revenue REAL NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS sales_daily_dessert (
+                day TEXT NOT NULL,
+                dessert_id INTEGER NOT NULL,
+                orders INTEGER NOT NULL DEFAULT 0,
+                quantity INTEGER NOT NULL DEFAULT 0,
+                revenue REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, dessert_id)
+            ) WITHOUT ROWID
+        ''')
+
+        # Флаги отключения групп триггеров: схема не меняется, а откат транзакции
+        # возвращает флаг вместе с данными
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS trigger_control (
+                name TEXT PRIMARY KEY,
+                paused INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+        ''')
+        cursor.executemany(
+            "INSERT OR IGNORE INTO trigger_control (name) VALUES (?)",
+            [(SALES_INSERT_TRIGGERS,), (SALES_UPDATE_TRIGGERS,)]
+        )
+
+        # Количество заказов за день
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS sales_orders_ai AFTER INSERT ON orders
+            WHEN {_triggers_enabled(SALES_INSERT_TRIGGERS)} BEGIN
+                INSERT INTO sales_daily (day, orders) VALUES (new.order_date, 1)
+                ON CONFLICT (day) DO UPDATE SET orders = orders + 1;
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS sales_orders_ad AFTER DELETE ON orders BEGIN
+                UPDATE sales_daily SET orders = orders - 1 WHERE day = old.order_date;
+                DELETE FROM sales_daily
+                WHERE day = old.order_date AND orders <= 0 AND items <= 0;
+            END
+        ''')
+        # Триггеры позиций и заполнение сводки - в миграции 7, когда у позиций появляются суммы
+
+    def _migration_order_pricing(self, cursor):
+        """Миграция 7: цены и суммы позиций и заказов, выручка сводки по суммам позиций"""
+        for column, column_type in (('weight', 'REAL'), ('price_type', 'TEXT'),
+                                    ('unit_price', 'REAL'), ('line_total', 'REAL')):
+            cursor.execute(f"ALTER TABLE order_items ADD COLUMN {column} {column_type}")
+        cursor.execute("ALTER TABLE orders ADD COLUMN total REAL")
+
+        # Позиции заказов: количество и выручка по десерту и по дню. Выручка
+        # фиксируется в момент заказа и не зависит от текущих цен
+        order_day = "(SELECT order_date FROM orders WHERE id = {row}.order_id)"
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS sales_items_ai AFTER INSERT ON order_items
+            WHEN {_triggers_enabled(SALES_INSERT_TRIGGERS)} BEGIN
+                INSERT INTO sales_daily_dessert (day, dessert_id, orders, quantity, revenue)
+                SELECT o.order_date, new.dessert_id, 1, new.quantity, COALESCE(new.line_total, 0)
+                FROM orders o WHERE o.id = new.order_id
+                ON CONFLICT (day, dessert_id) DO UPDATE SET
+                    orders = orders + 1,
+                    quantity = quantity + excluded.quantity,
+                    revenue = revenue + excluded.revenue;
+                UPDATE sales_daily SET
+                    items = items + new.quantity,
+                    revenue = revenue + COALESCE(new.line_total, 0)
+                WHERE day = {order_day.format(row='new')};
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS sales_items_ad AFTER DELETE ON order_items BEGIN
+                UPDATE sales_daily_dessert SET
+                    orders = orders - 1,
+                    quantity = quantity - old.quantity,
+                    revenue = revenue - COALESCE(old.line_total, 0)
+                WHERE day = {order_day.format(row='old')} AND dessert_id = old.dessert_id;
+                DELETE FROM sales_daily_dessert
+                WHERE day = {order_day.format(row='old')} AND dessert_id = old.dessert_id
+                  AND orders <= 0;
+                UPDATE sales_daily SET
+                    items = items - old.quantity,
+                    revenue = revenue - COALESCE(old.line_total, 0)
+                WHERE day = {order_day.format(row='old')};
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS sales_items_au
+            AFTER UPDATE OF quantity, line_total ON order_items
+            WHEN {_triggers_enabled(SALES_UPDATE_TRIGGERS)} BEGIN
+                UPDATE sales_daily_dessert SET
+                    quantity = quantity + new.quantity - old.quantity,
+                    revenue = revenue + COALESCE(new.line_total, 0) - COALESCE(old.line_total, 0)
+                WHERE day = {order_day.format(row='new')} AND dessert_id = new.dessert_id;
+                UPDATE sales_daily SET
+                    items = items + new.quantity - old.quantity,
+                    revenue = revenue + COALESCE(new.line_total, 0) - COALESCE(old.line_total, 0)
+                WHERE day = {order_day.format(row='new')};
+            END
+        ''')
+
+        # Оценка существующих заказов по текущим ценам
+        reprice_orders(cursor, "1")
+        self._rebuild_sales_summary(cursor)
+
+    def _prepare_photo_store(self, conn):
+        """Подготовка миграции 8: копирование фото заказов в хранилище
+
+        Выполняется без блокировки записи. Возвращает {старый путь: ключ}.
+        Если миграцию первым выполнит другой терминал, лишние копии
+        удалит сборщик мусора хранилища.
+        """
+        photo_keys = {}
+        missing = 0
+        for (photo_path,) in conn.execute(
+            "SELECT DISTINCT photo_path FROM orders WHERE photo_path <> ''"
+        ).fetchall():
+            if self.media.is_key(photo_path):
+                continue
+            if not os.path.isfile(photo_path):
+                # Старый путь остается в заказе: файл мог быть на съемном диске
+                missing += 1
+                continue
+            photo_keys[photo_path] = self.media.add(photo_path)
+        if missing:
+            print(f"⚠️ Не найдены файлы фото для переноса в хранилище: {missing}")
+        return photo_keys
+
+    def _migration_photo_store(self, cursor, photo_keys):
+        """Миграция 8: замена путей к фото заказов ключами хранилища
+
+        Файлы скопированы заранее (_prepare_photo_store); заказы, добавленные
+        после копирования, сохраняют старый путь, по которому фото по-прежнему
+        открывается.
+        """
+        cursor.executemany("UPDATE orders SET photo_path = ? WHERE photo_path = ?",
+                           [(key, photo_path) for photo_path, key in photo_keys.items()])
+
+    def _migration_client_lookup(self, cursor):
+        """Миграция 9: ключи поиска клиентов по началу ФИО и телефона с индексами"""
+        cursor.execute("ALTER TABLE clients ADD COLUMN name_key TEXT")
+        cursor.execute("ALTER TABLE clients ADD COLUMN phone_key TEXT")
+
+        # Триггеры полнотекстового индекса и журнала изменений срабатывают
+        # только на видимые колонки, поэтому заполнение ключей их не затрагивает
+        cursor.execute("SELECT id, full_name, phone FROM clients")
+        cursor.executemany(
+            "UPDATE clients SET name_key = ?, phone_key = ? WHERE id = ?",
+            [(client_name_key(full_name), client_phone_key(phone), client_id)
+             for client_id, full_name, phone in cursor.fetchall()]
+        )
+
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_clients_name_key ON clients (name_key, id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_clients_phone_key ON clients (phone_key)")
+
+    def _rebuild_sales_summary(self, cursor, date_from=None, date_to=None):
+        """Пересчет сводных таблиц продаж по заказам и позициям (за период или целиком)"""
+        period = (date_from or REPORT_MIN_DATE, date_to or REPORT_MAX_DATE)
+        cursor.execute("DELETE FROM sales_daily_dessert WHERE day BETWEEN ? AND ?", period)
+        cursor.execute("DELETE FROM sales_daily WHERE day BETWEEN ? AND ?", period)
+        cursor.execute('''
+            INSERT INTO sales_daily_dessert (day, dessert_id, orders, quantity, revenue)
+            SELECT o.order_date, oi.dessert_id, COUNT(*), SUM(oi.quantity),
+                   COALESCE(SUM(oi.line_total), 0)
+            FROM orders o
+            JOIN order_items oi ON oi.order_id = o.id
+            WHERE o.order_date BETWEEN ? AND ?
+            GROUP BY o.order_date, oi.dessert_id
+        ''', period)
+        cursor.execute('''
+            INSERT INTO sales_daily (day, orders)
+            SELECT order_date, COUNT(*) FROM orders
+            WHERE order_date BETWEEN ? AND ?
+            GROUP BY order_date
+        ''', period)
+        cursor.execute('''
+            UPDATE sales_daily SET (items, revenue) = (
+                SELECT SUM(quantity), SUM(revenue) FROM sales_daily_dessert s
+                WHERE s.day = sales_daily.day
+            )
+            WHERE day IN (SELECT day FROM sales_daily_dessert WHERE day BETWEEN ? AND ?)
+        ''', period)
+
+    @contextmanager
+    def triggers_paused(self, cursor, group):
+        """Отключение группы триггеров сводки продаж на время блока with
+
+        Используется массовыми операциями внутри транзакции, которые обновляют
+        сводку одним запросом. Триггеры не удаляются: флаг в trigger_control
+        проверяется их условием WHEN, поэтому схема не меняется, а при
+        откате транзакции флаг откатывается вместе с данными.
+        """
+        cursor.execute("UPDATE trigger_control SET paused = 1 WHERE name = ?", (group,))
+        try:
+            yield
+        finally:
+            cursor.execute("UPDATE trigger_control SET paused = 0 WHERE name = ?", (group,))
+
+    def add_orders_to_sales_summary(self, cursor, first_order_id, last_order_id):
+        """Добавление в сводку продаж заказов с ID из диапазона (включительно)"""
+        cursor.execute('''
+            INSERT INTO sales_daily (day, orders)
+            SELECT order_date, COUNT(*) FROM orders
+            WHERE id BETWEEN ? AND ?
+            GROUP BY order_date
+            ON CONFLICT (day) DO UPDATE SET orders = orders + excluded.orders
+        ''', (first_order_id, last_order_id))
+        cursor.execute('''
+            INSERT INTO sales_daily_dessert (day, dessert_id, orders, quantity, revenue)
+            SELECT o.order_date, oi.dessert_id, COUNT(*), SUM(oi.quantity),
+                   COALESCE(SUM(oi.line_total), 0)
+            FROM order_items oi
+            JOIN orders o ON o.id = oi.order_id
+            WHERE oi.order_id BETWEEN ? AND ?
+            GROUP BY o.order_date, oi.dessert_id
+            ON CONFLICT (day, dessert_id) DO UPDATE SET
+                orders = orders + excluded.orders,
+                quantity = quantity + excluded.quantity,
+                revenue = revenue + excluded.revenue
+        ''', (first_order_id, last_order_id))
+        cursor.execute('''
+            INSERT INTO sales_daily (day, items, revenue)
+            SELECT o.order_date, SUM(oi.quantity), COALESCE(SUM(oi.line_total), 0)
+            FROM order_items oi
+            JOIN orders o ON o.id = oi.order_id
+            WHERE oi.order_id BETWEEN ? AND ?
+            GROUP BY o.order_date
+            ON CONFLICT (day) DO UPDATE SET
+                items = items + excluded.items,
+                revenue = revenue + excluded.revenue
+        ''', (first_order_id, last_order_id))
+
+    # Отслеживание изменений
+    def get_data_version(self):
+        """Счетчик PRAGMA data_version: меняется после коммитов других подключений"""
+        return self.get_connection().execute("PRAGMA data_version").fetchone()[0]
+
+    def prune_changelog(self, keep=CHANGELOG_KEEP):
+        """Удаление старых записей журнала изменений: хранятся только последние keep"""
+        with self.get_connection() as conn:
+            conn.execute(
+                "DELETE FROM changelog WHERE id <= (SELECT MAX(id) FROM changelog) - ?",
+                (keep,)
+            )
+
+    def get_last_change_id(self):
+        """ID последней записи журнала изменений"""
+        cursor = self.get_connection().execute("SELECT COALESCE(MAX(id), 0) FROM changelog")
+        return cursor.fetchone()[0]
+
+    def get_changes_since(self, change_id):
+        """Изменения после указанной записи журнала
+
+        Возвращает (ID последней записи, {таблица: множество ID строк})
+        или None, если часть журнала уже удалена и нужна полная перезагрузка.
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT MIN(id) FROM changelog")
+            first_id = cursor.fetchone()[0]
+            if first_id is not None and first_id > change_id + 1:
+                self.catalog.invalidate()
+                return None
+
+            cursor.execute('''
+                SELECT id, table_name, row_id FROM changelog
+                WHERE id > ?
+                ORDER BY id
+            ''', (change_id,))
+
+            last_id = change_id
+            changes = {table: set() for table in TRACKED_TABLES}
+            for last_id, table_name, row_id in cursor:
+                changes[table_name].add(row_id)
+
+        # Изменения других терминалов применяются и к кэшу справочников
+        self.catalog.apply_changes(changes)
+        return last_id, changes
+
+    def fetch_changes(self, change_id, max_changes=None):
+        """Изменившиеся строки после указанной записи журнала
+
+        Возвращает (ID последней записи, {таблица: {ID: строка или None}}).
+        None означает, что нужна полная перезагрузка: журнал обрезан
+        или изменений больше max_changes.
+        """
+        result = self.get_changes_since(change_id)
+        if result is None:
+            return None
+
+        last_id, changes = result
+        if max_changes is not None and sum(map(len, changes.values())) > max_changes:
+            return None
+
+        getters = {'clients': self.get_client, 'desserts': self.get_dessert, 'orders': self.get_order}
+        rows = {
+            table: {row_id: getters[table](row_id) for row_id in row_ids}
+            for table, row_ids in changes.items()
+        }
+        return last_id, rows
+
+    @staticmethod
+    def _fts_query(text):
+        """Преобразование введенного текста в префиксный запрос FTS5"""
+        tokens = re.findall(r'\w+', text)
+        if not tokens:
+            return None
+        return ' '.join(f'"{token}"*' for token in tokens)
+
+    def search_clients(self, text, limit=SEARCH_LIMIT):
+        """Полнотекстовый поиск клиентов по ФИО, телефону и email"""
+        query = self._fts_query(text)
+        if query is None:
+            return []
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT c.id, c.full_name, c.phone, c.birth_date, c.email FROM clients_fts f
+                JOIN clients c ON c.id = f.rowid
+                WHERE clients_fts MATCH ?
+                ORDER BY f.rank, c.full_name
+                LIMIT ?
+            ''', (query, limit))
+            return cursor.fetchall()
+
+    def find_clients(self, text, limit=CLIENT_LOOKUP_LIMIT):
+        """Клиенты, у которых ФИО или телефон начинается с введенного текста
+
+        Текст из цифр (и знаков номера) ищется по телефону, остальной - по
+        ФИО. Оба поиска - диапазоны по индексам с ограничением числа строк.
+        Возвращает список (ID, ФИО, телефон).
+        """
+        text = (text or '').strip()
+        if not text:
+            return []
+        conn = self.get_connection()
+
+        if re.fullmatch(r'[\d\s()+\-]+', text):
+            digits = re.sub(r'\D', '', text)
+            if not digits:
+                return []
+            rows = set()
+            for prefix in _phone_prefixes(digits):
+                rows.update(conn.execute('''
+                    SELECT id, full_name, phone, phone_key FROM clients
+                    WHERE phone_key >= ? AND phone_key < ?
+                    ORDER BY phone_key
+                    LIMIT ?
+                ''', (prefix, prefix + '\uffff', limit)))
+            return [row[:3] for row in sorted(rows, key=lambda row: row[3])[:limit]]
+
+        key = client_name_key(text)
+        return conn.execute('''
+            SELECT id, full_name, phone FROM clients
+            WHERE name_key >= ? AND name_key < ?
+            ORDER BY name_key, id
+            LIMIT ?
+        ''', (key, key + '\uffff', limit)).fetchall()
+
+    def search_desserts(self, text, limit=SEARCH_LIMIT):
+        """Полнотекстовый поиск десертов по названию и составу"""
+        query = self._fts_query(text)
+        if query is None:
+            return []
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT d.id, d.name, d.price_per_kg, d.price_per_unit, d.composition
+                FROM desserts_fts f
+                JOIN desserts d ON d.id = f.rowid
+                WHERE desserts_fts MATCH ?
+                ORDER BY f.rank, d.name
+                LIMIT ?
+            ''', (query, limit))
+            return cursor.fetchall()
+
+    def search_orders(self, text, limit=SEARCH_LIMIT):
+        """Поиск заказов по десертам, типу получения и данным клиента"""
+        query = self._fts_query(text)
+        if query is None:
+            return []
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                WITH matched (id) AS (
+                    SELECT rowid FROM orders_fts WHERE orders_fts MATCH ?
+                    UNION
+                    SELECT o2.id FROM orders o2
+                    WHERE o2.client_id IN (
+                        SELECT rowid FROM clients_fts WHERE clients_fts MATCH ?
+                    )
+                )
+                SELECT o.id, c.full_name, c.phone, o.dessert_types, o.order_date,
+                       o.order_time, o.delivery_type, o.photo_path
+                FROM matched m
+                JOIN orders o ON o.id = m.id
+                JOIN clients c ON o.client_id = c.id
+                ORDER BY o.order_date DESC, o.order_time DESC, o.id DESC
+                LIMIT ?
+            ''', (query, query, limit))
+            return cursor.fetchall()
+
+    @staticmethod
+    def _split_dessert_types(dessert_types, known_names):
+        """Разбор строки dessert_types с учетом названий, содержащих запятые"""
+        parts = dessert_types.split(',')
+        names = []
+        i = 0
+        while i < len(parts):
+            # Ищем самое длинное известное название, начинающееся с parts[i]
+            for j in range(len(parts), i, -1):
+                candidate = ','.join(parts[i:j]).strip()
+                if candidate in known_names:
+                    names.append(candidate)
+                    i = j
+                    break
+            else:
+                if parts[i].strip():
+                    names.append(parts[i].strip())
+                i += 1
+        return names
+
+    def _migrate_order_items(self, cursor):
+        """Заполнение order_items для заказов, у которых есть только dessert_types"""
+        cursor.execute("SELECT id, name FROM desserts")
+        dessert_ids = {name: dessert_id for dessert_id, name in cursor.fetchall()}
+
+        cursor.execute(
+            "SELECT id, dessert_types FROM orders "
+            "WHERE dessert_types IS NOT NULL AND dessert_types != '' "
+            "AND id NOT IN (SELECT order_id FROM order_items)"
+        )
+        items = []
+        unknown = set()
+        for order_id, dessert_types in cursor.fetchall():
+            for name in self._split_dessert_types(dessert_types, dessert_ids):
+                if name in dessert_ids:
+                    items.append((order_id, dessert_ids[name]))
+                else:
+                    unknown.add(name)
+
+        cursor.executemany('''
+            INSERT INTO order_items (order_id, dessert_id, quantity)
+            VALUES (?, ?, 1)
+            ON CONFLICT (order_id, dessert_id) DO UPDATE SET quantity = quantity + 1
+        ''', items)
+
+        if unknown:
+            print(f"⚠️ При переносе заказов не найдены десерты: {', '.join(sorted(unknown))}")
 
     def _add_sample_data(self, cursor):
         """Добавление тестовых данных только один раз при первом запуске"""
@@ -80,9 +1041,10 @@ class DatabaseManager:
         ]
 
         cursor.executemany('''
-            INSERT INTO clients (full_name, phone, birth_date, email)
-            VALUES (?, ?, ?, ?)
-        ''', clients)
+            INSERT INTO clients (full_name, phone, birth_date, email, name_key, phone_key)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [client + (client_name_key(client[0]), client_phone_key(client[1]))
+              for client in clients])
 
         # Тестовые десерты
         desserts = [
@@ -99,7 +1061,7 @@ class DatabaseManager:
         ''', desserts)
 
         # Получаем ID добавленных клиентов и десертов
-        cursor.execute("SELECT id FROM clients")
+        cursor.execute("SELECT id FROM clients ORDER BY id")
         client_ids = [row[0] for row in cursor.fetchall()]
 
         # Тестовые заказы (только 2 заказа)
@@ -112,20 +1074,27 @@ class DatabaseManager:
             INSERT INTO orders (client_id, dessert_types, order_date, order_time, delivery_type, photo_path)
             VALUES (?, ?, ?, ?, ?, ?)
         ''', orders)
+        self._migrate_order_items(cursor)
+        reprice_orders(cursor, "total IS NULL")
 
         print("Тестовые данные успешно добавлены!")
 
     def clear_test_data(self):
         """Очистка всех тестовых данных (для отладки)"""
-        with self.get_connection() as conn:
+        with self.transaction() as conn:
             cursor = conn.cursor()
+            cursor.execute("DELETE FROM order_items")
             cursor.execute("DELETE FROM orders")
             cursor.execute("DELETE FROM desserts")
             cursor.execute("DELETE FROM clients")
             cursor.execute("DELETE FROM sqlite_sequence WHERE name IN ('clients', 'desserts', 'orders')")
-            conn.commit()
+        self.catalog.invalidate()
         print("Все тестовые данные очищены!")
 
+    def get_cache_stats(self):
+        """Счетчики попаданий и промахов кэша справочников"""
+        return self.catalog.stats()
+
     def get_table_counts(self):
         """Получение количества записей в таблицах (для отладки)"""
         with self.get_connection() as conn:
@@ -147,21 +1116,55 @@ class DatabaseManager:
 
     # Методы для работы с клиентами
     def get_all_clients(self):
-        """Получение всех клиентов"""
+        """Получение всех клиентов (из кэша справочников)"""
+        return self.catalog.get_all('clients')
+
+    def get_client(self, client_id):
+        """Получение клиента по ID (из кэша справочников)"""
+        return self.catalog.get('clients', client_id)
+
+    def get_client_by_phone(self, phone):
+        """Получение клиента по телефону (из кэша справочников)"""
+        return self.catalog.get_by_name('clients', phone)
+
+    def get_clients_page(self, limit=CLIENTS_PAGE_SIZE, after=None):
+        """Страница клиентов, отсортированных по ФИО
+
+        after - курсор (full_name, id) последней строки предыдущей страницы.
+        Возвращает (строки, курсор следующей страницы или None).
+        """
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT * FROM clients ORDER BY full_name')
-            return cursor.fetchall()
+            if after is None:
+                cursor.execute('''
+                    SELECT id, full_name, phone, birth_date, email FROM clients
+                    ORDER BY full_name, id
+                    LIMIT ?
+                ''', (limit,))
+            else:
+                cursor.execute('''
+                    SELECT id, full_name, phone, birth_date, email FROM clients
+                    WHERE (full_name, id) > (?, ?)
+                    ORDER BY full_name, id
+                    LIMIT ?
+                ''', (after[0], after[1], limit))
+            rows = cursor.fetchall()
+
+        next_cursor = (rows[-1][1], rows[-1][0]) if len(rows) == limit else None
+        return rows, next_cursor
 
     def add_client(self, full_name, phone, birth_date, email):
         """Добавление нового клиента"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
-                INSERT INTO clients (full_name, phone, birth_date, email)
-                VALUES (?, ?, ?, ?)
-            ''', (full_name, phone, birth_date, email))
-            return cursor.lastrowid
+                INSERT INTO clients (full_name, phone, birth_date, email, name_key, phone_key)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (full_name, phone, birth_date, email,
+                  client_name_key(full_name), client_phone_key(phone)))
+            client_id = cursor.lastrowid
+        self._catalog_changed('clients', [client_id])
+        return client_id
 
     def update_client(self, client_id, full_name, phone, birth_date, email):
         """Обновление данных клиента"""
@@ -169,23 +1172,31 @@ class DatabaseManager:
             cursor = conn.cursor()
             cursor.execute('''
                 UPDATE clients 
-                SET full_name=?, phone=?, birth_date=?, email=?
+                SET full_name=?, phone=?, birth_date=?, email=?, name_key=?, phone_key=?
                 WHERE id=?
-            ''', (full_name, phone, birth_date, email, client_id))
+            ''', (full_name, phone, birth_date, email,
+                  client_name_key(full_name), client_phone_key(phone), client_id))
+        self._catalog_changed('clients', [client_id])
 
     def delete_client(self, client_id):
         """Удаление клиента"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('DELETE FROM clients WHERE id=?', (client_id,))
+        self._catalog_changed('clients', [client_id])
 
     # Методы для работы с десертами
     def get_all_desserts(self):
-        """Получение всех десертов"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT * FROM desserts ORDER BY name')
-            return cursor.fetchall()
+        """Получение всех десертов (из кэша справочников)"""
+        return self.catalog.get_all('desserts')
+
+    def get_dessert(self, dessert_id):
+        """Получение десерта по ID (из кэша справочников)"""
+        return self.catalog.get('desserts', dessert_id)
+
+    def get_dessert_by_name(self, name):
+        """Получение десерта по названию (из кэша справочников)"""
+        return self.catalog.get_by_name('desserts', name)
 
     def add_dessert(self, name, price_per_kg, price_per_unit, composition):
         """Добавление нового десерта"""
@@ -195,7 +1206,9 @@ class DatabaseManager:
                 INSERT INTO desserts (name, price_per_kg, price_per_unit, composition)
                 VALUES (?, ?, ?, ?)
             ''', (name, price_per_kg, price_per_unit, composition))
-            return cursor.lastrowid
+            dessert_id = cursor.lastrowid
+        self._catalog_changed('desserts', [dessert_id])
+        return dessert_id
 
     def update_dessert(self, dessert_id, name, price_per_kg, price_per_unit, composition):
         """Обновление данных десерта"""
@@ -206,12 +1219,14 @@ class DatabaseManager:
                 SET name=?, price_per_kg=?, price_per_unit=?, composition=?
                 WHERE id=?
             ''', (name, price_per_kg, price_per_unit, composition, dessert_id))
+        self._catalog_changed('desserts', [dessert_id])
 
     def delete_dessert(self, dessert_id):
         """Удаление десерта"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('DELETE FROM desserts WHERE id=?', (dessert_id,))
+        self._catalog_changed('desserts', [dessert_id])
 
     # Методы для работы с заказами
     def get_all_orders(self):
@@ -223,22 +1238,238 @@ class DatabaseManager:
                        o.order_time, o.delivery_type, o.photo_path
                 FROM orders o
                 JOIN clients c ON o.client_id = c.id
-                ORDER BY o.order_date DESC, o.order_time DESC
+                ORDER BY o.order_date DESC, o.order_time DESC, o.id DESC
             ''')
             return cursor.fetchall()
 
-    def add_order(self, client_id, dessert_types, order_date, order_time, delivery_type, photo_path):
-        """Добавление нового заказа"""
+    def get_order(self, order_id):
+        """Получение заказа по ID с информацией о клиенте"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
-                INSERT INTO orders (client_id, dessert_types, order_date, order_time, delivery_type, photo_path)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (client_id, dessert_types, order_date, order_time, delivery_type, photo_path))
-            return cursor.lastrowid
+                SELECT o.id, c.full_name, c.phone, o.dessert_types, o.order_date,
+                       o.order_time, o.delivery_type, o.photo_path, o.total
+                FROM orders o
+                JOIN clients c ON o.client_id = c.id
+                WHERE o.id = ?
+            ''', (order_id,))
+            return cursor.fetchone()
+
+    def get_orders_page(self, limit=ORDERS_PAGE_SIZE, after=None):
+        """Страница заказов, начиная с самых новых
+
+        after - курсор (order_date, order_time, id) последней строки
+        предыдущей страницы. Возвращает (строки, курсор следующей страницы или None).
+        """
+        query = '''
+            SELECT o.id, c.full_name, c.phone, o.dessert_types, o.order_date,
+                   o.order_time, o.delivery_type, o.photo_path
+            FROM orders o
+            JOIN clients c ON o.client_id = c.id
+            {where}
+            ORDER BY o.order_date DESC, o.order_time DESC, o.id DESC
+            LIMIT ?
+        '''
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            if after is None:
+                cursor.execute(query.format(where=''), (limit,))
+            else:
+                cursor.execute(
+                    query.format(where='WHERE (o.order_date, o.order_time, o.id) < (?, ?, ?)'),
+                    (after[0], after[1], after[2], limit)
+                )
+            rows = cursor.fetchall()
+
+        next_cursor = (rows[-1][4], rows[-1][5], rows[-1][0]) if len(rows) == limit else None
+        return rows, next_cursor
+
+    def add_order(self, client_id, dessert_items, order_date, order_time, delivery_type, photo_path):
+        """Добавление нового заказа с расчетом сумм позиций по текущим ценам
+
+        dessert_items - список ID десертов, пар (ID десерта, количество)
+        или троек (ID десерта, количество, вес в кг или None). Для десерта
+        с ценой только за кг вес обязателен, иначе ValueError.
+        photo_path - путь к файлу фото (копируется в хранилище) или ключ хранилища.
+        """
+        # Файл копируется до начала транзакции, чтобы не держать блокировку записи
+        photo_path = self.store_photo(photo_path)
+
+        items = {}
+        for item in dessert_items:
+            if not isinstance(item, (tuple, list)):
+                item = (item,)
+            dessert_id = item[0]
+            quantity = item[1] if len(item) > 1 else 1
+            weight = item[2] if len(item) > 2 else None
+            old_quantity, old_weight = items.get(dessert_id, (0, None))
+            if weight is not None and old_weight is not None:
+                weight += old_weight
+            items[dessert_id] = (old_quantity + quantity,
+                                 weight if weight is not None else old_weight)
+
+        # Позиции оцениваются до записи, чтобы строка заказа вставлялась один раз
+        # вместе с суммой и списком десертов
+        with self.transaction() as conn:
+            cursor = conn.cursor()
+            priced = []
+            for dessert_id, (quantity, weight) in items.items():
+                cursor.execute(PRICE_ITEM_SQL, (quantity, weight, dessert_id))
+                row = cursor.fetchone()
+                if row is None:
+                    continue
+                name, price_type, unit_price, _ = row
+                # Без веса десерт с ценой только за кг оценивается по количеству как
+                # по весу; новый заказ так не оформляется
+                if weight is None and price_type == PRICE_TYPE_KG and unit_price:
+                    raise ValueError(f"не указан вес десерта, который продается на вес: {name}")
+                priced.append((dessert_id, quantity, weight) + tuple(row))
+
+            # Текстовый список десертов сохраняется для отображения в таблице заказов
+            dessert_types = ','.join(sorted(item[3] for item in priced)) or None
+            total = round(sum(item[6] for item in priced), 2)
+            cursor.execute('''
+                INSERT INTO orders (client_id, dessert_types, order_date, order_time,
+                                    delivery_type, photo_path, total)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (client_id, dessert_types, order_date, order_time, delivery_type,
+                  photo_path, total))
+            order_id = cursor.lastrowid
+
+            cursor.executemany('''
+                INSERT INTO order_items (order_id, dessert_id, quantity, weight,
+                                         price_type, unit_price, line_total)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', [
+                (order_id, dessert_id, quantity, weight, price_type, unit_price, line_total)
+                for dessert_id, quantity, weight, _, price_type, unit_price, line_total in priced
+            ])
+            return order_id
+
+    def store_photo(self, photo_path):
+        """Ключ хранилища для фото заказа: файл добавляется в хранилище, ключ - без изменений"""
+        if not photo_path or self.media.is_key(photo_path):
+            return photo_path or ''
+        return self.media.add(photo_path)
+
+    def collect_unused_photos(self, grace_seconds=GC_GRACE_SECONDS):
+        """Удаление из хранилища фото, на которые не ссылается ни один заказ
+
+        Возвращает (количество удаленных файлов, освобождено байт).
+        """
+        referenced = {
+            row[0] for row in self.get_connection().execute(
+                "SELECT DISTINCT photo_path FROM orders WHERE photo_path <> ''"
+            )
+        }
+        return self.media.collect_garbage(referenced, grace_seconds)
 
     def delete_order(self, order_id):
         """Удаление заказа"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('DELETE FROM orders WHERE id=?', (order_id,))
\ No newline at end of file
+            cursor.execute('DELETE FROM order_items WHERE order_id=?', (order_id,))
+            cursor.execute('DELETE FROM orders WHERE id=?', (order_id,))
+
+    def get_order_items(self, order_id):
+        """Получение позиций заказа: (ID десерта, название, количество, вес,
+        способ расчета, цена, сумма)"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT oi.dessert_id, d.name, oi.quantity, oi.weight,
+                       oi.price_type, oi.unit_price, oi.line_total
+                FROM order_items oi
+                LEFT JOIN desserts d ON d.id = oi.dessert_id
+                WHERE oi.order_id = ?
+                ORDER BY d.name
+            ''', (order_id,))
+            return cursor.fetchall()
+
+    def get_orders_with_dessert(self, dessert_id):
+        """Получение ID заказов, содержащих указанный десерт"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                'SELECT order_id FROM order_items WHERE dessert_id=? ORDER BY order_id',
+                (dessert_id,)
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def get_dessert_quantity(self, dessert_id, date_from=None, date_to=None):
+        """Количество проданных единиц десерта за период (даты в формате yyyy-MM-dd)"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT COALESCE(SUM(oi.quantity), 0)
+                FROM order_items oi
+                JOIN orders o ON o.id = oi.order_id
+                WHERE oi.dessert_id = ?
+                  AND (? IS NULL OR o.order_date >= ?)
+                  AND (? IS NULL OR o.order_date <= ?)
+            ''', (dessert_id, date_from, date_from, date_to, date_to))
+            return cursor.fetchone()[0]
+
+    # Отчеты о продажах (по сводным таблицам)
+    def rebuild_sales_summary(self, date_from=None, date_to=None):
+        """Пересчет сводных таблиц продаж за период (по умолчанию - с нуля)"""
+        with self.transaction() as conn:
+            self._rebuild_sales_summary(conn.cursor(), date_from, date_to)
+
+    def recompute_order_totals(self, date_from=None, date_to=None):
+        """Пересчет сумм позиций и заказов за период по текущим ценам
+
+        Позиции, суммы заказов и сводка продаж обновляются несколькими
+        запросами на весь период. Возвращает количество заказов.
+        """
+        period = (date_from or REPORT_MIN_DATE, date_to or REPORT_MAX_DATE)
+        with self.transaction() as conn:
+            cursor = conn.cursor()
+            # Сводка за период пересчитывается целиком, а не триггером на каждую позицию
+            with self.triggers_paused(cursor, SALES_UPDATE_TRIGGERS):
+                reprice_orders(cursor, "order_date BETWEEN ? AND ?", period)
+            self._rebuild_sales_summary(cursor, *period)
+            cursor.execute("SELECT COUNT(*) FROM orders WHERE order_date BETWEEN ? AND ?", period)
+            return cursor.fetchone()[0]
+
+    def get_orders_total(self, date_from=None, date_to=None):
+        """Количество и сумма заказов за период по сохраненным суммам заказов"""
+        cursor = self.get_connection().execute('''
+            SELECT COUNT(*), ROUND(COALESCE(SUM(total), 0), 2)
+            FROM orders
+            WHERE order_date BETWEEN ? AND ?
+        ''', (date_from or REPORT_MIN_DATE, date_to or REPORT_MAX_DATE))
+        return cursor.fetchone()
+
+    def get_sales_by_day(self, date_from=None, date_to=None):
+        """Продажи по дням: (дата, заказов, единиц, выручка)"""
+        cursor = self.get_connection().execute('''
+            SELECT day, orders, items, ROUND(revenue, 2)
+            FROM sales_daily
+            WHERE day BETWEEN ? AND ?
+            ORDER BY day
+        ''', (date_from or REPORT_MIN_DATE, date_to or REPORT_MAX_DATE))
+        return cursor.fetchall()
+
+    def get_sales_by_dessert(self, date_from=None, date_to=None):
+        """Продажи по десертам за период: (ID, название, заказов, единиц, выручка)"""
+        cursor = self.get_connection().execute('''
+            SELECT s.dessert_id, COALESCE(d.name, '(удален)'),
+                   SUM(s.orders), SUM(s.quantity), ROUND(SUM(s.revenue), 2) AS revenue
+            FROM sales_daily_dessert s
+            LEFT JOIN desserts d ON d.id = s.dessert_id
+            WHERE s.day BETWEEN ? AND ?
+            GROUP BY s.dessert_id
+            ORDER BY revenue DESC, s.dessert_id
+        ''', (date_from or REPORT_MIN_DATE, date_to or REPORT_MAX_DATE))
+        return cursor.fetchall()
+
+    def get_sales_totals(self, date_from=None, date_to=None):
+        """Итоги за период: (заказов, единиц, выручка)"""
+        cursor = self.get_connection().execute('''
+            SELECT COALESCE(SUM(orders), 0), COALESCE(SUM(items), 0),
+                   ROUND(COALESCE(SUM(revenue), 0), 2)
+            FROM sales_daily
+            WHERE day BETWEEN ? AND ?
+        ''', (date_from or REPORT_MIN_DATE, date_to or REPORT_MAX_DATE))
+        return cursor.fetchone()
@@ -0,0 +1,355 @@
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+from itertools import accumulate
+
+from database import DatabaseManager
+from importer import BulkImporter
+
+# Размер набора данных по умолчанию
+DEFAULT_CLIENTS = 10000
+DEFAULT_DESSERTS = 200
+DEFAULT_ORDERS = 100000
+
+# Период заказов по умолчанию: дней, заканчивая сегодняшним
+DEFAULT_DAYS = 730
+
+# Фамилии в мужской форме по убыванию распространенности (женская форма - с "а")
+SURNAMES = (
+    'Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Васильев', 'Петров', 'Соколов',
+    'Михайлов', 'Новиков', 'Федоров', 'Морозов', 'Волков', 'Алексеев', 'Лебедев',
+    'Семенов', 'Егоров', 'Павлов', 'Козлов', 'Степанов', 'Николаев', 'Орлов',
+    'Андреев', 'Макаров', 'Никитин', 'Захаров', 'Зайцев', 'Соловьев', 'Борисов',
+    'Яковлев', 'Григорьев', 'Романов', 'Воробьев', 'Сергеев', 'Кузьмин', 'Фролов',
+    'Александров', 'Дмитриев', 'Королев', 'Гусев', 'Киселев', 'Ильин', 'Максимов',
+    'Поляков', 'Сорокин', 'Виноградов', 'Ковалев', 'Белов', 'Медведев', 'Антонов',
+    'Тарасов', 'Жуков', 'Баранов', 'Филиппов', 'Комаров', 'Давыдов', 'Беляев',
+    'Герасимов', 'Богданов', 'Осипов', 'Сидоров', 'Матвеев', 'Титов', 'Марков',
+    'Миронов', 'Крылов', 'Куликов', 'Карпов', 'Власов', 'Мельников', 'Денисов',
+)
+
+MALE_NAMES = (
+    'Александр', 'Сергей', 'Дмитрий', 'Андрей', 'Алексей', 'Максим', 'Евгений',
+    'Иван', 'Михаил', 'Артем', 'Владимир', 'Николай', 'Павел', 'Олег', 'Роман',
+)
+
+FEMALE_NAMES = (
+    'Елена', 'Ольга', 'Наталья', 'Татьяна', 'Анна', 'Мария', 'Ирина', 'Екатерина',
+    'Светлана', 'Юлия', 'Анастасия', 'Марина', 'Дарья', 'Ксения', 'Виктория',
+)
+
+# Отчества: (мужское, женское)
+PATRONYMICS = (
+    ('Александрович', 'Александровна'), ('Сергеевич', 'Сергеевна'),
+    ('Владимирович', 'Владимировна'), ('Андреевич', 'Андреевна'),
+    ('Алексеевич', 'Алексеевна'), ('Дмитриевич', 'Дмитриевна'),
+    ('Николаевич', 'Николаевна'), ('Михайлович', 'Михайловна'),
+    ('Иванович', 'Ивановна'), ('Викторович', 'Викторовна'),
+    ('Евгеньевич', 'Евгеньевна'), ('Петрович', 'Петровна'),
+)
+
+# Доля клиенток; у части клиентов нет email
+FEMALE_SHARE = 0.65
+EMAIL_SHARE = 0.6
+EMAIL_DOMAINS = ('mail.ru', 'yandex.ru', 'gmail.com', 'bk.ru', 'inbox.ru')
+
+TRANSLIT = dict(zip(
+    'абвгдеёжзийклмнопрстуфхцчшщъыьэюя',
+    ('a', 'b', 'v', 'g', 'd', 'e', 'e', 'zh', 'z', 'i', 'y', 'k', 'l', 'm', 'n', 'o',
+     'p', 'r', 's', 't', 'u', 'f', 'kh', 'ts', 'ch', 'sh', 'shch', '', 'y', '', 'e',
+     'yu', 'ya')
+))
+
+# Виды десертов: (название, продается на вес, диапазон цены за кг или за штуку)
+DESSERT_KINDS = (
+    ('Торт', True, (900, 3500)),
+    ('Чизкейк', True, (1200, 3000)),
+    ('Рулет', True, (700, 1800)),
+    ('Пирог', True, (600, 1500)),
+    ('Эклер', False, (90, 250)),
+    ('Макарон', False, (60, 150)),
+    ('Капкейк', False, (120, 300)),
+    ('Тарт', False, (180, 450)),
+    ('Пирожное', False, (100, 350)),
+    ('Маффин', False, (80, 200)),
+)
+
+DESSERT_FLAVORS = (
+    'Шоколадный', 'Ванильный', 'Малиновый', 'Клубничный', 'Фисташковый', 'Карамельный',
+    'Лимонный', 'Вишневый', 'Кокосовый', 'Ореховый', 'Черничный', 'Манговый',
+    'Медовый', 'Кофейный', 'Сливочный', 'Маковый', 'Апельсиновый', 'Банановый',
+    'Мятный', 'Творожный',
+)
+
+INGREDIENTS = (
+    'мука', 'сахар', 'яйца', 'масло', 'сливки', 'молоко', 'творожный сыр', 'какао',
+    'шоколад', 'ваниль', 'ягоды', 'орехи', 'мед', 'сметана', 'желатин', 'миндальная мука',
+)
+
+# Доля весовых десертов, которые продаются и по кусочку
+SLICE_SHARE = 0.1
+
+# Число десертов в заказе и количество каждого
+ITEMS_PER_ORDER = (1, 2, 3, 4)
+ITEMS_PER_ORDER_WEIGHTS = (60, 25, 10, 5)
+QUANTITIES = (1, 2, 3, 4, 6, 8, 12)
+QUANTITY_WEIGHTS = (50, 20, 10, 6, 7, 4, 3)
+
+# Время заказов: часы работы и их относительная загрузка
+ORDER_HOURS = tuple(range(9, 21))
+ORDER_HOUR_WEIGHTS = (3, 5, 8, 10, 9, 7, 6, 7, 9, 10, 7, 4)
+
+# Загрузка по дням недели (пн-вс) и праздники с повышенным спросом
+WEEKDAY_WEIGHTS = (0.8, 0.8, 0.9, 1.0, 1.3, 1.5, 1.2)
+HOLIDAY_WEIGHTS = {
+    (12, 30): 2.0, (12, 31): 2.5, (2, 14): 2.0, (3, 7): 2.5, (3, 8): 2.0, (9, 1): 1.5,
+}
+
+DELIVERY_TYPES = ('Самовывоз', 'Доставка')
+DELIVERY_WEIGHTS = (60, 40)
+
+
+def _zipf_cum_weights(count, exponent=1.0):
+    """Накопленные веса распределения Ципфа: первые элементы выбираются чаще"""
+    return list(accumulate(1 / (rank + 1) ** exponent for rank in range(count)))
+
+
+def _translit(text):
+    """Латинская запись русского слова для email"""
+    return ''.join(TRANSLIT.get(char, char) for char in text.lower())
+
+
+def _format_phone(number, rng):
+    """Мобильный номер в одном из распространенных написаний"""
+    digits = f"9{number:09d}"
+    if rng.random() < 0.7:
+        return f"+7{digits}"
+    return f"8 ({digits[:3]}) {digits[3:6]}-{digits[6:8]}-{digits[8:]}"
+
+
+def generate_clients(count, rng):
+    """Клиенты: частые и редкие фамилии, уникальные телефоны, возраст 18-75 лет
+
+    Генератор словарей с полями full_name, phone, birth_date, email.
+    """
+    surname_weights = _zipf_cum_weights(len(SURNAMES), 0.8)
+    today = date.today()
+    for number in rng.sample(range(10 ** 9), count):
+        female = rng.random() < FEMALE_SHARE
+        surname = rng.choices(SURNAMES, cum_weights=surname_weights)[0]
+        first_name = rng.choice(FEMALE_NAMES if female else MALE_NAMES)
+        patronymic = rng.choice(PATRONYMICS)[female]
+        if female:
+            surname += 'а'
+
+        age_days = int(rng.triangular(18, 75, 35) * 365.25)
+        email = ''
+        if rng.random() < EMAIL_SHARE:
+            email = f"{_translit(surname)}.{_translit(first_name[0])}{number % 1000}" \
+                    f"@{rng.choice(EMAIL_DOMAINS)}"
+        yield {
+            'full_name': f"{surname} {first_name} {patronymic}",
+            'phone': _format_phone(number, rng),
+            'birth_date': (today - timedelta(days=age_days)).isoformat(),
+            'email': email,
+        }
+
+
+def generate_desserts(count, rng):
+    """Десерты: вид и вкус, цена за кг для тортов и за штуку для пирожных
+
+    Генератор словарей с полями name, price_per_kg, price_per_unit, composition.
+    """
+    combinations = [(kind, flavor) for kind in DESSERT_KINDS for flavor in DESSERT_FLAVORS]
+    rng.shuffle(combinations)
+    for index in range(count):
+        (kind, by_weight, (low, high)), flavor = combinations[index % len(combinations)]
+        name = f'{kind} "{flavor}"'
+        if index >= len(combinations):
+            name += f" №{index // len(combinations) + 1}"
+
+        price = round(rng.uniform(low, high), -1)
+        price_per_kg = price if by_weight else None
+        price_per_unit = None if by_weight else price
+        if by_weight and rng.random() < SLICE_SHARE:
+            price_per_unit = round(price / 8, -1)
+        yield {
+            'name': name,
+            'price_per_kg': price_per_kg,
+            'price_per_unit': price_per_unit,
+            'composition': ', '.join(rng.sample(INGREDIENTS, rng.randint(3, 6))),
+        }
+
+
+def _day_weight(day, position):
+    """Относительный спрос в день: день недели, праздники, лето, рост к концу периода"""
+    weight = WEEKDAY_WEIGHTS[day.weekday()] * HOLIDAY_WEIGHTS.get((day.month, day.day), 1.0)
+    if day.month == 12:
+        weight *= 1.3
+    elif day.month in (7, 8):
+        weight *= 0.85
+    # Число клиентов кондитерской растет: в конце периода заказов больше
+    return weight * (0.6 + 0.8 * position)
+
+
+def generate_orders(count, phones, dessert_names, rng, days=DEFAULT_DAYS, end=None):
+    """Заказы в хронологическом порядке за days дней, заканчивая end (сегодня)
+
+    Постоянные клиенты и популярные десерты встречаются чаще (распределение
+    Ципфа). Генератор словарей с полями phone, desserts (список пар
+    [название, количество]), order_date, order_time, delivery_type, photo_path.
+    """
+    if not count:
+        return
+    if not phones or not dessert_names:
+        raise ValueError("для заказов нужны клиенты и десерты")
+    end = end or date.today()
+    day_list = [end - timedelta(days=offset) for offset in range(days - 1, -1, -1)]
+    weights = [_day_weight(day, index / max(days - 1, 1)) for index, day in enumerate(day_list)]
+
+    # Заказы распределяются по дням пропорционально спросу
+    total = sum(weights)
+    per_day = [int(count * weight / total) for weight in weights]
+    day_cum_weights = list(accumulate(weights))
+    for _ in range(count - sum(per_day)):
+        per_day[rng.choices(range(days), cum_weights=day_cum_weights)[0]] += 1
+
+    client_weights = _zipf_cum_weights(len(phones), 0.5)
+    dessert_weights = _zipf_cum_weights(len(dessert_names))
+    hour_weights = list(accumulate(ORDER_HOUR_WEIGHTS))
+    for day, day_count in zip(day_list, per_day):
+        order_date = day.isoformat()
+        times = sorted(
+            f"{rng.choices(ORDER_HOURS, cum_weights=hour_weights)[0]:02d}:{rng.randrange(60):02d}"
+            for _ in range(day_count)
+        )
+        for order_time in times:
+            item_count = min(rng.choices(ITEMS_PER_ORDER, ITEMS_PER_ORDER_WEIGHTS)[0],
+                             len(dessert_names))
+            names = set()
+            while len(names) < item_count:
+                names.add(rng.choices(dessert_names, cum_weights=dessert_weights)[0])
+            yield {
+                'phone': rng.choices(phones, cum_weights=client_weights)[0],
+                'desserts': [[name, rng.choices(QUANTITIES, QUANTITY_WEIGHTS)[0]]
+                             for name in sorted(names)],
+                'order_date': order_date,
+                'order_time': order_time,
+                'delivery_type': rng.choices(DELIVERY_TYPES, DELIVERY_WEIGHTS)[0],
+                'photo_path': '',
+            }
+
+
+def _numbered(records):
+    """Записи в формате потока импорта: пары (номер строки, словарь)"""
+    return enumerate(records, 1)
+
+
+def populate(db, clients=DEFAULT_CLIENTS, desserts=DEFAULT_DESSERTS, orders=DEFAULT_ORDERS,
+             days=DEFAULT_DAYS, seed=None, importer=None):
+    """Заполнение БД синтетическими данными через массовый импорт
+
+    Заказы распределяются по всем клиентам и десертам в БД, включая
+    уже существующие. Возвращает список ImportReport.
+    """
+    rng = random.Random(seed)
+    importer = importer or BulkImporter(db)
+    reports = [
+        importer.import_client_records(_numbered(generate_clients(clients, rng))),
+        importer.import_dessert_records(_numbered(generate_desserts(desserts, rng))),
+    ]
+
+    conn = db.get_connection()
+    phones = [row[0] for row in conn.execute("SELECT phone FROM clients ORDER BY id")]
+    dessert_names = [row[0] for row in conn.execute("SELECT name FROM desserts ORDER BY id")]
+    reports.append(importer.import_order_records(
+        _numbered(generate_orders(orders, phones, dessert_names, rng, days))
+    ))
+    return reports
+
+
+def _write_records(path, records, fields, file_format):
+    """Запись записей в CSV или JSONL в формате, который читает importer.py"""
+    count = 0
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        if file_format == 'csv':
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+        for record in records:
+            if file_format == 'jsonl':
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            else:
+                if isinstance(record.get('desserts'), list):
+                    record = dict(record, desserts=';'.join(
+                        f"{name}:{quantity}" for name, quantity in record['desserts']
+                    ))
+                writer.writerow(record)
+            count += 1
+    return count
+
+
+def write_files(out_dir, clients=DEFAULT_CLIENTS, desserts=DEFAULT_DESSERTS, orders=DEFAULT_ORDERS,
+                days=DEFAULT_DAYS, seed=None, file_format='csv'):
+    """Запись синтетического набора в файлы clients, desserts и orders для importer.py
+
+    Возвращает словарь {тип данных: (путь, количество записей)}.
+    """
+    rng = random.Random(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    client_rows = list(generate_clients(clients, rng))
+    dessert_rows = list(generate_desserts(desserts, rng))
+    files = {}
+    for kind, records, fields in (
+        ('clients', client_rows, ('full_name', 'phone', 'birth_date', 'email')),
+        ('desserts', dessert_rows, ('name', 'price_per_kg', 'price_per_unit', 'composition')),
+        ('orders', generate_orders(orders, [row['phone'] for row in client_rows],
+                                   [row['name'] for row in dessert_rows], rng, days),
+         ('phone', 'desserts', 'order_date', 'order_time', 'delivery_type', 'photo_path')),
+    ):
+        path = os.path.join(out_dir, f"{kind}.{file_format}")
+        files[kind] = (path, _write_records(path, records, fields, file_format))
+    return files
+
+
+def main(argv=None):
+    """Точка входа командной строки для генерации синтетических данных"""
+    parser = argparse.ArgumentParser(
+        description="Генерация синтетических клиентов, десертов и заказов"
+    )
+    parser.add_argument('--clients', type=int, default=DEFAULT_CLIENTS, help="количество клиентов")
+    parser.add_argument('--desserts', type=int, default=DEFAULT_DESSERTS, help="количество десертов")
+    parser.add_argument('--orders', type=int, default=DEFAULT_ORDERS, help="количество заказов")
+    parser.add_argument('--days', type=int, default=DEFAULT_DAYS,
+                        help="за сколько последних дней создаются заказы")
+    parser.add_argument('--seed', type=int, help="начальное значение генератора (повторяемый набор)")
+    parser.add_argument('--db', default='confectionery.db', help="файл базы данных")
+    parser.add_argument('--out', help="записать файлы для importer.py в каталог вместо БД")
+    parser.add_argument('--format', choices=['csv', 'jsonl'], default='csv', dest='file_format',
+                        help="формат файлов для --out")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    if args.out:
+        files = write_files(args.out, args.clients, args.desserts, args.orders,
+                            args.days, args.seed, args.file_format)
+        for kind, (path, count) in files.items():
+            print(f"✅ {kind}: {count} -> {path}")
+    else:
+        db = DatabaseManager(args.db)
+        try:
+            for report in populate(db, args.clients, args.desserts, args.orders,
+                                   args.days, args.seed):
+                print(f"✅ {report.summary()}")
+        finally:
+            db.close()
+    print(f"⏱ Готово за {time.perf_counter() - started:.1f} с")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
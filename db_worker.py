@@ -0,0 +1,101 @@
+from PyQt5.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
+
+
+class DatabaseWorker(QObject):
+    """Исполнитель запросов к БД, живущий в отдельном потоке
+
+    Поток владеет собственным подключением DatabaseManager (одно на поток).
+    """
+
+    finished = pyqtSignal(int, object)
+    failed = pyqtSignal(int, str)
+
+    def __init__(self, db):
+        super().__init__()
+        self.db = db
+
+    @pyqtSlot(int, str, object, object)
+    def execute(self, request_id, method, args, kwargs):
+        """Выполнение метода DatabaseManager и отправка результата"""
+        try:
+            result = getattr(self.db, method)(*args, **kwargs)
+        except Exception as e:
+            self.failed.emit(request_id, str(e))
+        else:
+            self.finished.emit(request_id, result)
+
+    @pyqtSlot()
+    def shutdown(self):
+        """Закрытие подключения потока и выход из его цикла событий"""
+        self.db.release_connection()
+        QThread.currentThread().quit()
+
+
+class AsyncDatabase(QObject):
+    """Асинхронный доступ к DatabaseManager для GUI
+
+    Запросы выполняются по очереди в фоновом потоке, результаты
+    возвращаются в поток GUI через сигналы и передаются в колбэки.
+    """
+
+    requested = pyqtSignal(int, str, object, object)
+    stop_requested = pyqtSignal()
+    busy_changed = pyqtSignal(bool)
+
+    def __init__(self, db, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self._next_id = 0
+        self._callbacks = {}
+
+        self.thread = QThread()
+        self.worker = DatabaseWorker(db)
+        self.worker.moveToThread(self.thread)
+
+        # Соединения между потоками автоматически становятся очередями
+        self.requested.connect(self.worker.execute)
+        self.stop_requested.connect(self.worker.shutdown)
+        self.worker.finished.connect(self._on_finished)
+        self.worker.failed.connect(self._on_failed)
+        self.thread.start()
+
+    @property
+    def pending(self):
+        """Количество запросов, ожидающих результата"""
+        return len(self._callbacks)
+
+    def call(self, method, *args, on_result=None, on_error=None, **kwargs):
+        """Постановка вызова метода DatabaseManager в очередь; возвращает ID запроса"""
+        self._next_id += 1
+        request_id = self._next_id
+        self._callbacks[request_id] = (on_result, on_error)
+        if len(self._callbacks) == 1:
+            self.busy_changed.emit(True)
+        self.requested.emit(request_id, method, args, kwargs)
+        return request_id
+
+    def _pop_callbacks(self, request_id):
+        """Извлечение колбэков запроса и обновление состояния занятости"""
+        callbacks = self._callbacks.pop(request_id, (None, None))
+        if not self._callbacks:
+            self.busy_changed.emit(False)
+        return callbacks
+
+    def _on_finished(self, request_id, result):
+        on_result, _ = self._pop_callbacks(request_id)
+        if on_result:
+            on_result(result)
+
+    def _on_failed(self, request_id, message):
+        _, on_error = self._pop_callbacks(request_id)
+        if on_error:
+            on_error(message)
+        else:
+            print(f"❌ Ошибка запроса к базе данных: {message}")
+
+    def shutdown(self):
+        """Завершение фонового потока после выполнения уже поставленных запросов"""
+        if self.thread.isRunning():
+            self.stop_requested.emit()
+            self.thread.wait()
+        self._callbacks.clear()
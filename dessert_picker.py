@@ -0,0 +1,216 @@
+from bisect import bisect_left
+
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, QSortFilterProxyModel, Qt
+
+# Колонки списка выбора десертов
+PICKER_COLUMNS = ["Десерт", "Кол-во", "Вес, кг"]
+NAME_COLUMN = 0
+QUANTITY_COLUMN = 1
+WEIGHT_COLUMN = 2
+
+# Наибольшее количество одного десерта в заказе
+MAX_QUANTITY = 999
+
+# Наибольший вес одной позиции, кг
+MAX_WEIGHT_KG = 100
+
+
+def _has_price(value):
+    return bool(value) and value > 0
+
+
+class DessertPickerModel(QAbstractTableModel):
+    """Список десертов с отметками и количеством для формы заказа
+
+    Выбор хранится по ID десерта отдельно от строк справочника, поэтому
+    переживает перезагрузку и точечные изменения каталога. Вес вводится
+    только для десертов с ценой за кг; десерт без цены за штуку без веса
+    заказать нельзя (см. missing_weights).
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # (ID, название) по алфавиту
+        self.desserts = []
+        self._names = []
+        # ID десерта -> количество
+        self.selected = {}
+        # ID десерта -> вес в кг (только для отмеченных десертов с ценой за кг)
+        self.weights = {}
+        # ID десерта -> (есть цена за кг, есть цена за штуку)
+        self._prices = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.desserts)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(PICKER_COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return PICKER_COLUMNS[section]
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        if index.column() == NAME_COLUMN:
+            return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsUserCheckable
+        if index.column() == WEIGHT_COLUMN and not self.sold_by_weight(self.desserts[index.row()][0]):
+            return Qt.ItemIsSelectable
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsEditable
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        dessert_id, name = self.desserts[index.row()]
+        quantity = self.selected.get(dessert_id)
+
+        if index.column() == NAME_COLUMN:
+            if role == Qt.DisplayRole:
+                return name
+            if role == Qt.CheckStateRole:
+                return Qt.Checked if quantity else Qt.Unchecked
+        elif index.column() == WEIGHT_COLUMN:
+            weight = self.weights.get(dessert_id)
+            if role == Qt.DisplayRole:
+                return f"{weight:g}" if weight else ""
+            if role == Qt.EditRole:
+                return weight or 1.0
+        elif role == Qt.DisplayRole:
+            return quantity if quantity else ""
+        elif role == Qt.EditRole:
+            return quantity or 1
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid():
+            return False
+        dessert_id = self.desserts[index.row()][0]
+
+        if index.column() == NAME_COLUMN and role == Qt.CheckStateRole:
+            if Qt.CheckState(value) == Qt.Checked:
+                self.selected.setdefault(dessert_id, 1)
+            else:
+                self.selected.pop(dessert_id, None)
+                self.weights.pop(dessert_id, None)
+        elif index.column() == QUANTITY_COLUMN and role == Qt.EditRole:
+            try:
+                quantity = int(value)
+            except (TypeError, ValueError):
+                return False
+            if quantity <= 0:
+                self.selected.pop(dessert_id, None)
+                self.weights.pop(dessert_id, None)
+            else:
+                # Указанное количество отмечает десерт
+                self.selected[dessert_id] = min(quantity, MAX_QUANTITY)
+        elif index.column() == WEIGHT_COLUMN and role == Qt.EditRole:
+            if not self.sold_by_weight(dessert_id):
+                return False
+            try:
+                weight = round(float(str(value).replace(',', '.')), 3)
+            except (TypeError, ValueError):
+                return False
+            if weight <= 0:
+                self.weights.pop(dessert_id, None)
+            else:
+                # Указанный вес отмечает десерт
+                self.weights[dessert_id] = min(weight, MAX_WEIGHT_KG)
+                self.selected.setdefault(dessert_id, 1)
+        else:
+            return False
+
+        row = index.row()
+        self.dataChanged.emit(self.index(row, NAME_COLUMN), self.index(row, WEIGHT_COLUMN))
+        return True
+
+    def sold_by_weight(self, dessert_id):
+        """Есть ли у десерта цена за кг (вес можно указать)"""
+        return self._prices.get(dessert_id, (False, False))[0]
+
+    def _remember_prices(self, dessert):
+        self._prices[dessert[0]] = (_has_price(dessert[2]), _has_price(dessert[3]))
+
+    def set_desserts(self, desserts):
+        """Замена списка десертов строками справочника (отметки сохраняются)"""
+        self.beginResetModel()
+        self.desserts = [(dessert[0], dessert[1]) for dessert in desserts]
+        self._prices = {}
+        for dessert in desserts:
+            self._remember_prices(dessert)
+        self.desserts.sort(key=lambda dessert: dessert[1])
+        self._names = [name for _, name in self.desserts]
+        known = {dessert_id for dessert_id, _ in self.desserts}
+        self.selected = {
+            dessert_id: quantity for dessert_id, quantity in self.selected.items()
+            if dessert_id in known
+        }
+        self.weights = {
+            dessert_id: weight for dessert_id, weight in self.weights.items()
+            if dessert_id in self.selected
+        }
+        self.endResetModel()
+
+    def apply_change(self, dessert_id, dessert):
+        """Удаление, переименование или добавление десерта с сохранением порядка
+
+        dessert - строка справочника или None для удаленного.
+        """
+        for row, (current_id, _) in enumerate(self.desserts):
+            if current_id == dessert_id:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self.desserts[row]
+                del self._names[row]
+                self.endRemoveRows()
+                break
+
+        if dessert is None:
+            self.selected.pop(dessert_id, None)
+            self.weights.pop(dessert_id, None)
+            self._prices.pop(dessert_id, None)
+            return
+
+        self._remember_prices(dessert)
+        row = bisect_left(self._names, dessert[1])
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.desserts.insert(row, (dessert_id, dessert[1]))
+        self._names.insert(row, dessert[1])
+        self.endInsertRows()
+
+    def selected_items(self):
+        """Выбранные десерты: список (ID десерта, количество, вес в кг или None)
+        в порядке списка"""
+        return [
+            (dessert_id, self.selected[dessert_id],
+             self.weights.get(dessert_id) if self.sold_by_weight(dessert_id) else None)
+            for dessert_id, _ in self.desserts if dessert_id in self.selected
+        ]
+
+    def missing_weights(self):
+        """Названия выбранных десертов, которые продаются только на вес, но без веса"""
+        return [
+            name for dessert_id, name in self.desserts
+            if dessert_id in self.selected and dessert_id not in self.weights
+            and self._prices.get(dessert_id) == (True, False)
+        ]
+
+    def clear_selection(self):
+        """Снятие всех отметок"""
+        if not self.selected:
+            return
+        self.selected = {}
+        self.weights = {}
+        if self.desserts:
+            self.dataChanged.emit(
+                self.index(0, NAME_COLUMN), self.index(len(self.desserts) - 1, WEIGHT_COLUMN)
+            )
+
+
+def create_dessert_filter(model, parent=None):
+    """Прокси-модель для фильтрации списка десертов по подстроке названия"""
+    proxy = QSortFilterProxyModel(parent)
+    proxy.setSourceModel(model)
+    proxy.setFilterKeyColumn(NAME_COLUMN)
+    proxy.setFilterCaseSensitivity(Qt.CaseInsensitive)
+    return proxy
@@ -0,0 +1,135 @@
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtWidgets import (QDialog, QDialogButtonBox, QHeaderView, QLabel, QPlainTextEdit,
+                             QPushButton, QTableWidget, QTableWidgetItem, QTabWidget,
+                             QVBoxLayout)
+
+from query_trace import LATENCY_BUCKETS_MS
+
+# Период обновления статистики, пока окно открыто, мс
+REFRESH_INTERVAL_MS = 1000
+
+# Сколько запросов показывать (по суммарному времени)
+TOP_STATEMENTS = 100
+
+# Колонки таблиц методов и запросов
+STATS_COLUMNS = ["Вызовов", "Всего, мс", "Среднее, мс", "p95, мс", "Макс, мс", "Медленных"]
+METHOD_COLUMNS = ["Метод"] + STATS_COLUMNS + ["Запросов", "Шагов SQLite", "Гистограмма"]
+STATEMENT_COLUMNS = ["Запрос"] + STATS_COLUMNS
+
+
+def _histogram_text(buckets):
+    """Гистограмма задержек в одну строку: только непустые корзины"""
+    bounds = [f"≤{bound:g}" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]:g}"]
+    return "  ".join(f"{bound}: {count}" for bound, count in zip(bounds, buckets) if count)
+
+
+def _stats_cells(stats):
+    return [stats.count, f"{stats.total_ms:.1f}", f"{stats.mean_ms:.2f}",
+            f"{stats.percentile(0.95):.2f}", f"{stats.max_ms:.2f}", stats.slow]
+
+
+class QueryStatsDialog(QDialog):
+    """Скрытое окно диагностики: статистика трассировки запросов в реальном времени
+
+    Открывается сочетанием Ctrl+Shift+D. Статистика берется из QueryTracer
+    без обращения к БД и обновляется, пока окно видно.
+    """
+
+    def __init__(self, tracer=None, parent=None):
+        super().__init__(parent)
+        self.tracer = tracer
+        self.setWindowTitle("Диагностика запросов")
+        self.resize(1000, 600)
+
+        layout = QVBoxLayout(self)
+        self.summary_label = QLabel()
+        layout.addWidget(self.summary_label)
+
+        tabs = QTabWidget()
+        self.methods_table = self._create_table(METHOD_COLUMNS)
+        self.statements_table = self._create_table(STATEMENT_COLUMNS)
+        self.slow_text = QPlainTextEdit()
+        self.slow_text.setReadOnly(True)
+        self.slow_text.setLineWrapMode(QPlainTextEdit.NoWrap)
+        tabs.addTab(self.methods_table, "Методы")
+        tabs.addTab(self.statements_table, "Запросы")
+        tabs.addTab(self.slow_text, "Медленные вызовы")
+        layout.addWidget(tabs)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Close)
+        reset_button = QPushButton("Сбросить")
+        reset_button.setEnabled(tracer is not None)
+        reset_button.clicked.connect(self.reset_stats)
+        buttons.addButton(reset_button, QDialogButtonBox.ResetRole)
+        buttons.rejected.connect(self.close)
+        layout.addWidget(buttons)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(REFRESH_INTERVAL_MS)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    @staticmethod
+    def _create_table(columns):
+        table = QTableWidget(0, len(columns))
+        table.setHorizontalHeaderLabels(columns)
+        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        table.setSelectionBehavior(QTableWidget.SelectRows)
+        table.verticalHeader().setVisible(False)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        table.horizontalHeader().setStretchLastSection(True)
+        return table
+
+    @staticmethod
+    def _fill(table, rows):
+        table.setUpdatesEnabled(False)
+        table.setRowCount(len(rows))
+        for row_index, row in enumerate(rows):
+            for column, value in enumerate(row):
+                item = QTableWidgetItem(str(value))
+                if column:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                table.setItem(row_index, column, item)
+        table.setUpdatesEnabled(True)
+
+    def refresh(self):
+        """Перерисовка статистики из трассировщика"""
+        if self.tracer is None:
+            self.summary_label.setText(
+                "Трассировка запросов выключена. Запустите приложение с ключом --trace-queries."
+            )
+            return
+
+        methods, statements, recent = self.tracer.snapshot()
+        calls = sum(stats.count for stats in methods.values())
+        slow = sum(stats.slow for stats in methods.values())
+        self.summary_label.setText(
+            f"Вызовов методов: {calls}, медленных (≥ {self.tracer.slow_ms:g} мс): {slow}. "
+            f"Журнал: {self.tracer.log_path or 'не ведется'}"
+        )
+
+        by_total = lambda item: item[1].total_ms
+        self._fill(self.methods_table, [
+            [name] + _stats_cells(stats) + [stats.statements, stats.sqlite_steps,
+                                            _histogram_text(stats.buckets)]
+            for name, stats in sorted(methods.items(), key=by_total, reverse=True)
+        ])
+        self._fill(self.statements_table, [
+            [' '.join(sql.split())[:200]] + _stats_cells(stats)
+            for sql, stats in sorted(statements.items(), key=by_total, reverse=True)[:TOP_STATEMENTS]
+        ])
+        text = "\n\n".join(f"{moment} {entry}" for moment, entry in reversed(recent))
+        if text != self.slow_text.toPlainText():
+            self.slow_text.setPlainText(text)
+
+    def reset_stats(self):
+        self.tracer.reset()
+        self.refresh()
+
+    def showEvent(self, event):
+        self.refresh()
+        self.refresh_timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.refresh_timer.stop()
+        super().hideEvent(event)
@@ -0,0 +1,143 @@
+import argparse
+import csv
+import gzip
+import json
+import sys
+
+from database import DatabaseManager
+
+# Количество строк, читаемых из курсора за один раз
+EXPORT_FETCH_SIZE = 5000
+
+# Колонки и запросы выгрузки; формат заказов совместим с importer.py
+EXPORT_QUERIES = {
+    'clients': (
+        ['id', 'full_name', 'phone', 'birth_date', 'email'],
+        'SELECT id, full_name, phone, birth_date, email FROM clients ORDER BY id'
+    ),
+    'desserts': (
+        ['id', 'name', 'price_per_kg', 'price_per_unit', 'composition'],
+        'SELECT id, name, price_per_kg, price_per_unit, composition FROM desserts ORDER BY id'
+    ),
+    'orders': (
+        ['id', 'phone', 'full_name', 'desserts', 'order_date', 'order_time',
+         'delivery_type', 'photo_path', 'total'],
+        '''
+            SELECT o.id, c.phone, c.full_name,
+                   (SELECT group_concat(name || ':' || quantity, ';') FROM (
+                        SELECT d.name, oi.quantity FROM order_items oi
+                        JOIN desserts d ON d.id = oi.dessert_id
+                        WHERE oi.order_id = o.id
+                        ORDER BY d.name
+                   )),
+                   o.order_date, o.order_time, o.delivery_type, o.photo_path, o.total
+            FROM orders o
+            LEFT JOIN clients c ON o.client_id = c.id
+            WHERE (? IS NULL OR o.order_date >= ?)
+              AND (? IS NULL OR o.order_date <= ?)
+            ORDER BY o.order_date, o.order_time, o.id
+        '''
+    ),
+}
+
+
+def iter_rows(db, kind, date_from=None, date_to=None, fetch_size=EXPORT_FETCH_SIZE):
+    """Потоковое чтение строк таблицы блоками через fetchmany
+
+    Фильтр по датам (yyyy-MM-dd) применяется только к заказам.
+    """
+    _, query = EXPORT_QUERIES[kind]
+    cursor = db.get_connection().cursor()
+    try:
+        if kind == 'orders':
+            cursor.execute(query, (date_from, date_from, date_to, date_to))
+        else:
+            cursor.execute(query)
+        while True:
+            rows = cursor.fetchmany(fetch_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cursor.close()
+
+
+def _detect_format(path):
+    """Определение формата и сжатия по расширению файла"""
+    name = path.lower()
+    compress = name.endswith('.gz')
+    if compress:
+        name = name[:-3]
+    file_format = 'jsonl' if name.endswith(('.jsonl', '.json')) else 'csv'
+    return file_format, compress
+
+
+def export_table(db, kind, path, file_format=None, compress=None,
+                 date_from=None, date_to=None, progress=None):
+    """Выгрузка таблицы в CSV/JSONL (опционально gzip) с постоянным расходом памяти
+
+    progress - необязательная функция, получающая число выгруженных строк.
+    Возвращает общее количество строк.
+    """
+    detected_format, detected_compress = _detect_format(path)
+    file_format = file_format or detected_format
+    compress = detected_compress if compress is None else compress
+
+    columns, _ = EXPORT_QUERIES[kind]
+    if compress:
+        f = gzip.open(path, 'wt', encoding='utf-8', newline='')
+    else:
+        f = open(path, 'w', encoding='utf-8', newline='')
+
+    total = 0
+    with f:
+        if file_format == 'jsonl':
+            for rows in iter_rows(db, kind, date_from, date_to):
+                f.writelines(
+                    json.dumps(dict(zip(columns, row)), ensure_ascii=False) + '\n'
+                    for row in rows
+                )
+                total += len(rows)
+                if progress:
+                    progress(total)
+        else:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            for rows in iter_rows(db, kind, date_from, date_to):
+                writer.writerows(rows)
+                total += len(rows)
+                if progress:
+                    progress(total)
+
+    return total
+
+
+def main(argv=None):
+    """Точка входа командной строки для выгрузки данных"""
+    parser = argparse.ArgumentParser(
+        description="Выгрузка данных кондитерской в CSV/JSONL"
+    )
+    parser.add_argument('kind', choices=sorted(EXPORT_QUERIES), help="тип выгружаемых данных")
+    parser.add_argument('path', help="файл назначения (.csv, .jsonl, с необязательным .gz)")
+    parser.add_argument('--db', default='confectionery.db', help="файл базы данных")
+    parser.add_argument('--format', choices=['csv', 'jsonl'], dest='file_format',
+                        help="формат файла (по умолчанию - по расширению)")
+    parser.add_argument('--gzip', action='store_true', default=None, dest='compress',
+                        help="сжать результат gzip")
+    parser.add_argument('--from', dest='date_from', help="начальная дата заказов (yyyy-MM-dd)")
+    parser.add_argument('--to', dest='date_to', help="конечная дата заказов (yyyy-MM-dd)")
+    args = parser.parse_args(argv)
+
+    db = DatabaseManager(args.db)
+    try:
+        total = export_table(db, args.kind, args.path, args.file_format, args.compress,
+                             args.date_from, args.date_to)
+    finally:
+        db.close()
+
+    print(f"✅ {args.kind}: выгружено {total} строк в {args.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
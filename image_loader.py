@@ -0,0 +1,79 @@
+from PyQt5.QtCore import QObject, QSize, QThreadPool, pyqtSignal
+from PyQt5.QtGui import QPixmap
+
+# Количество потоков декодирования фото
+IMAGE_LOADER_THREADS = 2
+
+
+class ImageLoader(QObject):
+    """Асинхронная загрузка миниатюр фото для GUI
+
+    Фото декодируются в QImage в пуле потоков, в поток GUI возвращаются
+    сигналом и передаются в колбэк в виде QPixmap (None при ошибке).
+    Миниатюры из памяти отдаются сразу, без обращения к пулу.
+    """
+
+    image_ready = pyqtSignal(int, str, object)
+
+    def __init__(self, thumbnails, parent=None):
+        super().__init__(parent)
+        self.thumbnails = thumbnails
+        self._next_id = 0
+        # ID запроса -> колбэк
+        self._callbacks = {}
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(IMAGE_LOADER_THREADS)
+        self.image_ready.connect(self._on_image_ready)
+
+    @property
+    def pending(self):
+        """Количество запросов, ожидающих результата"""
+        return len(self._callbacks)
+
+    def load(self, path, size, on_loaded):
+        """Загрузка миниатюры path, вписанной в size; возвращает ID запроса или None
+
+        None означает, что колбэк уже вызван: миниатюра была в памяти
+        или файла нет.
+        """
+        key, pixmap = self.thumbnails.cached_pixmap(path, size)
+        if key is None or pixmap is not None:
+            on_loaded(pixmap)
+            return None
+
+        self._next_id += 1
+        request_id = self._next_id
+        self._callbacks[request_id] = on_loaded
+        size = QSize(size)
+
+        def decode():
+            # Запрос, отмененный до начала декодирования, пропускается
+            if request_id not in self._callbacks:
+                return
+            image = self.thumbnails.image(path, size)
+            # Сигнал объекта из потока GUI доставляется через очередь событий
+            self.image_ready.emit(request_id, key, image)
+
+        self.pool.start(decode)
+        return request_id
+
+    def cancel(self, request_id):
+        """Отмена запроса: колбэк не будет вызван"""
+        self._callbacks.pop(request_id, None)
+
+    def _on_image_ready(self, request_id, key, image):
+        if image.isNull():
+            pixmap = None
+        else:
+            pixmap = QPixmap.fromImage(image)
+            # Отмененный результат тоже сохраняется: фото могут открыть снова
+            self.thumbnails.remember(key, pixmap)
+        on_loaded = self._callbacks.pop(request_id, None)
+        if on_loaded is not None:
+            on_loaded(pixmap)
+
+    def shutdown(self):
+        """Отмена ожидающих запросов и ожидание выполняемых (при выходе)"""
+        self._callbacks.clear()
+        self.pool.clear()
+        self.pool.waitForDone()
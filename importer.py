@@ -0,0 +1,392 @@
+import argparse
+import csv
+import gzip
+import json
+import os
+import re
+import sys
+from datetime import date
+from itertools import islice
+
+from database import (SALES_INSERT_TRIGGERS, DatabaseManager, client_name_key,
+                      client_phone_key)
+from pricing import INSERT_PRICED_ITEM_SQL, ORDER_TOTAL_SQL
+
+# Количество строк, вставляемых за одну транзакцию
+IMPORT_CHUNK_SIZE = 50000
+
+# Сколько отклоненных строк хранить в отчете (остальные только считаются)
+MAX_REPORTED_ERRORS = 1000
+
+TIME_PATTERN = re.compile(r'^\d{2}:\d{2}$')
+
+# Количество после двоеточия в строке десертов (знак - чтобы отклонить отрицательное)
+QUANTITY_PATTERN = re.compile(r'^[+-]?\d+$')
+
+
+class ImportReport:
+    """Результат импорта: количество загруженных и отклоненных строк"""
+
+    def __init__(self, kind, rejects_file=None):
+        self.kind = kind
+        self.imported = 0
+        self.rejected = 0
+        self.errors = []
+        self.rejects_file = rejects_file
+
+    def reject(self, line_no, reason):
+        """Регистрация отклоненной строки"""
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line_no, reason))
+        if self.rejects_file:
+            self.rejects_file.write(f"{line_no}\t{reason}\n")
+
+    def summary(self):
+        """Краткое текстовое описание результата"""
+        return f"{self.kind}: загружено {self.imported}, отклонено {self.rejected}"
+
+
+def read_records(path, file_format=None):
+    """Потоковое чтение CSV/JSONL файла (в т.ч. .gz): генератор пар (номер строки, словарь)"""
+    name = path.lower()
+    compressed = name.endswith('.gz')
+    if compressed:
+        name = name[:-3]
+    if file_format is None:
+        file_format = 'jsonl' if name.endswith(('.jsonl', '.json')) else 'csv'
+
+    opener = gzip.open if compressed else open
+    with opener(path, 'rt', encoding='utf-8-sig', newline='') as f:
+        if file_format == 'jsonl':
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    yield line_no, ValueError(f"некорректный JSON: {e}")
+                    continue
+                if not isinstance(record, dict):
+                    yield line_no, ValueError("строка JSONL должна быть объектом")
+                    continue
+                yield line_no, record
+        else:
+            sample = f.read(4096)
+            f.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+            except csv.Error:
+                dialect = csv.excel
+            reader = csv.DictReader(f, dialect=dialect)
+            for record in reader:
+                # Номер строки файла с учетом заголовка
+                yield reader.line_num, record
+
+
+def _chunks(iterable, size):
+    """Разбиение потока на списки фиксированного размера"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _text(record, key):
+    """Строковое значение поля записи без пробелов по краям"""
+    value = record.get(key)
+    if value is None:
+        return ''
+    return str(value).strip()
+
+
+def _price(value):
+    """Разбор цены: пустое значение - None, запятая допускается как разделитель"""
+    if value is None or str(value).strip() == '':
+        return None
+    return float(str(value).strip().replace(',', '.'))
+
+
+def _quantity(value):
+    """Разбор количества позиции: целое больше нуля"""
+    quantity = int(value)
+    if quantity <= 0:
+        raise ValueError(f"количество должно быть больше нуля: {value}")
+    return quantity
+
+
+def _parse_dessert_items(value):
+    """Разбор списка десертов заказа в пары (название, количество)
+
+    Поддерживаются строка "Эклеры:3;Макаруны" и JSON-список из названий,
+    пар [название, количество] или объектов {"name": ..., "quantity": ...}.
+    Нулевое или отрицательное количество - ошибка ValueError.
+    """
+    items = []
+    if isinstance(value, list):
+        for entry in value:
+            if isinstance(entry, dict):
+                items.append((str(entry.get('name', '')).strip(),
+                              _quantity(entry.get('quantity', 1))))
+            elif isinstance(entry, (list, tuple)):
+                items.append((str(entry[0]).strip(), _quantity(entry[1])))
+            else:
+                items.append((str(entry).strip(), 1))
+        return items
+
+    for part in str(value or '').split(';'):
+        part = part.strip()
+        if not part:
+            continue
+        name, sep, quantity = part.rpartition(':')
+        if sep and QUANTITY_PATTERN.match(quantity.strip()):
+            items.append((name.strip(), _quantity(quantity)))
+        else:
+            items.append((part, 1))
+    return items
+
+
+class BulkImporter:
+    """Потоковый импорт клиентов, десертов и заказов большими транзакциями"""
+
+    def __init__(self, db, chunk_size=IMPORT_CHUNK_SIZE):
+        self.db = db
+        self.chunk_size = chunk_size
+
+    def _write_chunk(self, rows, write):
+        """Выполнение записи одного блока строк в отдельной транзакции"""
+        if not rows:
+            return
+        with self.db.transaction() as conn:
+            write(conn.cursor())
+
+    def import_clients(self, path, file_format=None, rejects_file=None):
+        """Импорт клиентов (full_name, phone, birth_date, email)"""
+        return self.import_client_records(read_records(path, file_format), rejects_file)
+
+    def import_client_records(self, records, rejects_file=None):
+        """Импорт клиентов из потока пар (номер строки, словарь)"""
+        report = ImportReport('clients', rejects_file)
+        conn = self.db.get_connection()
+        known_phones = {row[0] for row in conn.execute("SELECT phone FROM clients")}
+
+        for chunk in _chunks(records, self.chunk_size):
+            rows = []
+            for line_no, record in chunk:
+                if isinstance(record, Exception):
+                    report.reject(line_no, str(record))
+                    continue
+                full_name = _text(record, 'full_name')
+                phone = _text(record, 'phone')
+                if not full_name or not phone:
+                    report.reject(line_no, "не заполнены ФИО или телефон")
+                    continue
+                if phone in known_phones:
+                    report.reject(line_no, f"телефон уже существует: {phone}")
+                    continue
+                known_phones.add(phone)
+                rows.append((full_name, phone,
+                             _text(record, 'birth_date') or None,
+                             _text(record, 'email') or None,
+                             client_name_key(full_name), client_phone_key(phone)))
+
+            self._write_chunk(rows, lambda cursor: cursor.executemany('''
+                INSERT INTO clients (full_name, phone, birth_date, email, name_key, phone_key)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', rows))
+            report.imported += len(rows)
+
+        self.db.catalog.invalidate('clients')
+        return report
+
+    def import_desserts(self, path, file_format=None, rejects_file=None):
+        """Импорт десертов (name, price_per_kg, price_per_unit, composition)"""
+        return self.import_dessert_records(read_records(path, file_format), rejects_file)
+
+    def import_dessert_records(self, records, rejects_file=None):
+        """Импорт десертов из потока пар (номер строки, словарь)"""
+        report = ImportReport('desserts', rejects_file)
+        conn = self.db.get_connection()
+        known_names = {row[0] for row in conn.execute("SELECT name FROM desserts")}
+
+        for chunk in _chunks(records, self.chunk_size):
+            rows = []
+            for line_no, record in chunk:
+                if isinstance(record, Exception):
+                    report.reject(line_no, str(record))
+                    continue
+                name = _text(record, 'name')
+                if not name:
+                    report.reject(line_no, "не заполнено название")
+                    continue
+                if name in known_names:
+                    report.reject(line_no, f"десерт уже существует: {name}")
+                    continue
+                try:
+                    price_per_kg = _price(record.get('price_per_kg'))
+                    price_per_unit = _price(record.get('price_per_unit'))
+                except ValueError:
+                    report.reject(line_no, "некорректная цена")
+                    continue
+                known_names.add(name)
+                rows.append((name, price_per_kg, price_per_unit,
+                             _text(record, 'composition')))
+
+            self._write_chunk(rows, lambda cursor: cursor.executemany('''
+                INSERT INTO desserts (name, price_per_kg, price_per_unit, composition)
+                VALUES (?, ?, ?, ?)
+            ''', rows))
+            report.imported += len(rows)
+
+        self.db.catalog.invalidate('desserts')
+        return report
+
+    def import_orders(self, path, file_format=None, rejects_file=None):
+        """Импорт заказов (phone, desserts, order_date, order_time, delivery_type, photo_path)
+
+        Клиенты ищутся по телефону, десерты - по названию.
+        """
+        return self.import_order_records(read_records(path, file_format), rejects_file)
+
+    def import_order_records(self, records, rejects_file=None):
+        """Импорт заказов из потока пар (номер строки, словарь)"""
+        report = ImportReport('orders', rejects_file)
+        conn = self.db.get_connection()
+        client_ids = dict(conn.execute("SELECT phone, id FROM clients"))
+        dessert_ids = dict(conn.execute("SELECT name, id FROM desserts"))
+
+        for chunk in _chunks(records, self.chunk_size):
+            orders = []
+            for line_no, record in chunk:
+                if isinstance(record, Exception):
+                    report.reject(line_no, str(record))
+                    continue
+
+                phone = _text(record, 'phone')
+                client_id = client_ids.get(phone)
+                if client_id is None:
+                    report.reject(line_no, f"клиент не найден: {phone}")
+                    continue
+
+                order_date = _text(record, 'order_date')
+                order_time = _text(record, 'order_time')
+                try:
+                    date.fromisoformat(order_date)
+                except ValueError:
+                    report.reject(line_no, f"некорректная дата: {order_date}")
+                    continue
+                if not TIME_PATTERN.match(order_time):
+                    report.reject(line_no, f"некорректное время: {order_time}")
+                    continue
+
+                try:
+                    parsed_items = _parse_dessert_items(record.get('desserts'))
+                except (ValueError, TypeError, IndexError) as e:
+                    report.reject(line_no, f"некорректный список десертов: {e}")
+                    continue
+                missing = [name for name, _ in parsed_items if name not in dessert_ids]
+                if missing:
+                    report.reject(line_no, f"десерт не найден: {', '.join(missing)}")
+                    continue
+                if not parsed_items:
+                    report.reject(line_no, "не указаны десерты")
+                    continue
+                items = {}
+                for name, quantity in parsed_items:
+                    items[name] = items.get(name, 0) + quantity
+
+                # Фото копируется в хранилище; повторяющиеся файлы хешируются один раз
+                try:
+                    photo_path = self.db.store_photo(_text(record, 'photo_path'))
+                except OSError:
+                    report.reject(line_no, f"фото не найдено: {_text(record, 'photo_path')}")
+                    continue
+
+                orders.append((client_id, items, order_date, order_time,
+                               _text(record, 'delivery_type'), photo_path))
+
+            self._write_chunk(orders, lambda cursor: self._insert_orders(cursor, orders, dessert_ids))
+            report.imported += len(orders)
+
+        return report
+
+    def _insert_orders(self, cursor, orders, dessert_ids):
+        """Вставка блока заказов вместе с позициями, их суммами и обновление сводки продаж"""
+        # ID назначаются заранее, чтобы вставить позиции без повторных запросов;
+        # транзакция BEGIN IMMEDIATE исключает параллельные вставки
+        cursor.execute('''
+            SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'orders'), 0),
+                       COALESCE((SELECT MAX(id) FROM orders), 0))
+        ''')
+        next_id = cursor.fetchone()[0] + 1
+
+        order_rows = []
+        item_rows = []
+        for order_id, (client_id, items, order_date, order_time, delivery_type, photo_path) in \
+                enumerate(orders, next_id):
+            # Тот же формат, что и в DatabaseManager.add_order: названия по алфавиту
+            dessert_types = ','.join(sorted(items))
+            # ID заказа повторяется последним параметром - для подсчета суммы по позициям
+            order_rows.append((order_id, client_id, dessert_types, order_date,
+                               order_time, delivery_type, photo_path, order_id))
+            item_rows.extend((order_id, quantity, None, dessert_ids[name])
+                             for name, quantity in items.items())
+
+        # Сводка продаж обновляется одним запросом на блок, а не триггером на строку
+        with self.db.triggers_paused(cursor, SALES_INSERT_TRIGGERS):
+            # Сначала позиции с оценкой по текущим ценам, затем заказы сразу
+            # с суммой: строка заказа пишется один раз, без пересчета после вставки
+            cursor.executemany(INSERT_PRICED_ITEM_SQL, item_rows)
+            cursor.executemany(f'''
+                INSERT INTO orders (id, client_id, dessert_types, order_date, order_time,
+                                    delivery_type, photo_path, total)
+                VALUES (?, ?, ?, ?, ?, ?, ?, {ORDER_TOTAL_SQL.format(order_id='?')})
+            ''', order_rows)
+            self.db.add_orders_to_sales_summary(cursor, next_id, next_id + len(orders) - 1)
+
+
+def main(argv=None):
+    """Точка входа командной строки для массового импорта"""
+    parser = argparse.ArgumentParser(
+        description="Массовый импорт данных кондитерской из CSV/JSONL"
+    )
+    parser.add_argument('kind', choices=['clients', 'desserts', 'orders'],
+                        help="тип импортируемых данных")
+    parser.add_argument('path', help="путь к файлу CSV или JSONL")
+    parser.add_argument('--db', default='confectionery.db', help="файл базы данных")
+    parser.add_argument('--format', choices=['csv', 'jsonl'], dest='file_format',
+                        help="формат файла (по умолчанию - по расширению)")
+    parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE,
+                        help="количество строк в одной транзакции")
+    parser.add_argument('--rejects', help="файл для записи отклоненных строк")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.path):
+        print(f"❌ Файл не найден: {args.path}")
+        return 1
+
+    db = DatabaseManager(args.db)
+    importer = BulkImporter(db, chunk_size=args.chunk_size)
+    import_method = getattr(importer, f'import_{args.kind}')
+
+    rejects_file = open(args.rejects, 'w', encoding='utf-8') if args.rejects else None
+    try:
+        report = import_method(args.path, args.file_format, rejects_file)
+    finally:
+        if rejects_file:
+            rejects_file.close()
+        db.close()
+
+    print(f"✅ {report.summary()}")
+    for line_no, reason in report.errors[:20]:
+        print(f"   строка {line_no}: {reason}")
+    if report.rejected > 20:
+        print(f"   ... и еще {report.rejected - 20}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,52 @@
+import time
+
+# Момент запуска: от него отсчитываются фазы в режиме --profile-startup
+STARTUP_STARTED = time.perf_counter()
+
+import argparse
+import shutil
+import sqlite3
 import sys
 import os
-import tempfile
-from pathlib import Path
+from functools import lru_cache
 
-
-# Настройка путей ДО импорта PyQt5
+from PyQt5 import QtWidgets
+from PyQt5.QtCore import Qt, QDate, QFile, QModelIndex, QTime, QThread, QTimer, pyqtSignal
+from PyQt5.QtGui import QPixmap, QKeySequence, QStandardItem, QStandardItemModel
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QMessageBox,
+                             QFileDialog, QDialog, QShortcut)
+from database import MEDIA_DIR_NAME, DatabaseManager
+from db_worker import AsyncDatabase
+from clients_model import ClientsTableModel
+from diagnostics import QueryStatsDialog
+from exporter import export_table
+from dessert_picker import (DessertPickerModel, NAME_COLUMN, QUANTITY_COLUMN, WEIGHT_COLUMN,
+                            create_dessert_filter)
+from image_loader import ImageLoader
+from orders_model import OrdersTableModel, PagedTableModel
+from query_trace import SLOW_LOG_NAME, SLOW_QUERY_MS, QueryTracer
+from startup_profiler import StartupProfiler
+from thumbnails import ThumbnailCache, load_scaled_image
+from ui_forms import setup_form
+
+# В собранном приложении формы и медиафайлы встроены в модуль ресурсов Qt (resources.qrc)
+if getattr(sys, 'frozen', False):
+    import resources_rc  # ресурсы регистрируются при импорте модуля
+
+
+@lru_cache(maxsize=None)
 def get_resource_path(relative_path):
-    """Получение правильного пути к ресурсам в standalone режиме"""
+    """Путь к ресурсу: встроенному в сборку (":/...") или к файлу рядом с приложением
+
+    Результат запоминается, файловая система проверяется один раз на ресурс.
+    """
+    # Ресурсы Qt встроены в исполняемый файл: поиск по диску не нужен
+    resource_path = ':/' + relative_path.replace(os.sep, '/')
+    if QFile.exists(resource_path):
+        return resource_path
+
     try:
-        # PyInstaller создает временную папку в _MEIPASS
+        # PyInstaller без встроенных ресурсов кладет файлы в _MEIPASS
         base_path = sys._MEIPASS
     except Exception:
         base_path = os.path.abspath(".")
@@ -27,6 +65,7 @@ def get_resource_path(relative_path):
         else:
             print(f"❌ Файл не найден: {relative_path}")
             print(f"   Пробовали пути:")
+            print(f"   - {resource_path}")
             print(f"   - {full_path}")
             print(f"   - {alt_path}")
             print(f"   - {relative_path}")
@@ -35,24 +74,83 @@ def get_resource_path(relative_path):
     return full_path
 
 
-# Теперь импортируем PyQt5
-from PyQt5 import QtWidgets, uic
-from PyQt5.QtCore import Qt, QDate, QTime
-from PyQt5.QtGui import QPixmap, QKeySequence
-from PyQt5.QtWidgets import (QApplication, QMainWindow, QMessageBox,
-                             QFileDialog, QDialog, QShortcut)
-from database import DatabaseManager
+# Файл базы данных (в папке данных)
+DB_FILE_NAME = 'confectionery.db'
+
+# Папка данных собранного приложения в профиле пользователя: папку сборки
+# PyInstaller очищает при каждой пересборке
+APP_DATA_DIR_NAME = 'ConfectioneryApp'
+
+
+def get_data_dir():
+    """Папка базы, фото и миниатюр: текущая при разработке, в профиле пользователя в сборке"""
+    if not getattr(sys, 'frozen', False):
+        return os.path.abspath('.')
+    base_dir = os.environ.get('LOCALAPPDATA') or os.environ.get('APPDATA') or \
+        os.path.expanduser('~')
+    return os.path.join(base_dir, APP_DATA_DIR_NAME)
+
+
+def carry_over_legacy_data(data_dir):
+    """Перенос базы и фото из папки сборки или ее родителя (dist/) при первом запуске
+
+    Прежние сборки хранили данные рядом с исполняемым файлом. Старые файлы
+    не удаляются; если база в папке данных уже есть, ничего не делается.
+    """
+    db_path = os.path.join(data_dir, DB_FILE_NAME)
+    if os.path.exists(db_path):
+        return
+    bundle_dir = os.path.dirname(os.path.abspath(sys.executable))
+    for legacy_dir in (bundle_dir, os.path.dirname(bundle_dir)):
+        legacy_db = os.path.join(legacy_dir, DB_FILE_NAME)
+        if not os.path.isfile(legacy_db):
+            continue
+
+        os.makedirs(data_dir, exist_ok=True)
+        # Копия через backup API включает изменения, еще не перенесенные из журнала WAL
+        temp_path = db_path + '.tmp'
+        source = sqlite3.connect(legacy_db)
+        target = sqlite3.connect(temp_path)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        legacy_photos = os.path.join(legacy_dir, MEDIA_DIR_NAME)
+        if os.path.isdir(legacy_photos):
+            shutil.copytree(legacy_photos, os.path.join(data_dir, MEDIA_DIR_NAME),
+                            dirs_exist_ok=True)
+        # База появляется последней: прерванный перенос повторится при следующем запуске
+        os.replace(temp_path, db_path)
+        print(f"📦 Данные перенесены из {legacy_dir} в {data_dir}")
+        return
+
 
 # Константы путей к UI файлам (будем получать через get_resource_path)
 UI_MAIN_WINDOW = 'ui/main_window.ui'
 UI_ORDER_DETAILS = 'ui/order_details.ui'
 UI_DESSERT_DIALOG = 'ui/dessert_dialog.ui'
 
+# Задержка поиска после последнего нажатия клавиши, мс
+SEARCH_DELAY_MS = 150
+
+# Каталог миниатюр фото (рядом с файлом БД)
+THUMBNAILS_DIR_NAME = 'thumbnails'
+
+# Интервал проверки изменений, сделанных другими терминалами, мс
+CHANGE_POLL_INTERVAL_MS = 1000
+
+# При большем числе изменений таблицы перезагружаются целиком
+MAX_INCREMENTAL_CHANGES = 500
+
+# Интервал очистки старых записей журнала изменений, мс
+CHANGELOG_PRUNE_INTERVAL_MS = 10 * 60 * 1000
+
 
 class OrderDetailsDialog(QDialog):
     """Диалог для отображения деталей заказа"""
 
-    def __init__(self, order_data, parent=None):
+    def __init__(self, order_data=None, parent=None, media=None, image_loader=None):
         # Получаем правильный путь к UI файлу
         ui_path = get_resource_path(UI_ORDER_DETAILS)
         if not ui_path:
@@ -60,10 +158,14 @@ class OrderDetailsDialog(QDialog):
             return
 
         super().__init__(parent)
-        uic.loadUi(ui_path, self)
-        self.order_data = order_data
+        setup_form(self, ui_path)
+        # Хранилище фото: в заказе записан ключ, а не путь к файлу
+        self.media = media
+        # Фото декодируется в фоне; ID запроса нужен для отмены устаревшей загрузки
+        self.image_loader = image_loader
+        self.photo_request = None
         self.setup_ui()
-        self.load_order_data()
+        self.set_order_data(order_data)
 
     def setup_ui(self):
         """Настройка интерфейса диалога"""
@@ -71,6 +173,14 @@ class OrderDetailsDialog(QDialog):
         self.clearPhotoBtn.clicked.connect(self.clear_photo)
         self.saveBtn.clicked.connect(self.save_changes)
         self.cancelBtn.clicked.connect(self.reject)
+        self.finished.connect(self.cancel_photo_loading)
+
+    def set_order_data(self, order_data):
+        """Показ заказа (диалог переиспользуется для разных заказов)"""
+        self.order_data = order_data
+        self.clear_photo()
+        self.totalLabel.setText("-")
+        self.load_order_data()
 
     def load_order_data(self):
         """Загрузка данных заказа в форму"""
@@ -82,9 +192,14 @@ class OrderDetailsDialog(QDialog):
             self.dateLabel.setText(self.order_data[4])
             self.timeLabel.setText(self.order_data[5])
             self.deliveryLabel.setText(self.order_data[6])
+            total = self.order_data[8] if len(self.order_data) > 8 else None
+            if total is not None:
+                self.totalLabel.setText(f"{total:.2f} руб")
 
             # Загрузка фото если есть
             photo_path = self.order_data[7] if len(self.order_data) > 7 else ""
+            if photo_path and self.media:
+                photo_path = self.media.resolve(photo_path)
             if photo_path and os.path.exists(photo_path):
                 self.load_photo_from_path(photo_path)
 
@@ -99,20 +214,37 @@ class OrderDetailsDialog(QDialog):
             self.load_photo_from_path(file_name)
 
     def load_photo_from_path(self, file_path):
-        """Загрузка фото из указанного пути"""
-        pixmap = QPixmap(file_path)
-        if not pixmap.isNull():
-            scaled_pixmap = pixmap.scaled(
-                self.photoLabel.width(),
-                self.photoLabel.height(),
-                Qt.KeepAspectRatio,
-                Qt.SmoothTransformation
-            )
-            self.photoLabel.setPixmap(scaled_pixmap)
-            self.photoLabel.setText("")
+        """Загрузка фото из указанного пути (уменьшенной копии по размеру поля)"""
+        self.cancel_photo_loading()
+        if not self.image_loader:
+            image = load_scaled_image(file_path, self.photoLabel.size())
+            self.show_photo(None if image.isNull() else QPixmap.fromImage(image))
+            return
+
+        self.photoLabel.clear()
+        self.photoLabel.setText("Загрузка фото...")
+        self.photo_request = self.image_loader.load(
+            file_path, self.photoLabel.size(), self.show_photo
+        )
+
+    def show_photo(self, pixmap):
+        """Отображение загруженного фото"""
+        self.photo_request = None
+        if pixmap is None:
+            self.photoLabel.setText("Не удалось загрузить фото")
+            return
+        self.photoLabel.setPixmap(pixmap)
+        self.photoLabel.setText("")
+
+    def cancel_photo_loading(self):
+        """Отмена загрузки фото (при выборе другого файла или закрытии диалога)"""
+        if self.photo_request is not None:
+            self.image_loader.cancel(self.photo_request)
+            self.photo_request = None
 
     def clear_photo(self):
         """Очистка фото"""
+        self.cancel_photo_loading()
         self.photoLabel.clear()
         self.photoLabel.setText("Фото не загружено")
 
@@ -133,10 +265,9 @@ class DessertDialog(QDialog):
             return
 
         super().__init__(parent)
-        uic.loadUi(ui_path, self)
-        self.dessert_data = dessert_data
+        setup_form(self, ui_path)
         self.setup_ui()
-        self.load_dessert_data()
+        self.set_dessert_data(dessert_data)
 
     def setup_ui(self):
         """Настройка интерфейса диалога"""
@@ -144,8 +275,18 @@ class DessertDialog(QDialog):
         self.saveBtn.clicked.connect(self.save_dessert)
         self.cancelBtn.clicked.connect(self.reject)
 
+    def set_dessert_data(self, dessert_data=None):
+        """Сброс формы и загрузка десерта (диалог переиспользуется)"""
+        self.dessert_data = dessert_data
+        self.saved_data = None
+        self.nameEdit.clear()
+        self.compositionEdit.clear()
+        self.priceTypeCombo.setCurrentIndex(0)
         # Начальная настройка полей цены
         self.on_price_type_changed(0)
+        self.priceKgEdit.setValue(0)
+        self.load_dessert_data()
+        self.nameEdit.setFocus()
 
     def load_dessert_data(self):
         """Загрузка данных десерта в форму"""
@@ -205,11 +346,36 @@ class DessertDialog(QDialog):
         return getattr(self, 'saved_data', None)
 
 
+class ExportWorker(QThread):
+    """Фоновый поток выгрузки данных в файл"""
+
+    progress = pyqtSignal(int)
+    finished_ok = pyqtSignal(int)
+    failed = pyqtSignal(str)
+
+    def __init__(self, db, kind, path, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.kind = kind
+        self.path = path
+
+    def run(self):
+        """Выгрузка в отдельном потоке со своим подключением к БД"""
+        try:
+            total = export_table(self.db, self.kind, self.path, progress=self.progress.emit)
+            self.finished_ok.emit(total)
+        except Exception as e:
+            self.failed.emit(str(e))
+        finally:
+            self.db.release_connection()
+
+
 class ConfectioneryApp(QMainWindow):
     """Главное окно приложения кондитерской"""
 
-    def __init__(self):
+    def __init__(self, profiler=None, tracer=None, db_name=DB_FILE_NAME):
         super().__init__()
+        self.profiler = profiler or StartupProfiler(enabled=False)
 
         # Получаем правильный путь к главному UI файлу
         ui_path = get_resource_path(UI_MAIN_WINDOW)
@@ -219,23 +385,207 @@ class ConfectioneryApp(QMainWindow):
                                  f"Убедитесь, что папка 'ui' с файлами .ui находится рядом с приложением.")
             sys.exit(1)
 
-        # Загружаем интерфейс
-        uic.loadUi(ui_path, self)
+        # Загружаем интерфейс (из скомпилированной формы)
+        setup_form(self, ui_path)
+        self.profiler.mark("Загрузка интерфейса")
+
+        # Диалоги создаются один раз и переиспользуются: класс -> экземпляр
+        self.dialogs = {}
 
-        # Инициализация базы данных
-        self.db = DatabaseManager()
+        # Подключение к базе данных; создание таблиц и миграции (в том числе
+        # перенос фото) выполняются в фоновом потоке после показа окна
+        self.db = DatabaseManager(db_name, tracer=tracer, initialize=False)
+
+        # Миниатюры фото заказов: в памяти и на диске
+        self.thumbnails = ThumbnailCache(os.path.join(
+            os.path.dirname(os.path.abspath(self.db.db_name)), THUMBNAILS_DIR_NAME
+        ))
+        self.image_loader = ImageLoader(self.thumbnails, self)
+        self.preview_request = None
+
+        # Все запросы из интерфейса выполняются в фоновом потоке
+        self.dbw = AsyncDatabase(self.db, self)
+
+        # Вкладки загружаются при первом открытии
+        self.loaded_tabs = set()
+        self.last_change_id = None
+        # Таймеры отслеживания изменений запускаются после подготовки БД
+        self.change_timer = QTimer(self)
+        self.prune_timer = QTimer(self)
 
         # Инициализация интерфейса
         self.init_ui()
 
-        # Загрузка данных
-        self.load_data()
-
         # Настройка горячих клавиш
         self.setup_shortcuts()
+        self.profiler.mark("Настройка интерфейса")
+
+        # Запросы к БД начинаются после показа окна, в цикле событий
+        QTimer.singleShot(0, self.start_loading)
 
         print("✅ Приложение успешно инициализировано!")
 
+    def start_loading(self):
+        """Подготовка базы данных в фоновом потоке; до ее завершения окно недоступно"""
+        self.profiler.mark("Показ окна")
+        self.centralWidget().setEnabled(False)
+        for action in (self.actionExportOrders, self.actionExportClients,
+                       self.actionExportDesserts):
+            action.setEnabled(False)
+        self.statusbar.showMessage("Подготовка базы данных...")
+        self.dbw.call('init_database', on_result=self.on_database_ready,
+                      on_error=self.on_database_failed)
+
+    def on_database_ready(self, _):
+        """Загрузка открытой вкладки и запуск отслеживания изменений"""
+        self.profiler.mark("Инициализация БД")
+        self.statusbar.clearMessage()
+        self.centralWidget().setEnabled(True)
+        for action in (self.actionExportOrders, self.actionExportClients,
+                       self.actionExportDesserts):
+            action.setEnabled(True)
+        # Отслеживание изменений других терминалов
+        self.setup_change_tracking()
+        self.dbw.call('get_last_change_id',
+                      on_result=lambda change_id: setattr(self, 'last_change_id', change_id))
+        self.on_tab_changed(self.tabWidget.currentIndex())
+
+    def on_database_failed(self, message):
+        """Ошибка создания таблиц или обновления схемы: работа невозможна"""
+        QMessageBox.critical(self, "Ошибка", f"Не удалось подготовить базу данных: {message}")
+        self.close()
+
+    def setup_change_tracking(self):
+        """Периодическая проверка записей, сделанных другими терминалами"""
+        self.data_version = None
+        self.change_check_pending = False
+        # Точка отсчета - версия данных подключения фонового потока
+        self.dbw.call('get_data_version',
+                      on_result=lambda version: setattr(self, 'data_version', version))
+
+        self.change_timer.setInterval(CHANGE_POLL_INTERVAL_MS)
+        self.change_timer.timeout.connect(self.check_external_changes)
+        self.change_timer.start()
+
+        # Журнал изменений растет с каждой записью: старые записи удаляются
+        # и во время работы, а не только при запуске
+        self.prune_timer.setInterval(CHANGELOG_PRUNE_INTERVAL_MS)
+        self.prune_timer.timeout.connect(lambda: self.dbw.call('prune_changelog'))
+        self.prune_timer.start()
+
+    def check_external_changes(self):
+        """Загрузка только изменившихся строк после записи другим терминалом"""
+        if self.change_check_pending or self.data_version is None or self.last_change_id is None:
+            return
+        self.change_check_pending = True
+        self.dbw.call('get_data_version', on_result=self.on_data_version,
+                      on_error=self.on_change_check_failed)
+
+    def apply_client_changes(self, clients):
+        """Точечное обновление комбобокса и таблицы клиентов
+
+        clients - словарь {ID клиента: строка или None для удаленных}
+        """
+        clients_loaded = self.clientsTab in self.loaded_tabs
+        searching = bool(self.clientsSearchEdit.text().strip())
+        # Без загруженной таблицы нового клиента не отличить от измененного
+        name_changed = searching or not clients_loaded
+        for client_id, client in clients.items():
+            # В комбобоксе только выбранный клиент: он обновляется или сбрасывается
+            index = self.clientCombo.findData(client_id)
+            if index != -1:
+                selected = self.selected_client_id() == client_id
+                if client:
+                    self.clientCombo.setItemText(index, self.client_lookup_text(client))
+                    if selected:
+                        self.clientCombo.setEditText(self.clientCombo.itemText(index))
+                else:
+                    self.clientCombo.removeItem(index)
+                    self.clientCombo.setEditText("")
+
+            if clients_loaded and not searching:
+                # У нового клиента еще нет заказов; клиент после загруженных
+                # страниц мог быть и изменен
+                name_changed = name_changed or client is None or self.clients_model.has_more \
+                    or self.clients_model.find_row(client_id) is not None
+                self.clients_model.apply_change(client_id, client)
+
+        if clients_loaded and searching:
+            self.load_clients()
+
+        # ФИО и телефон показываются и в списке заказов
+        if name_changed and self.ordersTab in self.loaded_tabs:
+            self.load_orders()
+
+        # Открытый список найденных клиентов перестраивается
+        if self.clientCombo.completer().popup().isVisible():
+            self.lookup_clients()
+
+    def apply_dessert_changes(self, desserts):
+        """Точечное обновление списка выбора и таблицы десертов
+
+        desserts - словарь {ID десерта: строка или None для удаленных}
+        """
+        desserts_loaded = self.dessertsTab in self.loaded_tabs
+        searching = bool(self.dessertsSearchEdit.text().strip())
+        for dessert_id, dessert in desserts.items():
+            self.dessert_picker_model.apply_change(dessert_id, dessert)
+
+            if desserts_loaded and not searching:
+                self.apply_table_row_change(
+                    self.dessertsTable, dessert_id, dessert,
+                    key=lambda record: str(record[1]),
+                    row_key=lambda row: self.dessertsTable.item(row, 1).text()
+                )
+
+        if desserts_loaded and searching:
+            self.fill_desserts_table()
+
+    def apply_order_changes(self, orders):
+        """Точечное обновление списка заказов (от новых к старым)
+
+        orders - словарь {ID заказа: строка или None для удаленных}
+        """
+        if self.ordersTab not in self.loaded_tabs:
+            return
+        if self.ordersSearchEdit.text().strip():
+            self.load_orders()
+            return
+
+        for order_id, order in orders.items():
+            self.orders_model.apply_change(order_id, order)
+
+    def apply_table_row_change(self, table, row_id, record, key, row_key,
+                               descending=False, skip_tail=False):
+        """Удаление, замена или вставка строки таблицы с сохранением сортировки"""
+        for item in table.findItems(str(row_id), Qt.MatchExactly):
+            if item.column() == 0:
+                table.removeRow(item.row())
+                break
+
+        if record is None:
+            return
+
+        position = self.find_insert_position(table.rowCount(), key(record), row_key, descending)
+
+        if skip_tail and position == table.rowCount():
+            return
+        table.insertRow(position)
+        self.set_table_row(table, position, record)
+
+    @staticmethod
+    def find_insert_position(count, value, value_at, descending=False):
+        """Двоичный поиск позиции вставки в отсортированном списке виджета"""
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            current = value_at(middle)
+            if (value > current) if descending else (value < current):
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
     def load_ui(self):
         """Загрузка UI из файла"""
         # Этот метод больше не нужен, т.к. загрузка в __init__
@@ -248,36 +598,160 @@ class ConfectioneryApp(QMainWindow):
         self.orderTimeEdit.setTime(QTime.currentTime())
         self.clientBirthEdit.setDate(QDate(1990, 1, 1))
 
+        # Период отчета по умолчанию - текущий месяц
+        today = QDate.currentDate()
+        self.reportFromEdit.setDate(QDate(today.year(), today.month(), 1))
+        self.reportToEdit.setDate(today)
+
         # Заполнение комбобокса доставки
         self.deliveryCombo.addItems(["Доставка", "Самовывоз"])
 
         # Настройка таблиц
         self.setup_tables()
 
+        # Индикатор выполнения запросов в строке состояния
+        self.busyIndicator = QtWidgets.QProgressBar()
+        self.busyIndicator.setRange(0, 0)
+        self.busyIndicator.setMaximumWidth(120)
+        self.busyIndicator.hide()
+        self.statusbar.addPermanentWidget(self.busyIndicator)
+        self.dbw.busy_changed.connect(self.busyIndicator.setVisible)
+
         # Подключение сигналов
         self.connect_signals()
 
         # Подключение сигналов меню
         self.actionExit.triggered.connect(self.close)
         self.actionAbout.triggered.connect(self.show_about)
+        self.actionExportOrders.triggered.connect(lambda: self.export_data('orders'))
+        self.actionExportClients.triggered.connect(lambda: self.export_data('clients'))
+        self.actionExportDesserts.triggered.connect(lambda: self.export_data('desserts'))
 
     def setup_tables(self):
         """Настройка таблиц"""
-        # Таблица заказов
-        self.ordersTable.setHorizontalHeaderLabels([
-            "ID", "Клиент", "Телефон", "Десерты", "Дата", "Время", "Тип"
-        ])
+        # Таблица заказов: модель хранит только загруженные страницы
+        self.orders_model = OrdersTableModel(self.load_more_orders, self)
+        self.ordersTable.setModel(self.orders_model)
 
-        # Таблица клиентов
-        self.clientsTable.setHorizontalHeaderLabels([
-            "ID", "ФИО", "Телефон", "Дата рождения", "Email"
-        ])
+        # Таблица клиентов: так же постранично, по ФИО
+        self.clients_model = ClientsTableModel(self.load_more_clients, self)
+        self.clientsTable.setModel(self.clients_model)
 
         # Таблица десертов
         self.dessertsTable.setHorizontalHeaderLabels([
             "ID", "Название", "Цена за кг", "Цена за шт", "Состав"
         ])
 
+        # Таблицы отчета о продажах
+        self.salesByDayTable.setHorizontalHeaderLabels([
+            "Дата", "Заказов", "Единиц", "Выручка"
+        ])
+        self.salesByDessertTable.setHorizontalHeaderLabels([
+            "Десерт", "Заказов", "Единиц", "Выручка"
+        ])
+
+        # Последний запрос строк для каждой таблицы: более старые ответы игнорируются
+        self.table_requests = {}
+
+        # Загрузка данных вкладок при первом открытии
+        self.tab_loaders = {
+            self.ordersTab: self.load_orders_tab,
+            self.clientsTab: self.load_clients,
+            self.dessertsTab: self.load_desserts,
+        }
+
+        # Список выбора десертов в форме заказа: модель с фильтром по названию
+        self.dessert_picker_model = DessertPickerModel(self)
+        self.dessert_picker_filter = create_dessert_filter(self.dessert_picker_model, self)
+        self.dessertPickerView.setModel(self.dessert_picker_filter)
+        header = self.dessertPickerView.horizontalHeader()
+        header.setSectionResizeMode(NAME_COLUMN, QtWidgets.QHeaderView.Stretch)
+        header.setSectionResizeMode(QUANTITY_COLUMN, QtWidgets.QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(WEIGHT_COLUMN, QtWidgets.QHeaderView.ResizeToContents)
+
+        # Выбор клиента в форме заказа: поиск по началу ФИО или телефона
+        self.setup_client_lookup()
+
+    def setup_client_lookup(self):
+        """Комбобокс клиента с поиском в БД по мере ввода
+
+        Клиенты не загружаются в комбобокс целиком: введенный текст ищется
+        по индексам ФИО и телефона, найденные показываются в выпадающем
+        списке, а в комбобоксе остается только выбранный клиент.
+        """
+        self.clientCombo.clear()
+        self.clientCombo.setEditable(True)
+        self.clientCombo.setInsertPolicy(QtWidgets.QComboBox.NoInsert)
+        self.clientCombo.lineEdit().setPlaceholderText("ФИО или телефон клиента")
+
+        self.client_lookup_model = QStandardItemModel(self)
+        completer = QtWidgets.QCompleter(self.client_lookup_model, self)
+        # Список уже отфильтрован запросом к БД
+        completer.setCompletionMode(QtWidgets.QCompleter.UnfilteredPopupCompletion)
+        completer.setCaseSensitivity(Qt.CaseInsensitive)
+        completer.activated[QModelIndex].connect(self.on_client_chosen)
+        self.clientCombo.setCompleter(completer)
+
+        self.client_lookup_request = None
+        self.client_lookup_timer = QTimer(self)
+        self.client_lookup_timer.setSingleShot(True)
+        self.client_lookup_timer.setInterval(SEARCH_DELAY_MS)
+        self.client_lookup_timer.timeout.connect(self.lookup_clients)
+        self.clientCombo.lineEdit().textEdited.connect(self.client_lookup_timer.start)
+
+    @staticmethod
+    def client_lookup_text(client):
+        """Текст клиента в форме заказа: ФИО и телефон"""
+        return f"{client[1]} ({client[2]})"
+
+    def lookup_clients(self):
+        """Поиск клиентов по введенному началу ФИО или телефона"""
+        text = self.clientCombo.currentText().strip()
+        if not text or self.selected_client_id() is not None:
+            self.client_lookup_request = None
+            self.client_lookup_model.clear()
+            return
+
+        def deliver(clients):
+            # Ответ на устаревший запрос (текст уже изменился) не показывается
+            if self.client_lookup_request != request_id:
+                return
+            self.client_lookup_request = None
+            self.client_lookup_model.clear()
+            for client in clients:
+                item = QStandardItem(self.client_lookup_text(client))
+                item.setData(client[0], Qt.UserRole)
+                self.client_lookup_model.appendRow(item)
+            if clients and self.clientCombo.lineEdit().hasFocus():
+                self.clientCombo.completer().complete()
+
+        def fail(message):
+            if self.client_lookup_request == request_id:
+                self.client_lookup_request = None
+            self.statusbar.showMessage(f"Ошибка поиска клиента: {message}", 5000)
+
+        request_id = self.dbw.call('find_clients', text, on_result=deliver, on_error=fail)
+        self.client_lookup_request = request_id
+
+    def on_client_chosen(self, index):
+        """Клиент выбран из списка найденных"""
+        self.set_order_client(index.data(Qt.UserRole), index.data(Qt.DisplayRole))
+
+    def set_order_client(self, client_id, text):
+        """Выбранный клиент - единственный элемент комбобокса"""
+        self.client_lookup_timer.stop()
+        self.client_lookup_request = None
+        self.clientCombo.clear()
+        self.clientCombo.addItem(text, client_id)
+        self.clientCombo.setCurrentIndex(0)
+
+    def selected_client_id(self):
+        """ID выбранного клиента или None, если текст не совпадает с выбором"""
+        index = self.clientCombo.currentIndex()
+        if index == -1 or self.clientCombo.currentText() != self.clientCombo.itemText(index):
+            return None
+        return self.clientCombo.itemData(index)
+
     def connect_signals(self):
         """Подключение сигналов к слотам"""
         # Заказы
@@ -285,14 +759,24 @@ class ConfectioneryApp(QMainWindow):
         self.addOrderBtn.clicked.connect(self.add_order)
         self.deleteOrderBtn.clicked.connect(self.delete_order)
         self.refreshOrdersBtn.clicked.connect(self.load_orders)
-        self.ordersTable.itemDoubleClicked.connect(self.show_order_details)
+        self.dessertFilterEdit.textChanged.connect(self.dessert_picker_filter.setFilterFixedString)
+        self.ordersTable.doubleClicked.connect(self.show_order_details)
+
+        # Поиск по мере ввода (с небольшой задержкой)
+        self.orders_search_timer = self.create_search_timer(self.ordersSearchEdit, self.load_orders)
+        self.clients_search_timer = self.create_search_timer(
+            self.clientsSearchEdit, self.load_clients
+        )
+        self.desserts_search_timer = self.create_search_timer(
+            self.dessertsSearchEdit, self.fill_desserts_table
+        )
 
         # Клиенты
         self.addClientBtn.clicked.connect(self.add_client)
         self.updateClientBtn.clicked.connect(self.update_client)
         self.deleteClientBtn.clicked.connect(self.delete_client)
         self.clearClientBtn.clicked.connect(self.clear_client_form)
-        self.clientsTable.itemClicked.connect(self.client_table_clicked)
+        self.clientsTable.clicked.connect(self.client_table_clicked)
 
         # Десерты
         self.addDessertBtn.clicked.connect(self.show_add_dessert_dialog)
@@ -301,52 +785,48 @@ class ConfectioneryApp(QMainWindow):
         self.clearDessertBtn.clicked.connect(self.clear_dessert_form)
         self.dessertsTable.itemClicked.connect(self.dessert_table_clicked)
 
+        # Отчеты
+        self.showReportBtn.clicked.connect(self.load_report)
+        self.recomputeTotalsBtn.clicked.connect(self.recompute_totals)
+        self.tabWidget.currentChanged.connect(self.on_tab_changed)
+
+    def create_search_timer(self, search_edit, slot):
+        """Таймер, запускающий поиск после паузы во вводе"""
+        timer = QTimer(self)
+        timer.setSingleShot(True)
+        timer.setInterval(SEARCH_DELAY_MS)
+        timer.timeout.connect(lambda: slot())
+        search_edit.textChanged.connect(timer.start)
+        return timer
+
     def show_add_dessert_dialog(self):
         """Показать диалог добавления десерта"""
-        try:
-            dialog = DessertDialog(parent=self)
-            if dialog.exec_() == QDialog.Accepted:
-                data = dialog.get_dessert_data()
-                if data:
-                    name, price_kg, price_unit, composition = data
-                    self.db.add_dessert(name, price_kg, price_unit, composition)
-                    QMessageBox.information(self, "Успех", "Десерт успешно добавлен!")
-                    self.load_desserts()
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Не удалось добавить десерт: {str(e)}")
+        dialog = self.get_dialog(DessertDialog)
+        dialog.set_dessert_data(None)
+        if dialog.exec_() == QDialog.Accepted:
+            data = dialog.get_dessert_data()
+            if data:
+                self.db_write('add_dessert', *data,
+                              success_text="Десерт успешно добавлен!",
+                              error_text="Не удалось добавить десерт",
+                              on_done=lambda _: self.load_desserts())
 
     def show_edit_dessert_dialog(self):
         """Показать диалог редактирования десерта"""
-        try:
-            current_row = self.dessertsTable.currentRow()
-            if current_row == -1:
-                QMessageBox.warning(self, "Ошибка", "Выберите десерт для редактирования!")
-                return
+        current_row = self.dessertsTable.currentRow()
+        if current_row == -1:
+            QMessageBox.warning(self, "Ошибка", "Выберите десерт для редактирования!")
+            return
 
-            dessert_id = int(self.dessertsTable.item(current_row, 0).text())
-
-            # Получаем данные десерта из БД
-            desserts = self.db.get_all_desserts()
-            dessert_data = next((d for d in desserts if d[0] == dessert_id), None)
-
-            if dessert_data:
-                dialog = DessertDialog(dessert_data, parent=self)
-                if dialog.exec_() == QDialog.Accepted:
-                    data = dialog.get_dessert_data()
-                    if data:
-                        name, price_kg, price_unit, composition = data
-                        self.db.update_dessert(dessert_id, name, price_kg, price_unit, composition)
-                        QMessageBox.information(self, "Успех", "Десерт успешно обновлен!")
-                        self.load_desserts()
-            else:
-                QMessageBox.warning(self, "Ошибка", "Десерт не найден!")
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Не удалось обновить десерт: {str(e)}")
+        dessert_id = int(self.dessertsTable.item(current_row, 0).text())
 
-    def get_dessert_by_id(self, dessert_id):
-        """Получить данные десерта по ID"""
-        desserts = self.db.get_all_desserts()
-        return next((d for d in desserts if d[0] == dessert_id), None)
+        # Получаем данные десерта из БД
+        self.dbw.call(
+            'get_dessert', dessert_id,
+            on_result=lambda dessert_data: self.edit_dessert(dessert_id, dessert_data),
+            on_error=lambda message: QMessageBox.critical(
+                self, "Ошибка", f"Не удалось обновить десерт: {message}")
+        )
 
     def setup_shortcuts(self):
         """Настройка горячих клавиш"""
@@ -362,68 +842,114 @@ class ConfectioneryApp(QMainWindow):
         new_order_shortcut = QShortcut(QKeySequence("Ctrl+N"), self)
         new_order_shortcut.activated.connect(self.clear_order_form)
 
+        # Ctrl+Shift+D - скрытое окно диагностики запросов
+        diagnostics_shortcut = QShortcut(QKeySequence("Ctrl+Shift+D"), self)
+        diagnostics_shortcut.activated.connect(self.show_diagnostics)
+
+    def show_diagnostics(self):
+        """Окно статистики трассировки запросов (немодальное)"""
+        dialog = self.get_dialog(QueryStatsDialog, tracer=self.db.tracer)
+        dialog.show()
+        dialog.raise_()
+
     def load_data(self):
-        """Загрузка всех данных"""
-        self.load_clients()
-        self.load_desserts()
+        """Перезагрузка данных уже открывавшихся вкладок"""
+        # Изменения, сделанные во время загрузки, будут применены повторно
+        self.dbw.call('get_last_change_id',
+                      on_result=lambda change_id: setattr(self, 'last_change_id', change_id))
+        for tab in self.loaded_tabs:
+            self.tab_loaders[tab]()
+
+    def load_orders_tab(self):
+        """Данные вкладки заказов: список заказов и список выбора десертов"""
+        self.profiler.wait_for("Таблица заказов (первая страница)", "Список выбора десертов")
         self.load_orders()
+        self.load_desserts()
 
     def load_clients(self):
-        """Загрузка клиентов в комбобокс и таблицу"""
-        clients = self.db.get_all_clients()
-
-        # Обновление комбобокса
-        self.clientCombo.clear()
-        for client in clients:
-            self.clientCombo.addItem(f"{client[1]} ({client[2]})", client[0])
-
-        # Обновление таблицы
-        self.clientsTable.setRowCount(len(clients))
-        for row, client in enumerate(clients):
-            for col, data in enumerate(client):
-                item = QtWidgets.QTableWidgetItem(str(data))
-                self.clientsTable.setItem(row, col, item)
-
-        self.clientsTable.resizeColumnsToContents()
+        """Загрузка первой страницы клиентов (или результатов поиска) в таблицу"""
+        self.clients_model.set_rows([])
+
+        query = self.clientsSearchEdit.text().strip()
+        if query:
+            # Результаты поиска ограничены и не догружаются
+            self.request_rows(self.clientsTable, 'search_clients', query,
+                              on_rows=self.on_clients_found)
+        else:
+            self.request_rows(self.clientsTable, 'get_clients_page',
+                              on_rows=self.on_clients_page_loaded)
+
+    def load_more_clients(self, after):
+        """Догрузка следующей страницы клиентов (вызывается моделью при прокрутке до конца)"""
+        self.load_more_rows(self.clientsTable, 'get_clients_page', after, "Загрузка клиентов...")
+
+    def fill_table(self, table, rows):
+        """Заполнение таблицы строками из БД"""
+        table.setRowCount(len(rows))
+        for row, record in enumerate(rows):
+            self.set_table_row(table, row, record)
+
+    def set_table_row(self, table, row, record):
+        """Запись одной строки из БД в таблицу"""
+        # Лишние поля (например, путь к фото) в таблице не показываются
+        for col, data in enumerate(record[:table.columnCount()]):
+            item = QtWidgets.QTableWidgetItem(str(data))
+            table.setItem(row, col, item)
 
     def load_desserts(self):
         """Загрузка десертов в чекбоксы и таблицу"""
-        desserts = self.db.get_all_desserts()
-
-        # Очистка layout с чекбоксами
-        for i in reversed(range(self.dessertCheckboxLayout.count())):
-            widget = self.dessertCheckboxLayout.itemAt(i).widget()
-            if widget:
-                widget.deleteLater()
-
-        # Создание чекбоксов
-        self.dessert_checkboxes = []
-        for dessert in desserts:
-            checkbox = QtWidgets.QCheckBox(dessert[1])
-            checkbox.dessert_id = dessert[0]
-            self.dessertCheckboxLayout.addWidget(checkbox)
-            self.dessert_checkboxes.append(checkbox)
-
-        # Обновление таблицы
-        self.dessertsTable.setRowCount(len(desserts))
-        for row, dessert in enumerate(desserts):
-            for col, data in enumerate(dessert):
-                item = QtWidgets.QTableWidgetItem(str(data))
-                self.dessertsTable.setItem(row, col, item)
-
-        self.dessertsTable.resizeColumnsToContents()
+        self.request_rows(self.dessertsTable, 'get_all_desserts', on_rows=self.on_desserts_loaded)
+
+    def fill_desserts_table(self, desserts=None):
+        """Заполнение таблицы десертов с учетом строки поиска"""
+        query = self.dessertsSearchEdit.text().strip()
+        if query:
+            self.request_rows(self.dessertsTable, 'search_desserts', query,
+                              on_rows=lambda rows: self.fill_desserts_table_rows(rows))
+        elif desserts is None:
+            self.request_rows(self.dessertsTable, 'get_all_desserts',
+                              on_rows=lambda rows: self.fill_desserts_table_rows(rows))
+        else:
+            self.fill_desserts_table_rows(desserts)
 
     def load_orders(self):
-        """Загрузка заказов в таблицу"""
-        orders = self.db.get_all_orders()
+        """Загрузка первой страницы заказов (или результатов поиска) в таблицу"""
+        self.orders_model.set_rows([])
+
+        query = self.ordersSearchEdit.text().strip()
+        if query:
+            # Результаты поиска ограничены и не догружаются
+            self.request_rows(self.ordersTable, 'search_orders', query,
+                              on_rows=self.on_orders_found)
+        else:
+            self.request_rows(self.ordersTable, 'get_orders_page',
+                              on_rows=self.on_orders_page_loaded)
 
-        self.ordersTable.setRowCount(len(orders))
-        for row, order in enumerate(orders):
-            for col, data in enumerate(order):
-                item = QtWidgets.QTableWidgetItem(str(data))
-                self.ordersTable.setItem(row, col, item)
+    def load_more_orders(self, after):
+        """Догрузка следующей страницы заказов (вызывается моделью при прокрутке до конца)"""
+        self.load_more_rows(self.ordersTable, 'get_orders_page', after, "Загрузка заказов...")
 
-        self.ordersTable.resizeColumnsToContents()
+    def load_more_rows(self, table, method, after, status_text):
+        """Асинхронная догрузка страницы в конец таблицы с постраничной моделью"""
+        model = table.model()
+
+        def deliver(page):
+            # Ответ мог устареть после перезагрузки таблицы
+            if self.table_requests.get(table) != request_id:
+                return
+            del self.table_requests[table]
+            self.statusbar.clearMessage()
+            model.append_page(*page)
+
+        def failed(message):
+            if self.table_requests.get(table) == request_id:
+                del self.table_requests[table]
+                model.cancel_fetch()
+            self.statusbar.showMessage(f"Ошибка загрузки данных: {message}", 5000)
+
+        request_id = self.dbw.call(method, after=after, on_result=deliver, on_error=failed)
+        self.table_requests[table] = request_id
+        self.statusbar.showMessage(status_text)
 
     def browse_photo(self):
         """Выбор фото для заказа"""
@@ -434,70 +960,87 @@ class ConfectioneryApp(QMainWindow):
 
         if file_name:
             self.photoPathEdit.setText(file_name)
-            pixmap = QPixmap(file_name)
-            if not pixmap.isNull():
-                scaled_pixmap = pixmap.scaled(
-                    self.photoPreview.width(),
-                    self.photoPreview.height(),
-                    Qt.KeepAspectRatio,
-                    Qt.SmoothTransformation
-                )
-                self.photoPreview.setPixmap(scaled_pixmap)
+            # Превью декодируется в фоне, предыдущая загрузка отменяется
+            self.cancel_preview_loading()
+            self.photoPreview.clear()
+            self.photoPreview.setText("Загрузка фото...")
+            self.preview_request = self.image_loader.load(
+                file_name, self.photoPreview.size(), self.show_preview
+            )
+
+    def show_preview(self, pixmap):
+        """Отображение превью выбранного фото"""
+        self.preview_request = None
+        if pixmap is None:
+            self.photoPreview.setText("Не удалось загрузить фото")
+        else:
+            self.photoPreview.setPixmap(pixmap)
+
+    def cancel_preview_loading(self):
+        """Отмена загрузки превью фото"""
+        if self.preview_request is not None:
+            self.image_loader.cancel(self.preview_request)
+            self.preview_request = None
 
     def add_order(self):
         """Добавление нового заказа"""
-        try:
-            # Получение выбранного клиента
-            if self.clientCombo.currentIndex() == -1:
-                QMessageBox.warning(self, "Ошибка", "Выберите клиента!")
-                return
-
-            client_id = self.clientCombo.currentData()
+        # Получение выбранного клиента
+        client_id = self.selected_client_id()
+        if client_id is None:
+            QMessageBox.warning(self, "Ошибка", "Выберите клиента из найденных по ФИО или телефону!")
+            return
 
-            # Получение выбранных десертов
-            selected_desserts = []
-            for checkbox in self.dessert_checkboxes:
-                if checkbox.isChecked():
-                    selected_desserts.append(checkbox.text())
+        # Получение выбранных десертов с количеством и весом
+        selected_desserts = self.dessert_picker_model.selected_items()
 
-            if not selected_desserts:
-                QMessageBox.warning(self, "Ошибка", "Выберите хотя бы один десерт!")
-                return
+        if not selected_desserts:
+            QMessageBox.warning(self, "Ошибка", "Выберите хотя бы один десерт!")
+            return
 
-            dessert_types = ",".join(selected_desserts)
+        # Десерт с ценой только за кг без веса оценить нельзя
+        missing_weights = self.dessert_picker_model.missing_weights()
+        if missing_weights:
+            QMessageBox.warning(self, "Ошибка",
+                                "Укажите вес для десертов, которые продаются на вес:\n"
+                                + "\n".join(missing_weights))
+            return
 
-            # Получение даты и времени
-            order_date = self.orderDateEdit.date().toString("yyyy-MM-dd")
-            order_time = self.orderTimeEdit.time().toString("hh:mm")
+        # Получение даты и времени
+        order_date = self.orderDateEdit.date().toString("yyyy-MM-dd")
+        order_time = self.orderTimeEdit.time().toString("hh:mm")
 
-            # Тип доставки
-            delivery_type = self.deliveryCombo.currentText()
+        # Тип доставки
+        delivery_type = self.deliveryCombo.currentText()
 
-            # Путь к фото
-            photo_path = self.photoPathEdit.text()
+        # Путь к фото
+        photo_path = self.photoPathEdit.text()
 
-            # Добавление заказа в БД
-            self.db.add_order(
-                client_id, dessert_types, order_date,
-                order_time, delivery_type, photo_path
-            )
+        # Добавление заказа в БД (кнопка блокируется до ответа)
+        self.addOrderBtn.setEnabled(False)
 
+        def done(_):
+            self.addOrderBtn.setEnabled(True)
             QMessageBox.information(self, "Успех", "Заказ успешно добавлен!")
             self.load_orders()
             self.clear_order_form()
 
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Не удалось добавить заказ: {str(e)}")
+        def failed(message):
+            self.addOrderBtn.setEnabled(True)
+            QMessageBox.critical(self, "Ошибка", f"Не удалось добавить заказ: {message}")
+
+        self.dbw.call(
+            'add_order', client_id, selected_desserts, order_date,
+            order_time, delivery_type, photo_path,
+            on_result=done, on_error=failed
+        )
 
     def delete_order(self):
         """Удаление выбранного заказа"""
-        current_row = self.ordersTable.currentRow()
-        if current_row == -1:
+        order_id = self.orders_model.order_id(self.ordersTable.currentIndex().row())
+        if order_id is None:
             QMessageBox.warning(self, "Ошибка", "Выберите заказ для удаления!")
             return
 
-        order_id = int(self.ordersTable.item(current_row, 0).text())
-
         reply = QMessageBox.question(
             self, "Подтверждение",
             "Вы уверены, что хотите удалить этот заказ?",
@@ -505,80 +1048,68 @@ class ConfectioneryApp(QMainWindow):
         )
 
         if reply == QMessageBox.Yes:
-            self.db.delete_order(order_id)
-            QMessageBox.information(self, "Успех", "Заказ удален!")
-            self.load_orders()
+            self.db_write('delete_order', order_id,
+                          success_text="Заказ удален!",
+                          error_text="Не удалось удалить заказ",
+                          on_done=lambda _: self.load_orders())
 
-    def show_order_details(self, item):
+    def show_order_details(self, index):
         """Показать детали заказа в диалоге"""
-        row = item.row()
-        order_data = [
-            self.ordersTable.item(row, col).text()
-            for col in range(self.ordersTable.columnCount())
-        ]
+        order_id = self.orders_model.order_id(index.row())
+        if order_id is None:
+            return
 
         # Получение полных данных заказа из БД
-        orders = self.db.get_all_orders()
-        full_order_data = next((o for o in orders if str(o[0]) == order_data[0]), None)
-
-        if full_order_data:
-            dialog = OrderDetailsDialog(full_order_data, self)
-            dialog.exec_()
+        self.dbw.call('get_order', order_id, on_result=self.open_order_details)
 
     def add_client(self):
         """Добавление нового клиента"""
-        try:
-            full_name = self.clientNameEdit.text().strip()
-            phone = self.clientPhoneEdit.text().strip()
-            birth_date = self.clientBirthEdit.date().toString("yyyy-MM-dd")
-            email = self.clientEmailEdit.text().strip()
+        full_name = self.clientNameEdit.text().strip()
+        phone = self.clientPhoneEdit.text().strip()
+        birth_date = self.clientBirthEdit.date().toString("yyyy-MM-dd")
+        email = self.clientEmailEdit.text().strip()
 
-            if not full_name or not phone:
-                QMessageBox.warning(self, "Ошибка", "Заполните обязательные поля (ФИО и телефон)!")
-                return
+        if not full_name or not phone:
+            QMessageBox.warning(self, "Ошибка", "Заполните обязательные поля (ФИО и телефон)!")
+            return
 
-            self.db.add_client(full_name, phone, birth_date, email)
-            QMessageBox.information(self, "Успех", "Клиент успешно добавлен!")
+        def done(_):
             self.load_clients()
             self.clear_client_form()
 
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Не удалось добавить клиента: {str(e)}")
+        self.db_write('add_client', full_name, phone, birth_date, email,
+                      success_text="Клиент успешно добавлен!",
+                      error_text="Не удалось добавить клиента",
+                      on_done=done)
 
     def update_client(self):
         """Обновление данных клиента"""
-        current_row = self.clientsTable.currentRow()
-        if current_row == -1:
+        client_id = self.clients_model.row_id(self.clientsTable.currentIndex().row())
+        if client_id is None:
             QMessageBox.warning(self, "Ошибка", "Выберите клиента для обновления!")
             return
 
-        try:
-            client_id = int(self.clientsTable.item(current_row, 0).text())
-            full_name = self.clientNameEdit.text().strip()
-            phone = self.clientPhoneEdit.text().strip()
-            birth_date = self.clientBirthEdit.date().toString("yyyy-MM-dd")
-            email = self.clientEmailEdit.text().strip()
-
-            if not full_name or not phone:
-                QMessageBox.warning(self, "Ошибка", "Заполните обязательные поля (ФИО и телефон)!")
-                return
+        full_name = self.clientNameEdit.text().strip()
+        phone = self.clientPhoneEdit.text().strip()
+        birth_date = self.clientBirthEdit.date().toString("yyyy-MM-dd")
+        email = self.clientEmailEdit.text().strip()
 
-            self.db.update_client(client_id, full_name, phone, birth_date, email)
-            QMessageBox.information(self, "Успех", "Данные клиента обновлены!")
-            self.load_clients()
+        if not full_name or not phone:
+            QMessageBox.warning(self, "Ошибка", "Заполните обязательные поля (ФИО и телефон)!")
+            return
 
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Не удалось обновить клиента: {str(e)}")
+        self.db_write('update_client', client_id, full_name, phone, birth_date, email,
+                      success_text="Данные клиента обновлены!",
+                      error_text="Не удалось обновить клиента",
+                      on_done=lambda _: self.load_clients())
 
     def delete_client(self):
         """Удаление клиента"""
-        current_row = self.clientsTable.currentRow()
-        if current_row == -1:
+        client_id = self.clients_model.row_id(self.clientsTable.currentIndex().row())
+        if client_id is None:
             QMessageBox.warning(self, "Ошибка", "Выберите клиента для удаления!")
             return
 
-        client_id = int(self.clientsTable.item(current_row, 0).text())
-
         reply = QMessageBox.question(
             self, "Подтверждение",
             "Вы уверены, что хотите удалить этого клиента?",
@@ -586,18 +1117,21 @@ class ConfectioneryApp(QMainWindow):
         )
 
         if reply == QMessageBox.Yes:
-            self.db.delete_client(client_id)
-            QMessageBox.information(self, "Успех", "Клиент удален!")
-            self.load_clients()
-            self.clear_client_form()
+            def done(_):
+                self.load_clients()
+                self.clear_client_form()
+
+            self.db_write('delete_client', client_id,
+                          success_text="Клиент удален!",
+                          error_text="Не удалось удалить клиента",
+                          on_done=done)
 
-    def client_table_clicked(self, item):
+    def client_table_clicked(self, index):
         """Заполнение формы данными выбранного клиента"""
-        row = item.row()
-        client_data = [
-            self.clientsTable.item(row, col).text()
-            for col in range(self.clientsTable.columnCount())
-        ]
+        record = self.clients_model.record(index.row())
+        if record is None:
+            return
+        client_data = [str(value) for value in record]
 
         self.clientNameEdit.setText(client_data[1])
         self.clientPhoneEdit.setText(client_data[2])
@@ -618,33 +1152,33 @@ class ConfectioneryApp(QMainWindow):
 
     def add_dessert(self):
         """Добавление нового десерта"""
-        try:
-            name = self.dessertNameEdit.text().strip()
-            price_per_kg = self.dessertPriceKgEdit.value()
-            price_per_unit = self.dessertPriceUnitEdit.value()
-            composition = self.dessertCompositionEdit.toPlainText().strip()
+        name = self.dessertNameEdit.text().strip()
+        price_per_kg = self.dessertPriceKgEdit.value()
+        price_per_unit = self.dessertPriceUnitEdit.value()
+        composition = self.dessertCompositionEdit.toPlainText().strip()
 
-            if not name:
-                QMessageBox.warning(self, "Ошибка", "Введите название десерта!")
-                return
+        if not name:
+            QMessageBox.warning(self, "Ошибка", "Введите название десерта!")
+            return
 
-            # Если обе цены 0, предупредить пользователя
-            if price_per_kg == 0 and price_per_unit == 0:
-                reply = QMessageBox.question(
-                    self, "Подтверждение",
-                    "Обе цены установлены в 0. Продолжить?",
-                    QMessageBox.Yes | QMessageBox.No
-                )
-                if reply == QMessageBox.No:
-                    return
+        # Если обе цены 0, предупредить пользователя
+        if price_per_kg == 0 and price_per_unit == 0:
+            reply = QMessageBox.question(
+                self, "Подтверждение",
+                "Обе цены установлены в 0. Продолжить?",
+                QMessageBox.Yes | QMessageBox.No
+            )
+            if reply == QMessageBox.No:
+                return
 
-            self.db.add_dessert(name, price_per_kg, price_per_unit, composition)
-            QMessageBox.information(self, "Успех", "Десерт успешно добавлен!")
+        def done(_):
             self.load_desserts()
             self.clear_dessert_form()
 
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Не удалось добавить десерт: {str(e)}")
+        self.db_write('add_dessert', name, price_per_kg, price_per_unit, composition,
+                      success_text="Десерт успешно добавлен!",
+                      error_text="Не удалось добавить десерт",
+                      on_done=done)
 
     def update_dessert(self):
         """Обновление данных десерта"""
@@ -653,23 +1187,20 @@ class ConfectioneryApp(QMainWindow):
             QMessageBox.warning(self, "Ошибка", "Выберите десерт для обновления!")
             return
 
-        try:
-            dessert_id = int(self.dessertsTable.item(current_row, 0).text())
-            name = self.dessertNameEdit.text().strip()
-            price_per_kg = self.dessertPriceKgEdit.value()
-            price_per_unit = self.dessertPriceUnitEdit.value()
-            composition = self.dessertCompositionEdit.toPlainText().strip()
-
-            if not name:
-                QMessageBox.warning(self, "Ошибка", "Введите название десерта!")
-                return
+        dessert_id = int(self.dessertsTable.item(current_row, 0).text())
+        name = self.dessertNameEdit.text().strip()
+        price_per_kg = self.dessertPriceKgEdit.value()
+        price_per_unit = self.dessertPriceUnitEdit.value()
+        composition = self.dessertCompositionEdit.toPlainText().strip()
 
-            self.db.update_dessert(dessert_id, name, price_per_kg, price_per_unit, composition)
-            QMessageBox.information(self, "Успех", "Данные десерта обновлены!")
-            self.load_desserts()
+        if not name:
+            QMessageBox.warning(self, "Ошибка", "Введите название десерта!")
+            return
 
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Не удалось обновить десерт: {str(e)}")
+        self.db_write('update_dessert', dessert_id, name, price_per_kg, price_per_unit, composition,
+                      success_text="Данные десерта обновлены!",
+                      error_text="Не удалось обновить десерт",
+                      on_done=lambda _: self.load_desserts())
 
     def delete_dessert(self):
         """Удаление десерта"""
@@ -687,10 +1218,14 @@ class ConfectioneryApp(QMainWindow):
         )
 
         if reply == QMessageBox.Yes:
-            self.db.delete_dessert(dessert_id)
-            QMessageBox.information(self, "Успех", "Десерт удален!")
-            self.load_desserts()
-            self.clear_dessert_form()
+            def done(_):
+                self.load_desserts()
+                self.clear_dessert_form()
+
+            self.db_write('delete_dessert', dessert_id,
+                          success_text="Десерт удален!",
+                          error_text="Не удалось удалить десерт",
+                          on_done=done)
 
     def dessert_table_clicked(self, item):
         """Заполнение формы данными выбранного десерта"""
@@ -719,15 +1254,100 @@ class ConfectioneryApp(QMainWindow):
 
     def clear_order_form(self):
         """Очистка формы заказа"""
-        for checkbox in self.dessert_checkboxes:
-            checkbox.setChecked(False)
+        self.dessert_picker_model.clear_selection()
+        self.dessertFilterEdit.clear()
         self.orderDateEdit.setDate(QDate.currentDate())
         self.orderTimeEdit.setTime(QTime.currentTime())
         self.deliveryCombo.setCurrentIndex(0)
         self.photoPathEdit.clear()
+        self.cancel_preview_loading()
         self.photoPreview.clear()
         self.photoPreview.setText("Превью фото")
 
+    def export_data(self, kind):
+        """Выгрузка таблицы в файл в фоновом потоке"""
+        if getattr(self, 'export_worker', None) and self.export_worker.isRunning():
+            QMessageBox.warning(self, "Ошибка", "Экспорт уже выполняется!")
+            return
+
+        file_name, _ = QFileDialog.getSaveFileName(
+            self, "Экспорт данных", f"{kind}.csv",
+            "CSV (*.csv);;CSV gzip (*.csv.gz);;JSONL (*.jsonl);;JSONL gzip (*.jsonl.gz)"
+        )
+        if not file_name:
+            return
+
+        self.export_worker = ExportWorker(self.db, kind, file_name, self)
+        self.export_worker.progress.connect(
+            lambda count: self.statusbar.showMessage(f"Экспорт: {count} строк...")
+        )
+        self.export_worker.finished_ok.connect(
+            lambda count: self.statusbar.showMessage(f"Экспорт завершен: {count} строк", 5000)
+        )
+        self.export_worker.failed.connect(
+            lambda error: QMessageBox.critical(self, "Ошибка", f"Не удалось выполнить экспорт: {error}")
+        )
+        self.export_worker.start()
+
+    def on_tab_changed(self, index):
+        """Загрузка вкладки при первом открытии; отчет обновляется при каждом переходе"""
+        tab = self.tabWidget.widget(index)
+        if tab is self.reportsTab:
+            self.load_report()
+        elif tab in self.tab_loaders and tab not in self.loaded_tabs:
+            self.loaded_tabs.add(tab)
+            self.tab_loaders[tab]()
+
+    def load_report(self):
+        """Загрузка отчета о продажах за выбранный период из сводных таблиц"""
+        date_from = self.reportFromEdit.date().toString("yyyy-MM-dd")
+        date_to = self.reportToEdit.date().toString("yyyy-MM-dd")
+
+        self.request_rows(self.salesByDayTable, 'get_sales_by_day', date_from, date_to,
+                          on_rows=lambda rows: self.fill_report_table(self.salesByDayTable, rows))
+        self.request_rows(self.salesByDessertTable, 'get_sales_by_dessert', date_from, date_to,
+                          on_rows=lambda rows: self.fill_report_table(
+                              self.salesByDessertTable, [row[1:] for row in rows]))
+        self.dbw.call('get_sales_totals', date_from, date_to, on_result=self.show_report_totals)
+
+    def recompute_totals(self):
+        """Пересчет сумм заказов за период отчета по текущим ценам"""
+        date_from = self.reportFromEdit.date().toString("yyyy-MM-dd")
+        date_to = self.reportToEdit.date().toString("yyyy-MM-dd")
+
+        reply = QMessageBox.question(
+            self, "Подтверждение",
+            f"Пересчитать суммы заказов с {date_from} по {date_to} по текущим ценам?",
+            QMessageBox.Yes | QMessageBox.No
+        )
+        if reply != QMessageBox.Yes:
+            return
+
+        def done(count):
+            self.recomputeTotalsBtn.setEnabled(True)
+            self.statusbar.showMessage(f"Пересчитано заказов: {count}", 5000)
+            self.load_report()
+
+        def failed(message):
+            self.recomputeTotalsBtn.setEnabled(True)
+            QMessageBox.critical(self, "Ошибка", f"Не удалось пересчитать суммы: {message}")
+
+        self.recomputeTotalsBtn.setEnabled(False)
+        self.dbw.call('recompute_order_totals', date_from, date_to,
+                      on_result=done, on_error=failed)
+
+    def fill_report_table(self, table, rows):
+        """Вывод строк отчета с выручкой в рублях"""
+        self.fill_table(table, [row[:-1] + (f"{row[-1]:.2f} руб",) for row in rows])
+        table.resizeColumnsToContents()
+
+    def show_report_totals(self, totals):
+        """Итоги отчета за период"""
+        orders, items, revenue = totals
+        self.reportTotalsLabel.setText(
+            f"Итого: заказов {orders}, единиц {items}, выручка {revenue:.2f} руб"
+        )
+
     def show_about(self):
         """Показать информацию о программе"""
         QMessageBox.about(self, "О программе",
@@ -755,6 +1375,24 @@ class ConfectioneryApp(QMainWindow):
         else:
             super().keyPressEvent(event)
 
+    def closeEvent(self, event):
+        """Остановка фонового потока и закрытие подключений к базе данных при выходе"""
+        self.change_timer.stop()
+        self.prune_timer.stop()
+        self.dbw.shutdown()
+        self.image_loader.shutdown()
+        # Статистика кэшей и запросов выводится только в режиме --trace-queries
+        if self.db.tracer is not None:
+            for table, stats in self.db.get_cache_stats().items():
+                print(f"📊 Кэш {table}: попаданий {stats['hits']}, промахов {stats['misses']}")
+            stats = self.thumbnails.stats()
+            print(f"📊 Миниатюры: из памяти {stats['memory_hits']}, с диска {stats['disk_hits']}, "
+                  f"промахов {stats['misses']}")
+            for line in self.db.tracer.summary():
+                print(f"📊 Запросы {line}")
+        self.db.close()
+        super().closeEvent(event)
+
     def mousePressEvent(self, event):
         """Обработка кликов мыши"""
         if event.button() == Qt.RightButton:
@@ -779,15 +1417,214 @@ class ConfectioneryApp(QMainWindow):
             elif action == exit_action:
                 self.close()
 
+    def on_data_version(self, data_version):
+        """Запрос изменений, если другое подключение что-то записало"""
+        if data_version == self.data_version:
+            self.change_check_pending = False
+            return
+        self.data_version = data_version
+        self.dbw.call('fetch_changes', self.last_change_id, MAX_INCREMENTAL_CHANGES,
+                      on_result=self.on_changes_fetched, on_error=self.on_change_check_failed)
+
+    def on_change_check_failed(self, message):
+        """Ошибка проверки изменений (например, база временно заблокирована)"""
+        self.change_check_pending = False
+        print(f"⚠️ Не удалось проверить изменения: {message}")
+
+    def on_changes_fetched(self, result):
+        """Применение изменившихся строк к открытым таблицам"""
+        self.change_check_pending = False
+        if result is None:
+            self.load_data()
+            return
 
-def main():
+        self.last_change_id, changes = result
+        if changes['clients']:
+            self.apply_client_changes(changes['clients'])
+        if changes['desserts']:
+            self.apply_dessert_changes(changes['desserts'])
+        if changes['orders']:
+            self.apply_order_changes(changes['orders'])
+
+    def request_rows(self, table, method, *args, on_rows):
+        """Асинхронный запрос строк для таблицы с индикацией загрузки"""
+        self.set_table_loading(table, True)
+
+        def deliver(rows):
+            if self.table_requests.get(table) != request_id:
+                return
+            del self.table_requests[table]
+            self.set_table_loading(table, False)
+            on_rows(rows)
+
+        def fail(message):
+            if self.table_requests.get(table) == request_id:
+                del self.table_requests[table]
+                self.set_table_loading(table, False)
+            self.statusbar.showMessage(f"Ошибка загрузки данных: {message}", 5000)
+
+        request_id = self.dbw.call(method, *args, on_result=deliver, on_error=fail)
+        self.table_requests[table] = request_id
+
+    def set_table_loading(self, table, loading):
+        """Состояние загрузки таблицы: заглушка в пустой таблице и блокировка ввода"""
+        model = table.model()
+        if isinstance(model, PagedTableModel):
+            # Заглушку показывает сама модель
+            model.set_loading(loading)
+            if loading and not model.rows:
+                table.setSpan(0, 0, 1, model.columnCount())
+            else:
+                table.clearSpans()
+            table.setEnabled(not loading)
+            return
+
+        placeholder = getattr(table, 'loading_placeholder', False)
+        if loading:
+            if table.rowCount() == 0 and not placeholder:
+                table.setRowCount(1)
+                table.setSpan(0, 0, 1, table.columnCount())
+                item = QtWidgets.QTableWidgetItem("Загрузка...")
+                item.setTextAlignment(Qt.AlignCenter)
+                table.setItem(0, 0, item)
+                table.loading_placeholder = True
+            table.setEnabled(False)
+        else:
+            if placeholder:
+                table.clearSpans()
+                table.setRowCount(0)
+                table.loading_placeholder = False
+            table.setEnabled(True)
+
+    def db_write(self, method, *args, success_text, error_text, on_done=None):
+        """Асинхронная запись в БД с сообщением о результате"""
+        def done(result):
+            QMessageBox.information(self, "Успех", success_text)
+            if on_done:
+                on_done(result)
+
+        def failed(message):
+            QMessageBox.critical(self, "Ошибка", f"{error_text}: {message}")
+
+        self.dbw.call(method, *args, on_result=done, on_error=failed)
+
+    def edit_dessert(self, dessert_id, dessert_data):
+        """Редактирование загруженного десерта в диалоге"""
+        if not dessert_data:
+            QMessageBox.warning(self, "Ошибка", "Десерт не найден!")
+            return
+
+        dialog = self.get_dialog(DessertDialog)
+        dialog.set_dessert_data(dessert_data)
+        if dialog.exec_() == QDialog.Accepted:
+            data = dialog.get_dessert_data()
+            if data:
+                self.db_write('update_dessert', dessert_id, *data,
+                              success_text="Десерт успешно обновлен!",
+                              error_text="Не удалось обновить десерт",
+                              on_done=lambda _: self.load_desserts())
+
+    def on_clients_found(self, clients):
+        """Вывод результатов поиска клиентов"""
+        self.clients_model.set_rows(clients)
+        self.clients_model.fit_columns(self.clientsTable)
+
+    def on_clients_page_loaded(self, page):
+        """Вывод первой страницы клиентов"""
+        clients, next_cursor = page
+        with self.profiler.measure("Таблица клиентов"):
+            self.clients_model.set_rows(clients, next_cursor)
+            # Ширина колонок - по первой странице, а не по всем загруженным строкам
+            self.clients_model.fit_columns(self.clientsTable)
+
+    def on_desserts_loaded(self, desserts):
+        """Заполнение списка выбора и таблицы загруженными десертами"""
+        # Отметки выбранных десертов сохраняются при перезагрузке
+        with self.profiler.measure("Список выбора десертов"):
+            self.dessert_picker_model.set_desserts(desserts)
+
+        # Таблица заполняется, только если вкладка десертов уже открывалась
+        if self.dessertsTab in self.loaded_tabs:
+            self.fill_desserts_table(desserts)
+
+    def fill_desserts_table_rows(self, desserts):
+        """Вывод строк десертов в таблицу"""
+        with self.profiler.measure("Таблица десертов"):
+            self.fill_table(self.dessertsTable, desserts)
+            self.dessertsTable.resizeColumnsToContents()
+
+    def on_orders_found(self, orders):
+        """Вывод результатов поиска заказов"""
+        self.orders_model.set_rows(orders)
+        self.orders_model.fit_columns(self.ordersTable)
+
+    def on_orders_page_loaded(self, page):
+        """Вывод первой страницы заказов"""
+        orders, next_cursor = page
+        with self.profiler.measure("Таблица заказов (первая страница)"):
+            self.orders_model.set_rows(orders, next_cursor)
+            # Ширина колонок - по первой странице, а не по всем загруженным строкам
+            self.orders_model.fit_columns(self.ordersTable)
+
+    def open_order_details(self, full_order_data):
+        """Открытие диалога с загруженными данными заказа"""
+        if full_order_data:
+            dialog = self.get_dialog(OrderDetailsDialog, media=self.db.media,
+                                     image_loader=self.image_loader)
+            dialog.set_order_data(full_order_data)
+            dialog.exec_()
+
+    def get_dialog(self, dialog_class, **kwargs):
+        """Экземпляр диалога из пула: форма строится только при первом открытии
+
+        Если диалог этого класса уже открыт, создается отдельный экземпляр.
+        """
+        dialog = self.dialogs.get(dialog_class)
+        if dialog is None:
+            dialog = self.dialogs[dialog_class] = dialog_class(parent=self, **kwargs)
+        elif dialog.isVisible():
+            dialog = dialog_class(parent=self, **kwargs)
+            dialog.setAttribute(Qt.WA_DeleteOnClose)
+        return dialog
+
+
+def main(argv=None):
     """Главная функция приложения"""
-    app = QApplication(sys.argv)
+    parser = argparse.ArgumentParser(description="Кондитерская Sweet Dreams")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="вывести время каждой фазы запуска")
+    parser.add_argument('--trace-queries', action='store_true',
+                        help="замерять запросы к БД (окно диагностики - Ctrl+Shift+D)")
+    parser.add_argument('--slow-query-ms', type=float, default=SLOW_QUERY_MS,
+                        help="порог медленного вызова для журнала, мс")
+    parser.add_argument('--slow-query-log',
+                        help=f"журнал медленных вызовов с ротацией (по умолчанию - "
+                             f"{SLOW_LOG_NAME} в папке данных)")
+    # Остальные аргументы передаются Qt
+    args, qt_args = parser.parse_known_args(sys.argv[1:] if argv is None else argv)
+
+    profiler = StartupProfiler(STARTUP_STARTED, enabled=args.profile_startup)
+    profiler.mark("Импорт модулей")
+
+    app = QApplication(sys.argv[:1] + qt_args)
     app.setApplicationName("Кондитерская Sweet Dreams")
     app.setApplicationVersion("1.0")
+    profiler.mark("Создание QApplication")
+
+    # Данные хранятся вне папки сборки, которую пересборка очищает
+    data_dir = get_data_dir()
+    if getattr(sys, 'frozen', False):
+        carry_over_legacy_data(data_dir)
+    os.makedirs(data_dir, exist_ok=True)
 
     # Создание и отображение главного окна
-    window = ConfectioneryApp()
+    tracer = None
+    if args.trace_queries:
+        slow_log = args.slow_query_log or os.path.join(data_dir, SLOW_LOG_NAME)
+        tracer = QueryTracer(args.slow_query_ms, slow_log)
+        print(f"🔍 Трассировка запросов: медленные (≥ {args.slow_query_ms:g} мс) - "
+              f"в {slow_log}")
+    window = ConfectioneryApp(profiler, tracer, os.path.join(data_dir, DB_FILE_NAME))
     window.show()
 
     sys.exit(app.exec_())
@@ -0,0 +1,199 @@
+import argparse
+import hashlib
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+
+# Размер блока при чтении и копировании файлов
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# Файлы моложе этого возраста сборщик мусора не удаляет: фото могло быть
+# только что добавлено в хранилище, а заказ с ним еще не записан в БД
+GC_GRACE_SECONDS = 3600
+
+# Сколько исходных путей помнить, чтобы не хешировать повторно выбранный файл
+KNOWN_FILES_LIMIT = 1000
+
+# Префикс временных файлов при копировании в хранилище
+INCOMING_PREFIX = '.incoming-'
+
+# Ключ фото: SHA-256 содержимого и расширение исходного файла
+KEY_PATTERN = re.compile(r'^[0-9a-f]{64}(\.[0-9a-z]{1,8})?$')
+
+
+def _file_digest(path):
+    """SHA-256 содержимого файла"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(COPY_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class MediaStore:
+    """Хранилище фото заказов с адресацией по содержимому
+
+    Каждый файл хранится один раз под ключом "<sha256><расширение>"
+    в подкаталоге по первым двум символам хеша, поэтому поиск не зависит
+    от числа фото. Заказы хранят ключ вместо пути к файлу пользователя.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+        # (путь, размер, время изменения) -> ключ уже добавленного файла
+        self._known_files = {}
+        self.added = 0
+        self.deduplicated = 0
+
+    @staticmethod
+    def is_key(value):
+        """Является ли значение ключом хранилища (а не путем к файлу)"""
+        return bool(value) and KEY_PATTERN.match(value) is not None
+
+    def path(self, key):
+        """Путь к файлу в хранилище по ключу"""
+        return os.path.join(self.root, key[:2], key)
+
+    def resolve(self, photo):
+        """Путь к существующему файлу фото по ключу или старому пути, иначе None"""
+        if not photo:
+            return None
+        path = self.path(photo) if self.is_key(photo) else photo
+        return path if os.path.isfile(path) else None
+
+    def add(self, source_path):
+        """Добавление файла в хранилище, возвращает ключ
+
+        Повторно добавленное содержимое не копируется: возвращается ключ
+        уже сохраненного файла.
+        """
+        stat = os.stat(source_path)
+        ext = os.path.splitext(source_path)[1].lower()
+        if not re.match(r'^\.[0-9a-z]{1,8}$', ext):
+            ext = ''
+
+        signature = (os.path.abspath(source_path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            key = self._known_files.get(signature)
+        if key is None:
+            key = _file_digest(source_path) + ext
+
+        target = self.path(key)
+        if os.path.exists(target):
+            # Обновление времени защищает файл от сборщика мусора до записи заказа
+            os.utime(target)
+            self.deduplicated += 1
+        else:
+            key = self._copy(source_path, ext)
+            self.added += 1
+
+        with self._lock:
+            if len(self._known_files) >= KNOWN_FILES_LIMIT:
+                self._known_files.clear()
+            self._known_files[signature] = key
+        return key
+
+    def _copy(self, source_path, ext):
+        """Копирование файла во временный файл с хешированием и перенос на место"""
+        os.makedirs(self.root, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix=INCOMING_PREFIX, dir=self.root)
+        try:
+            digest = hashlib.sha256()
+            with open(source_path, 'rb') as source, os.fdopen(fd, 'wb') as target:
+                for chunk in iter(lambda: source.read(COPY_CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    target.write(chunk)
+            # Ключ считается по скопированным данным: файл мог измениться после хеширования
+            key = digest.hexdigest() + ext
+            os.makedirs(os.path.dirname(self.path(key)), exist_ok=True)
+            os.replace(temp_path, self.path(key))
+            return key
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def _files(self):
+        """Все файлы хранилища: (имя, полный путь)"""
+        if not os.path.isdir(self.root):
+            return
+        for entry in os.scandir(self.root):
+            if entry.is_dir():
+                for file in os.scandir(entry.path):
+                    if file.is_file():
+                        yield file.name, file.path
+            elif entry.is_file():
+                yield entry.name, entry.path
+
+    def collect_garbage(self, referenced, grace_seconds=GC_GRACE_SECONDS):
+        """Удаление файлов, на которые не ссылается ни один заказ
+
+        referenced - множество используемых ключей. Возвращает
+        (количество удаленных файлов, освобождено байт).
+        """
+        deadline = time.time() - grace_seconds
+        removed = 0
+        freed = 0
+        for name, path in self._files():
+            if name in referenced:
+                continue
+            if not (self.is_key(name) or name.startswith(INCOMING_PREFIX)):
+                continue
+            try:
+                stat = os.stat(path)
+                if stat.st_mtime > deadline:
+                    continue
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            removed += 1
+            freed += stat.st_size
+
+        with self._lock:
+            self._known_files.clear()
+        return removed, freed
+
+    def stats(self):
+        """Количество файлов и их общий размер в байтах"""
+        count = 0
+        size = 0
+        for name, path in self._files():
+            if self.is_key(name):
+                count += 1
+                size += os.path.getsize(path)
+        return count, size
+
+
+def main(argv=None):
+    """Точка входа командной строки для обслуживания хранилища фото"""
+    from database import DatabaseManager
+
+    parser = argparse.ArgumentParser(description="Обслуживание хранилища фото заказов")
+    parser.add_argument('--db', default='confectionery.db', help="файл базы данных")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    gc = commands.add_parser('gc', help="удалить фото, не используемые в заказах")
+    gc.add_argument('--grace', type=int, default=GC_GRACE_SECONDS,
+                    help="не удалять файлы моложе указанного числа секунд")
+    commands.add_parser('stats', help="показать размер хранилища")
+    args = parser.parse_args(argv)
+
+    db = DatabaseManager(args.db)
+    try:
+        if args.command == 'gc':
+            removed, freed = db.collect_unused_photos(args.grace)
+            print(f"✅ Удалено фото: {removed}, освобождено {freed / 1024 / 1024:.1f} МБ")
+        else:
+            count, size = db.media.stats()
+            print(f"📷 Фото в хранилище {db.media.root}: {count}, {size / 1024 / 1024:.1f} МБ")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+from bisect import bisect_right
+
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+# Заголовки колонок таблицы заказов (поля строки get_orders_page по порядку)
+ORDER_COLUMNS = ["ID", "Клиент", "Телефон", "Десерты", "Дата", "Время", "Тип"]
+
+# Сколько строк учитывать при подборе ширины колонок
+COLUMN_WIDTH_SAMPLE = 50
+
+# Предельная ширина колонки при подборе по образцу, пикселей
+MAX_COLUMN_WIDTH = 400
+
+
+def order_sort_key(record):
+    """Ключ сортировки заказа: (дата, время, ID); таблица упорядочена по убыванию"""
+    return str(record[4]), str(record[5]), int(record[0])
+
+
+class PagedTableModel(QAbstractTableModel):
+    """Модель таблицы с постраничной догрузкой
+
+    Хранит только загруженные страницы. Когда представление доходит
+    до конца списка, fetchMore() вызывает fetch_more - асинхронный
+    запрос следующей страницы, результат которого добавляется через
+    append_page(). Подклассы задают колонки (columns), ключ сортировки
+    строки (sort_key) и направление сортировки (descending).
+    """
+
+    columns = []
+    descending = False
+
+    def __init__(self, fetch_more, parent=None):
+        super().__init__(parent)
+        self.fetch_more = fetch_more
+        self.rows = []
+        # Ключи сортировки загруженных строк в порядке возрастания
+        self._keys = []
+        self.next_cursor = None
+        self.fetching = False
+        self.loading = False
+
+    @staticmethod
+    def sort_key(record):
+        raise NotImplementedError
+
+    def _page_keys(self, rows):
+        """Ключи сортировки строк страницы в порядке возрастания"""
+        keys = [self.sort_key(row) for row in rows]
+        if self.descending:
+            keys.reverse()
+        return keys
+
+    @property
+    def has_more(self):
+        """Есть ли в БД строки после загруженных страниц"""
+        return self.next_cursor is not None
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        # Пока идет первая загрузка, показывается строка-заглушка
+        return 1 if self.loading and not self.rows else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if not self.rows:
+            if role == Qt.DisplayRole and index.column() == 0:
+                return "Загрузка..."
+            if role == Qt.TextAlignmentRole:
+                return Qt.AlignCenter
+            return None
+        if role in (Qt.DisplayRole, Qt.ToolTipRole):
+            return str(self.rows[index.row()][index.column()])
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.columns[section]
+        return section + 1
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.has_more and not self.fetching
+
+    def fetchMore(self, parent=QModelIndex()):
+        if self.canFetchMore(parent):
+            self.fetching = True
+            self.fetch_more(self.next_cursor)
+
+    def record(self, row):
+        """Строка из БД в строке таблицы или None"""
+        if 0 <= row < len(self.rows):
+            return self.rows[row]
+        return None
+
+    def row_id(self, row):
+        """ID записи в строке таблицы (первая колонка) или None"""
+        record = self.record(row)
+        return int(record[0]) if record is not None else None
+
+    def find_row(self, row_id):
+        """Номер строки с записью по ID или None, если она не загружена"""
+        for row, current in enumerate(self.rows):
+            if int(current[0]) == row_id:
+                return row
+        return None
+
+    def set_loading(self, loading):
+        """Состояние загрузки: заглушка в пустой таблице"""
+        if loading == self.loading:
+            return
+        if self.rows:
+            self.loading = loading
+            return
+        self.beginResetModel()
+        self.loading = loading
+        self.endResetModel()
+
+    def set_rows(self, rows, next_cursor=None):
+        """Замена всех строк (первая страница или результаты поиска)"""
+        self.beginResetModel()
+        self.rows = list(rows)
+        self._keys = self._page_keys(self.rows)
+        self.next_cursor = next_cursor
+        self.fetching = False
+        self.endResetModel()
+
+    def append_page(self, rows, next_cursor):
+        """Добавление следующей страницы в конец таблицы"""
+        self.fetching = False
+        self.next_cursor = next_cursor
+        if not rows:
+            return
+        start = len(self.rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(rows) - 1)
+        self.rows.extend(rows)
+        if self.descending:
+            self._keys[:0] = self._page_keys(rows)
+        else:
+            self._keys.extend(self._page_keys(rows))
+        self.endInsertRows()
+
+    def cancel_fetch(self):
+        """Сброс признака догрузки после ошибки запроса"""
+        self.fetching = False
+
+    def apply_change(self, row_id, record):
+        """Удаление, замена или вставка записи с сохранением сортировки
+
+        record - строка из БД или None для удаленной. Запись, которая
+        оказалась бы после загруженных страниц, придет при прокрутке.
+        """
+        if self.loading and not self.rows:
+            # Изменение войдет в загружаемую первую страницу
+            return
+
+        row = self.find_row(row_id)
+        if row is not None:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self.rows[row]
+            del self._keys[len(self.rows) - row if self.descending else row]
+            self.endRemoveRows()
+
+        if record is None:
+            return
+
+        key = self.sort_key(record)
+        key_position = bisect_right(self._keys, key)
+        row = len(self.rows) - key_position if self.descending else key_position
+        if self.has_more and row == len(self.rows):
+            return
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.rows.insert(row, record)
+        self._keys.insert(key_position, key)
+        self.endInsertRows()
+
+    def fit_columns(self, view):
+        """Ширина колонок по заголовкам и первым строкам, без обхода всей таблицы"""
+        metrics = view.fontMetrics()
+        header = view.horizontalHeader()
+        padding = 2 * view.style().pixelMetric(view.style().PM_FocusFrameHMargin) + 16
+        sample = self.rows[:COLUMN_WIDTH_SAMPLE]
+        for column, title in enumerate(self.columns):
+            width = max(
+                [header.fontMetrics().horizontalAdvance(title)] +
+                [metrics.horizontalAdvance(str(row[column])) for row in sample]
+            )
+            view.setColumnWidth(column, min(width + padding, MAX_COLUMN_WIDTH))
+
+
+class OrdersTableModel(PagedTableModel):
+    """Модель таблицы заказов: от новых к старым, страницы get_orders_page"""
+
+    columns = ORDER_COLUMNS
+    descending = True
+    sort_key = staticmethod(order_sort_key)
+
+    def order_id(self, row):
+        """ID заказа в строке таблицы или None"""
+        return self.row_id(row)
@@ -0,0 +1,102 @@
+import sqlite3
+
+# Способы расчета позиции заказа
+PRICE_TYPE_KG = 'kg'      # по весу: цена за кг * вес
+PRICE_TYPE_UNIT = 'unit'  # поштучно: цена за штуку * количество
+
+
+def _pricing_expressions(item, dessert):
+    """SQL-выражения (способ расчета, цена, сумма позиции) для позиции и десерта
+
+    item и dessert - SQL-выражения/псевдонимы, дающие доступ к колонкам
+    quantity, weight и price_per_kg, price_per_unit соответственно.
+    По весу считается позиция с указанным весом и ценой за кг; иначе
+    поштучно, если задана цена за штуку; иначе по цене за кг, где вес
+    равен количеству (позиции без веса из старых и импортированных заказов;
+    новый заказ без веса DatabaseManager.add_order не принимает).
+    """
+    by_weight = (
+        f"{item}.weight IS NOT NULL AND COALESCE({dessert}.price_per_kg, 0) > 0"
+    )
+    by_unit = f"COALESCE({dessert}.price_per_unit, 0) > 0"
+
+    price_type = (
+        f"CASE WHEN {by_weight} THEN '{PRICE_TYPE_KG}' "
+        f"WHEN {by_unit} THEN '{PRICE_TYPE_UNIT}' ELSE '{PRICE_TYPE_KG}' END"
+    )
+    unit_price = (
+        f"CASE WHEN {by_weight} THEN {dessert}.price_per_kg "
+        f"WHEN {by_unit} THEN {dessert}.price_per_unit "
+        f"ELSE COALESCE({dessert}.price_per_kg, 0) END"
+    )
+    amount = (
+        f"CASE WHEN {by_weight} THEN {item}.weight "
+        f"WHEN {by_unit} THEN {item}.quantity "
+        f"ELSE COALESCE({item}.weight, {item}.quantity) END"
+    )
+    line_total = f"ROUND(({unit_price}) * ({amount}), 2)"
+    return price_type, unit_price, line_total
+
+
+# Вставка позиций с расчетом цены по текущему прайсу:
+# параметры (order_id, quantity, weight, dessert_id)
+INSERT_PRICED_ITEM_SQL = '''
+    INSERT INTO order_items (order_id, dessert_id, quantity, weight,
+                             price_type, unit_price, line_total)
+    SELECT item.order_id, d.id, item.quantity, item.weight, {}, {}, {}
+    FROM (SELECT ? AS order_id, ? AS quantity, ? AS weight) AS item
+    JOIN desserts d ON d.id = ?
+'''.format(*_pricing_expressions('item', 'd'))
+
+# Расчет позиции по текущему прайсу без вставки: параметры (quantity, weight, dessert_id);
+# возвращает (название десерта, способ расчета, цена, сумма)
+PRICE_ITEM_SQL = '''
+    SELECT d.name, {}, {}, {}
+    FROM (SELECT ? AS quantity, ? AS weight) AS item
+    JOIN desserts d ON d.id = ?
+'''.format(*_pricing_expressions('item', 'd'))
+
+# UPDATE ... FROM появился в SQLite 3.33; с более старой библиотекой
+# цены берутся коррелированным подзапросом
+UPDATE_FROM_SUPPORTED = sqlite3.sqlite_version_info >= (3, 33, 0)
+
+# Пересчет цен позиций одним проходом: {orders} - условие отбора заказов
+if UPDATE_FROM_SUPPORTED:
+    REPRICE_ITEMS_SQL = '''
+        UPDATE order_items
+        SET price_type = {}, unit_price = {}, line_total = {}
+        FROM desserts d
+        WHERE d.id = order_items.dessert_id
+          AND order_items.order_id IN (SELECT id FROM orders WHERE {{orders}})
+    '''.format(*_pricing_expressions('order_items', 'd'))
+else:
+    REPRICE_ITEMS_SQL = '''
+        UPDATE order_items
+        SET (price_type, unit_price, line_total) = (
+            SELECT {}, {}, {} FROM desserts d WHERE d.id = order_items.dessert_id
+        )
+        WHERE order_items.order_id IN (SELECT id FROM orders WHERE {{orders}})
+          AND order_items.dessert_id IN (SELECT id FROM desserts)
+    '''.format(*_pricing_expressions('order_items', 'd'))
+
+# Сумма заказа по его позициям: {order_id} - выражение с ID заказа
+ORDER_TOTAL_SQL = (
+    "(SELECT ROUND(COALESCE(SUM(line_total), 0), 2) FROM order_items "
+    "WHERE order_id = {order_id})"
+)
+
+# Суммы заказов по их позициям: {orders} - условие отбора заказов
+ORDER_TOTALS_SQL = '''
+    UPDATE orders SET total = {total}
+    WHERE {{orders}}
+'''.format(total=ORDER_TOTAL_SQL.format(order_id='orders.id'))
+
+
+def reprice_orders(cursor, orders_filter, params=()):
+    """Пересчет позиций и сумм заказов, отобранных условием, по текущим ценам
+
+    Выполняется двумя запросами без цикла по заказам.
+    """
+    cursor.execute(REPRICE_ITEMS_SQL.format(orders=orders_filter), params)
+    cursor.execute(ORDER_TOTALS_SQL.format(orders=orders_filter), params)
+
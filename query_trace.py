@@ -0,0 +1,255 @@
+import inspect
+import logging
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+# Границы корзин гистограммы задержек, мс (последняя корзина - все, что дольше)
+LATENCY_BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000)
+
+# Порог медленного вызова по умолчанию, мс
+SLOW_QUERY_MS = 100
+
+# Журнал медленных вызовов: имя файла, размер до ротации и число старых копий
+SLOW_LOG_NAME = 'slow_queries.log'
+SLOW_LOG_MAX_BYTES = 1024 * 1024
+SLOW_LOG_BACKUPS = 3
+
+# Сколько самых долгих запросов медленного вызова записывать с планом
+MAX_LOGGED_PLANS = 5
+
+# Сколько последних медленных вызовов хранить для окна диагностики
+RECENT_SLOW_CALLS = 50
+
+# Сколько разных текстов запросов учитывать отдельно (остальные - одной строкой)
+MAX_TRACKED_STATEMENTS = 500
+
+# Методы DatabaseManager, которые не оборачиваются: управление подключениями,
+# транзакциями и триггерами (их время - это время блока with вызывающего кода)
+UNTRACED_METHODS = {'get_connection', 'release_connection', 'close', 'transaction',
+                    'triggers_paused'}
+
+# Запросы вне методов DatabaseManager (массовый импорт, прямые запросы)
+NO_METHOD = '<прямой запрос>'
+OTHER_STATEMENTS = '<прочие запросы>'
+
+# Запросы, для которых записывается EXPLAIN QUERY PLAN
+EXPLAINABLE = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+class CallStats:
+    """Счетчики и гистограмма задержек одного метода или запроса"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        # Запросов из Python и шагов SQLite (включая тела триггеров)
+        self.statements = 0
+        self.sqlite_steps = 0
+        self.slow = 0
+
+    def add(self, ms):
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.buckets[bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+
+    @property
+    def mean_ms(self):
+        return self.total_ms / self.count if self.count else 0.0
+
+    def percentile(self, share):
+        """Оценка перцентиля сверху: граница корзины, в которую он попал"""
+        needed = share * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.buckets):
+            seen += count
+            if seen >= needed:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def copy(self):
+        stats = CallStats()
+        stats.__dict__.update(self.__dict__, buckets=list(self.buckets))
+        return stats
+
+
+def _one_line(sql):
+    """Текст запроса в одну строку без лишних пробелов"""
+    return ' '.join(sql.split())
+
+
+def _plan_lines(rows):
+    """Строки EXPLAIN QUERY PLAN с отступами по вложенности"""
+    depth = {0: 0}
+    lines = []
+    for node_id, parent_id, _, detail in rows:
+        depth[node_id] = depth.get(parent_id, 0) + 1
+        lines.append('  ' * depth[node_id] + detail)
+    return lines
+
+
+class QueryTracer:
+    """Трассировка запросов DatabaseManager и журнал медленных вызовов
+
+    Подключается через DatabaseManager(tracer=QueryTracer()): публичные
+    методы оборачиваются замером времени, запросы подключений засекаются
+    в TracingConnection, а шаги SQLite (вместе с телами триггеров)
+    считаются через set_trace_callback. Вызов дольше slow_ms записывается
+    в журнал с ротацией вместе с планами самых долгих запросов.
+    Без трассировщика DatabaseManager работает без оберток и колбэков.
+    """
+
+    def __init__(self, slow_ms=SLOW_QUERY_MS, log_path=SLOW_LOG_NAME):
+        self.slow_ms = slow_ms
+        self.log_path = log_path
+        self._lock = threading.Lock()
+        # Стек вызовов методов по идентификатору потока ОС (как у подключений БД)
+        self._calls = {}
+        self.methods = {}
+        self.statements = {}
+        self.recent_slow = deque(maxlen=RECENT_SLOW_CALLS)
+        self.started = time.time()
+
+        self.slow_log = None
+        if log_path:
+            # Отдельный логгер, не связанный с корневым: файл создается при первой записи
+            self.slow_log = logging.Logger('confectionery.slow_queries')
+            handler = RotatingFileHandler(log_path, maxBytes=SLOW_LOG_MAX_BYTES,
+                                          backupCount=SLOW_LOG_BACKUPS,
+                                          encoding='utf-8', delay=True)
+            handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+            self.slow_log.addHandler(handler)
+
+    def instrument(self, db):
+        """Замена публичных методов экземпляра DatabaseManager обертками с замером"""
+        for name, _ in inspect.getmembers(type(db), inspect.isfunction):
+            if not name.startswith('_') and name not in UNTRACED_METHODS:
+                setattr(db, name, self.wrap_method(name, getattr(db, name)))
+
+    def wrap_method(self, name, method):
+        """Обертка метода: время вызова и запросы, выполненные внутри него"""
+        def traced(*args, **kwargs):
+            stack = self._calls.setdefault(threading.get_ident(), [])
+            call = {'method': name, 'statements': [], 'sqlite_steps': 0}
+            stack.append(call)
+            started = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = (time.perf_counter() - started) * 1000
+                stack.pop()
+                self._method_finished(call, elapsed, stack[-1] if stack else None)
+        traced.__name__ = name
+        traced.__doc__ = method.__doc__
+        return traced
+
+    def _method_finished(self, call, ms, parent):
+        """Учет завершенного вызова метода"""
+        slow = ms >= self.slow_ms
+        with self._lock:
+            stats = self.methods.get(call['method'])
+            if stats is None:
+                stats = self.methods[call['method']] = CallStats()
+            stats.add(ms)
+            stats.statements += len(call['statements'])
+            stats.sqlite_steps += call['sqlite_steps']
+            stats.slow += slow
+
+        if parent is not None:
+            # Запросы вложенного вызова (execute_batch -> add_client) видны и внешнему
+            parent['statements'].extend(call['statements'])
+            parent['sqlite_steps'] += call['sqlite_steps']
+        elif slow:
+            self._log_slow(call['method'], ms, call['statements'], call['sqlite_steps'])
+
+    def statement_finished(self, conn, sql, parameters, seconds):
+        """Учет запроса, выполненного через TracingConnection или TracingCursor"""
+        ms = seconds * 1000
+        with self._lock:
+            stats = self.statements.get(sql)
+            if stats is None:
+                key = sql if len(self.statements) < MAX_TRACKED_STATEMENTS else OTHER_STATEMENTS
+                stats = self.statements.setdefault(key, CallStats())
+            stats.add(ms)
+            stats.slow += ms >= self.slow_ms
+
+        stack = self._calls.get(threading.get_ident())
+        statement = (sql, parameters, ms, conn)
+        if stack:
+            stack[-1]['statements'].append(statement)
+        elif ms >= self.slow_ms:
+            self._log_slow(NO_METHOD, ms, [statement], 0)
+
+    def sqlite_step(self, _sql):
+        """Колбэк set_trace_callback: шаг SQLite (запрос или тело триггера)"""
+        stack = self._calls.get(threading.get_ident())
+        if stack:
+            stack[-1]['sqlite_steps'] += 1
+
+    def explain(self, conn, sql, parameters):
+        """EXPLAIN QUERY PLAN запроса на его подключении"""
+        if not sql.lstrip().upper().startswith(EXPLAINABLE):
+            return []
+        # Служебный запрос не должен попадать в статистику
+        conn.set_trace_callback(None)
+        try:
+            rows = sqlite3.Connection.execute(
+                conn, f"EXPLAIN QUERY PLAN {sql}",
+                parameters if parameters is not None else ()
+            ).fetchall()
+        except sqlite3.Error as e:
+            return [f"план недоступен: {e}"]
+        finally:
+            try:
+                conn.set_trace_callback(self.sqlite_step)
+            except sqlite3.ProgrammingError:
+                pass
+        return _plan_lines(rows)
+
+    def _log_slow(self, method, ms, statements, sqlite_steps):
+        """Запись медленного вызова с планами самых долгих запросов"""
+        lines = [f"{method}: {ms:.1f} мс, запросов {len(statements)}, шагов SQLite {sqlite_steps}"]
+        for sql, parameters, statement_ms, conn in sorted(
+            statements, key=lambda statement: statement[2], reverse=True
+        )[:MAX_LOGGED_PLANS]:
+            lines.append(f"  {statement_ms:.1f} мс: {_one_line(sql)}")
+            if parameters:
+                lines.append(f"    параметры: {parameters!r:.200}")
+            lines.extend('    ' + line for line in self.explain(conn, sql, parameters))
+        entry = '\n'.join(lines)
+        self.recent_slow.append((time.strftime('%H:%M:%S'), entry))
+        if self.slow_log:
+            self.slow_log.warning(entry)
+
+    def snapshot(self):
+        """Копия статистики для отображения: (методы, запросы, последние медленные вызовы)"""
+        with self._lock:
+            methods = {name: stats.copy() for name, stats in self.methods.items()}
+            statements = {sql: stats.copy() for sql, stats in self.statements.items()}
+            recent = list(self.recent_slow)
+        return methods, statements, recent
+
+    def reset(self):
+        """Сброс накопленной статистики"""
+        with self._lock:
+            self.methods.clear()
+            self.statements.clear()
+            self.recent_slow.clear()
+            self.started = time.time()
+
+    def summary(self, limit=10):
+        """Строки сводки: методы с наибольшим суммарным временем"""
+        methods, _, _ = self.snapshot()
+        lines = []
+        for name, stats in sorted(methods.items(), key=lambda item: item[1].total_ms,
+                                  reverse=True)[:limit]:
+            lines.append(f"{name}: вызовов {stats.count}, всего {stats.total_ms:.0f} мс, "
+                         f"среднее {stats.mean_ms:.1f} мс, макс {stats.max_ms:.1f} мс, "
+                         f"медленных {stats.slow}")
+        return lines
@@ -0,0 +1,59 @@
+import argparse
+import sys
+import time
+
+from database import DatabaseManager
+
+
+def main(argv=None):
+    """Точка входа командной строки для отчетов о продажах"""
+    parser = argparse.ArgumentParser(
+        description="Отчеты о продажах кондитерской по сводным таблицам"
+    )
+    parser.add_argument('--db', default='confectionery.db', help="файл базы данных")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('rebuild', help="пересчитать сводные таблицы продаж с нуля")
+
+    reprice = commands.add_parser('reprice', help="пересчитать суммы заказов по текущим ценам")
+    reprice.add_argument('--from', dest='date_from', help="начальная дата (yyyy-MM-dd)")
+    reprice.add_argument('--to', dest='date_to', help="конечная дата (yyyy-MM-dd)")
+
+    show = commands.add_parser('show', help="показать продажи за период")
+    show.add_argument('--from', dest='date_from', help="начальная дата (yyyy-MM-dd)")
+    show.add_argument('--to', dest='date_to', help="конечная дата (yyyy-MM-dd)")
+    show.add_argument('--by-dessert', action='store_true', help="группировать по десертам")
+    args = parser.parse_args(argv)
+
+    db = DatabaseManager(args.db)
+    try:
+        if args.command == 'rebuild':
+            started = time.perf_counter()
+            db.rebuild_sales_summary()
+            print(f"✅ Сводка продаж пересчитана за {time.perf_counter() - started:.2f} с")
+            return 0
+
+        if args.command == 'reprice':
+            started = time.perf_counter()
+            count = db.recompute_order_totals(args.date_from, args.date_to)
+            print(f"✅ Пересчитано заказов: {count} за {time.perf_counter() - started:.2f} с")
+            return 0
+
+        if args.by_dessert:
+            print("Десерт\tЗаказов\tЕдиниц\tВыручка")
+            for _, name, orders, quantity, revenue in db.get_sales_by_dessert(args.date_from, args.date_to):
+                print(f"{name}\t{orders}\t{quantity}\t{revenue:.2f}")
+        else:
+            print("Дата\tЗаказов\tЕдиниц\tВыручка")
+            for day, orders, items, revenue in db.get_sales_by_day(args.date_from, args.date_to):
+                print(f"{day}\t{orders}\t{items}\t{revenue:.2f}")
+
+        orders, items, revenue = db.get_sales_totals(args.date_from, args.date_to)
+        print(f"Итого: заказов {orders}, единиц {items}, выручка {revenue:.2f}")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+import time
+from contextlib import contextmanager
+
+
+class StartupProfiler:
+    """Замер фаз запуска приложения (режим --profile-startup)
+
+    Последовательные фазы отмечаются mark(), заполнение таблиц, которое
+    идет по мере ответа БД, - measure(). Сводка печатается, когда
+    заполнены все таблицы, ожидаемые при запуске; заполнения после этого
+    печатаются по одному. При enabled=False методы ничего не делают.
+    """
+
+    def __init__(self, started=None, enabled=True):
+        self.started = time.perf_counter() if started is None else started
+        self.enabled = enabled
+        self._last = self.started
+        # (фаза, длительность, время от запуска) в секундах
+        self.phases = []
+        self._waiting = set()
+        self.reported = False
+
+    def mark(self, name):
+        """Завершение фазы name, начавшейся с предыдущей отметки"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last, now - self.started))
+        self._last = now
+
+    def wait_for(self, *names):
+        """Фазы measure(), после которых запуск считается завершенным"""
+        if self.enabled and not self.reported:
+            self._waiting.update(names)
+
+    @contextmanager
+    def measure(self, name):
+        """Отдельно измеряемая фаза (например, заполнение таблицы)"""
+        if not self.enabled:
+            yield
+            return
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            if self.reported:
+                print(f"⏱ {name}: {(end - begin) * 1000:.1f} мс "
+                      f"(через {end - self.started:.1f} с после запуска)")
+            else:
+                self.phases.append((name, end - begin, end - self.started))
+                self._waiting.discard(name)
+                if not self._waiting:
+                    self.report()
+
+    def report(self):
+        """Печать сводки по фазам запуска"""
+        if not self.enabled or self.reported:
+            return
+        self.reported = True
+        print("⏱ Профиль запуска (мс):")
+        print(f"   {'Фаза':<40}{'длительность':>14}{'от запуска':>12}")
+        for name, duration, offset in self.phases:
+            print(f"   {name:<40}{duration * 1000:>14.1f}{offset * 1000:>12.1f}")
+        print(f"✅ Готово к работе через {(time.perf_counter() - self.started) * 1000:.0f} мс")
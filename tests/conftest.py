@@ -0,0 +1,38 @@
+import os
+import sys
+
+import pytest
+
+# Модули приложения лежат в корне репозитория
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseManager  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path):
+    """База с тестовыми данными первого запуска во временной папке"""
+    db = DatabaseManager(str(tmp_path / 'confectionery.db'))
+    yield db
+    db.close()
+
+
+def read_sales_summary(db):
+    """Содержимое сводных таблиц продаж для сравнения"""
+    conn = db.get_connection()
+    return (
+        conn.execute("SELECT day, orders, items, ROUND(revenue, 2) FROM sales_daily "
+                     "ORDER BY day").fetchall(),
+        conn.execute("SELECT day, dessert_id, orders, quantity, ROUND(revenue, 2) "
+                     "FROM sales_daily_dessert ORDER BY day, dessert_id").fetchall(),
+    )
+
+
+@pytest.fixture
+def assert_summary_consistent():
+    """Проверка: сводка, обновленная триггерами, совпадает с пересчитанной заново"""
+    def check(db):
+        incremental = read_sales_summary(db)
+        db.rebuild_sales_summary()
+        assert read_sales_summary(db) == incremental
+    return check
@@ -0,0 +1,110 @@
+import json
+
+import pytest
+
+from importer import BulkImporter, read_records
+
+# Клиент и десерты из тестовых данных первого запуска
+PHONE = '+79161234567'
+
+
+def _order(**fields):
+    record = {'phone': PHONE, 'order_date': '2024-02-01', 'order_time': '09:30',
+              'delivery_type': 'Самовывоз', 'desserts': 'Эклеры:2;Макаруны'}
+    record.update(fields)
+    return record
+
+
+def _import_orders(db, records):
+    return BulkImporter(db).import_order_records(enumerate(records, 1))
+
+
+def _reasons(report):
+    return [reason for _, reason in report.errors]
+
+
+def test_valid_order_imported_with_total(db, assert_summary_consistent):
+    orders_before = db.get_table_counts()['orders']
+    report = _import_orders(db, [_order(), _order(desserts=[['Эклеры', 1], 'Макаруны'])])
+    assert (report.imported, report.rejected) == (2, 0)
+
+    conn = db.get_connection()
+    totals = conn.execute("SELECT total FROM orders WHERE id > ? ORDER BY id",
+                          (orders_before,)).fetchall()
+    assert totals == [(380.0,), (230.0,)]
+    assert_summary_consistent(db)
+
+
+@pytest.mark.parametrize('desserts', ['Эклеры:0', 'Эклеры:-2', 'Макаруны;Эклеры:0',
+                                      [['Эклеры', 0]], [{'name': 'Эклеры', 'quantity': -1}]])
+def test_non_positive_quantity_rejected(db, desserts):
+    report = _import_orders(db, [_order(desserts=desserts)])
+    assert (report.imported, report.rejected) == (0, 1)
+    assert _reasons(report)[0].startswith('некорректный список десертов: количество')
+
+
+@pytest.mark.parametrize('fields, reason', [
+    ({'phone': '+70000000000'}, 'клиент не найден: +70000000000'),
+    ({'order_date': '2024-02-30'}, 'некорректная дата: 2024-02-30'),
+    ({'order_time': '9:30'}, 'некорректное время: 9:30'),
+    ({'desserts': 'Эклеры;Штрудель'}, 'десерт не найден: Штрудель'),
+    ({'desserts': ''}, 'не указаны десерты'),
+    ({'desserts': [['Эклеры']]}, 'некорректный список десертов: list index out of range'),
+    ({'photo_path': '/нет/такого/фото.jpg'}, 'фото не найдено: /нет/такого/фото.jpg'),
+])
+def test_invalid_order_rejected(db, fields, reason):
+    orders_before = db.get_table_counts()['orders']
+    report = _import_orders(db, [_order(**fields)])
+    assert _reasons(report) == [reason]
+    assert db.get_table_counts()['orders'] == orders_before
+
+
+def test_rejected_lines_do_not_stop_import(db):
+    report = _import_orders(db, [_order(order_date='вчера'), _order(), _order(desserts='')])
+    assert (report.imported, report.rejected) == (1, 2)
+    assert [line_no for line_no, _ in report.errors] == [1, 3]
+
+
+def test_jsonl_lines_must_be_objects(db, tmp_path):
+    path = tmp_path / 'orders.jsonl'
+    lines = [json.dumps(_order(), ensure_ascii=False), '[1, 2]', '"заказ"', '',
+             '{"phone": ', json.dumps(_order(), ensure_ascii=False)]
+    path.write_text('\n'.join(lines), encoding='utf-8')
+
+    records = list(read_records(str(path)))
+    assert [line_no for line_no, _ in records] == [1, 2, 3, 5, 6]
+    assert str(records[1][1]) == 'строка JSONL должна быть объектом'
+
+    report = BulkImporter(db).import_orders(str(path))
+    assert (report.imported, report.rejected) == (2, 3)
+    assert [line_no for line_no, _ in report.errors] == [2, 3, 5]
+    assert _reasons(report)[2].startswith('некорректный JSON')
+
+
+def test_rejects_written_to_file(db, tmp_path):
+    rejects_path = tmp_path / 'rejects.tsv'
+    with open(rejects_path, 'w', encoding='utf-8') as rejects_file:
+        BulkImporter(db).import_order_records(
+            enumerate([_order(phone=''), _order()], 1), rejects_file)
+    assert rejects_path.read_text(encoding='utf-8') == '1\tклиент не найден: \n'
+
+
+def test_clients_and_desserts_rejected(db):
+    importer = BulkImporter(db)
+    clients = importer.import_client_records(enumerate([
+        {'full_name': 'Новиков Петр', 'phone': '+79990001122'},
+        {'full_name': '', 'phone': '+79990001133'},
+        {'full_name': 'Двойник', 'phone': PHONE},
+    ], 1))
+    assert clients.imported == 1
+    assert _reasons(clients) == ['не заполнены ФИО или телефон',
+                                 f'телефон уже существует: {PHONE}']
+
+    desserts = importer.import_dessert_records(enumerate([
+        {'name': 'Штрудель', 'price_per_kg': '950,5'},
+        {'name': 'Эклеры', 'price_per_unit': '150'},
+        {'name': 'Тарт', 'price_per_kg': 'дорого'},
+    ], 1))
+    assert desserts.imported == 1
+    assert _reasons(desserts) == ['десерт уже существует: Эклеры', 'некорректная цена']
+    assert db.get_dessert_by_name('Штрудель')[2] == 950.5
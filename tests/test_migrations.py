@@ -0,0 +1,192 @@
+import sqlite3
+import threading
+
+import pytest
+
+from database import DatabaseManager
+
+
+# Схема базы до появления миграций (PRAGMA user_version = 0)
+BASELINE_SCHEMA = '''
+    CREATE TABLE clients (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        full_name TEXT NOT NULL,
+        phone TEXT NOT NULL UNIQUE,
+        birth_date TEXT,
+        email TEXT
+    );
+    CREATE TABLE desserts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL UNIQUE,
+        price_per_kg REAL,
+        price_per_unit REAL,
+        composition TEXT
+    );
+    CREATE TABLE orders (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        client_id INTEGER,
+        dessert_types TEXT,
+        order_date TEXT,
+        order_time TEXT,
+        delivery_type TEXT,
+        photo_path TEXT,
+        FOREIGN KEY (client_id) REFERENCES clients (id)
+    );
+'''
+
+
+@pytest.fixture
+def baseline_db(tmp_path):
+    """Файл базы в исходной схеме с клиентами, десертами и заказами"""
+    path = str(tmp_path / 'confectionery.db')
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.executemany("INSERT INTO clients (full_name, phone, birth_date, email) "
+                     "VALUES (?, ?, ?, ?)", [
+                         ('Иванов Иван Иванович', '+7 (916) 123-45-67', '1990-05-15', ''),
+                         ('Петрова Мария Сергеевна', '+79167654321', '1985-12-20', ''),
+                     ])
+    conn.executemany("INSERT INTO desserts (name, price_per_kg, price_per_unit, composition) "
+                     "VALUES (?, ?, ?, ?)", [
+                         ('Торт "Наполеон"', 1200.0, None, ''),
+                         ('Эклеры', None, 150.0, ''),
+                         ('Торт, шоколадный', 900.0, 300.0, ''),
+                     ])
+    conn.executemany("INSERT INTO orders (client_id, dessert_types, order_date, order_time, "
+                     "delivery_type, photo_path) VALUES (?, ?, ?, ?, ?, ?)", [
+                         (1, 'Торт "Наполеон",Эклеры,Эклеры', '2024-01-15', '14:30',
+                          'Доставка', ''),
+                         (2, 'Торт, шоколадный,Пирожное', '2024-01-15', '10:00',
+                          'Самовывоз', ''),
+                         (1, '', '2024-01-16', '12:00', 'Самовывоз', ''),
+                     ])
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_baseline_migrates_to_latest_version(baseline_db):
+    db = DatabaseManager(baseline_db)
+    try:
+        assert db.get_schema_version() == db._schema_migrations()[-1][0]
+        # Существующие данные не заменяются тестовыми
+        assert db.get_table_counts()['clients'] == 2
+    finally:
+        db.close()
+
+
+def test_baseline_orders_get_items_and_totals(baseline_db, assert_summary_consistent):
+    db = DatabaseManager(baseline_db)
+    try:
+        # Повтор названия - количество, запятая в названии не разбивает его
+        assert [item[1:3] for item in db.get_order_items(1)] == [
+            ('Торт "Наполеон"', 1), ('Эклеры', 2)]
+        assert [item[1:3] for item in db.get_order_items(2)] == [('Торт, шоколадный', 1)]
+        assert db.get_order_items(3) == []
+
+        # Десерт без веса и с ценой только за кг - по количеству как по весу
+        assert db.get_order(1)[-1] == 1500.0
+        # При обеих ценах без веса - поштучно
+        assert db.get_order(2)[-1] == 300.0
+        assert db.get_order(3)[-1] == 0.0
+
+        conn = db.get_connection()
+        assert conn.execute("SELECT orders, items, revenue FROM sales_daily "
+                            "WHERE day = '2024-01-15'").fetchone() == (2, 4, 1800.0)
+        assert_summary_consistent(db)
+    finally:
+        db.close()
+
+
+def test_baseline_clients_get_lookup_keys(baseline_db):
+    db = DatabaseManager(baseline_db)
+    try:
+        assert [row[0] for row in db.find_clients('иванов')] == [1]
+        assert [row[0] for row in db.find_clients('8916123')] == [1]
+        assert [row[0] for row in db.search_clients('Петрова')] == [2]
+    finally:
+        db.close()
+
+
+def test_migration_is_not_repeated(baseline_db):
+    DatabaseManager(baseline_db).close()
+    db = DatabaseManager(baseline_db)
+    try:
+        conn = db.get_connection()
+        assert conn.execute("SELECT COUNT(*) FROM order_items").fetchone()[0] == 3
+        assert conn.execute("SELECT SUM(orders) FROM sales_daily").fetchone()[0] == 3
+        # Флаги групп триггеров после миграций сброшены
+        assert conn.execute("SELECT SUM(paused) FROM trigger_control").fetchone()[0] == 0
+    finally:
+        db.close()
+
+
+def test_concurrent_migration(baseline_db):
+    # Оба подключения читают версию схемы до того, как одно из них начнет миграции
+    barrier = threading.Barrier(2, timeout=10)
+    managers = [DatabaseManager(baseline_db, initialize=False) for _ in range(2)]
+    errors = []
+
+    def migrate(db):
+        conn = db.get_connection()
+        started = []
+
+        def wait_for_other(sql):
+            if sql == 'BEGIN IMMEDIATE' and not started:
+                started.append(sql)
+                barrier.wait()
+        conn.set_trace_callback(wait_for_other)
+        try:
+            db.init_database()
+        except Exception as e:
+            errors.append(e)
+        finally:
+            conn.set_trace_callback(None)
+
+    threads = [threading.Thread(target=migrate, args=(db,)) for db in managers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    try:
+        assert errors == []
+        for db in managers:
+            assert db.get_schema_version() == db._schema_migrations()[-1][0]
+        conn = managers[0].get_connection()
+        assert conn.execute("SELECT COUNT(*) FROM order_items").fetchone()[0] == 3
+        assert conn.execute("SELECT SUM(orders) FROM sales_daily").fetchone()[0] == 3
+    finally:
+        for db in managers:
+            db.close()
+
+
+def test_legacy_photos_copied_outside_transaction(baseline_db, tmp_path):
+    photo = tmp_path / 'торт.JPG'
+    photo.write_bytes(b'jpeg')
+    conn = sqlite3.connect(baseline_db)
+    conn.execute("UPDATE orders SET photo_path = ? WHERE id IN (1, 2)", (str(photo),))
+    conn.execute("UPDATE orders SET photo_path = ? WHERE id = 3",
+                 (str(tmp_path / 'нет.jpg'),))
+    conn.commit()
+    conn.close()
+
+    db = DatabaseManager(baseline_db, initialize=False)
+    add_photo = db.media.add
+    locked = []
+
+    def add(path):
+        # Копирование в хранилище не должно держать блокировку записи
+        locked.append(db.get_connection().in_transaction)
+        return add_photo(path)
+    db.media.add = add
+    try:
+        db.init_database()
+        assert locked == [False]
+        key = db.get_order(1)[7]
+        assert db.media.is_key(key) and key.endswith('.jpg')
+        assert db.get_order(2)[7] == key
+        assert open(db.media.path(key), 'rb').read() == b'jpeg'
+        # Отсутствующий файл оставляет старый путь
+        assert db.get_order(3)[7] == str(tmp_path / 'нет.jpg')
+    finally:
+        db.close()
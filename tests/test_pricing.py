@@ -0,0 +1,122 @@
+import importlib
+import sqlite3
+
+import pytest
+
+import pricing
+from pricing import PRICE_TYPE_KG, PRICE_TYPE_UNIT, REPRICE_ITEMS_SQL, UPDATE_FROM_SUPPORTED
+
+
+@pytest.fixture
+def desserts(db):
+    """ID десертов: только за кг, только за штуку, обе цены, дробная цена"""
+    return {
+        'kg': db.add_dessert('Торт "Прага"', 1000.0, None, ''),
+        'unit': db.add_dessert('Капкейк', None, 120.0, ''),
+        'both': db.add_dessert('Рулет', 800.0, 250.0, ''),
+        'fraction': db.add_dessert('Трюфель', None, 33.333, ''),
+    }
+
+
+def _items(db, order_id):
+    """Позиции заказа по ID десерта: (количество, вес, способ расчета, цена, сумма)"""
+    return {item[0]: item[2:] for item in db.get_order_items(order_id)}
+
+
+def _add_order(db, items):
+    return db.add_order(1, items, '2024-03-01', '12:00', 'Самовывоз', '')
+
+
+def test_weight_item_priced_per_kg(db, desserts):
+    order_id = _add_order(db, [(desserts['kg'], 1, 1.5)])
+    assert _items(db, order_id)[desserts['kg']] == (1, 1.5, PRICE_TYPE_KG, 1000.0, 1500.0)
+    assert db.get_order(order_id)[-1] == 1500.0
+
+
+def test_unit_item_priced_per_unit(db, desserts):
+    order_id = _add_order(db, [(desserts['unit'], 3)])
+    assert _items(db, order_id)[desserts['unit']] == (3, None, PRICE_TYPE_UNIT, 120.0, 360.0)
+
+
+def test_both_prices_use_weight_when_given(db, desserts):
+    by_weight = _add_order(db, [(desserts['both'], 1, 0.5)])
+    by_unit = _add_order(db, [(desserts['both'], 2)])
+    assert _items(db, by_weight)[desserts['both']][2:] == (PRICE_TYPE_KG, 800.0, 400.0)
+    assert _items(db, by_unit)[desserts['both']][2:] == (PRICE_TYPE_UNIT, 250.0, 500.0)
+
+
+def test_kg_only_item_without_weight_is_refused(db, desserts):
+    orders_before = db.get_table_counts()['orders']
+    with pytest.raises(ValueError, match='Прага'):
+        _add_order(db, [(desserts['unit'], 1), (desserts['kg'], 2)])
+    # Заказ не записывается частично
+    assert db.get_table_counts()['orders'] == orders_before
+
+
+def test_repeated_dessert_merged(db, desserts):
+    order_id = _add_order(db, [(desserts['kg'], 1, 0.5), (desserts['kg'], 1, 1.0),
+                               desserts['unit'], (desserts['unit'], 2)])
+    items = _items(db, order_id)
+    assert items[desserts['kg']] == (2, 1.5, PRICE_TYPE_KG, 1000.0, 1500.0)
+    assert items[desserts['unit']][0] == 3
+    assert db.get_order(order_id)[3] == 'Капкейк,Торт "Прага"'
+
+
+def test_totals_rounded_to_kopecks(db, desserts):
+    order_id = _add_order(db, [(desserts['fraction'], 3), (desserts['kg'], 1, 0.333)])
+    items = _items(db, order_id)
+    assert items[desserts['fraction']][-1] == 100.0
+    assert items[desserts['kg']][-1] == 333.0
+    assert db.get_order(order_id)[-1] == 433.0
+
+
+def test_unknown_dessert_skipped(db, desserts):
+    order_id = _add_order(db, [(desserts['unit'], 1), (999999, 1)])
+    assert list(_items(db, order_id)) == [desserts['unit']]
+    assert db.get_order(order_id)[-1] == 120.0
+
+
+def test_order_keeps_price_until_recomputed(db, desserts, assert_summary_consistent):
+    order_id = _add_order(db, [(desserts['unit'], 2)])
+    db.update_dessert(desserts['unit'], 'Капкейк', None, 150.0, '')
+    assert db.get_order(order_id)[-1] == 240.0
+
+    db.recompute_order_totals('2024-03-01', '2024-03-01')
+    assert db.get_order(order_id)[-1] == 300.0
+    assert_summary_consistent(db)
+
+
+@pytest.fixture
+def fallback_pricing(monkeypatch):
+    """Модуль pricing в варианте для SQLite старше 3.33 (без UPDATE ... FROM)"""
+    monkeypatch.setattr(sqlite3, 'sqlite_version_info', (3, 32, 3))
+    importlib.reload(pricing)
+    yield pricing
+    monkeypatch.undo()
+    importlib.reload(pricing)
+
+
+def _reprice_all(db, reprice_items_sql):
+    with db.transaction() as conn:
+        conn.execute(reprice_items_sql.format(orders='1'))
+    return db.get_connection().execute(
+        "SELECT order_id, dessert_id, price_type, unit_price, line_total "
+        "FROM order_items ORDER BY order_id, dessert_id"
+    ).fetchall()
+
+
+@pytest.mark.skipif(not UPDATE_FROM_SUPPORTED, reason="SQLite без UPDATE ... FROM")
+def test_fallback_reprice_matches_update_from(db, desserts, fallback_pricing):
+    assert not fallback_pricing.UPDATE_FROM_SUPPORTED
+    _add_order(db, [(desserts['kg'], 1, 1.25), (desserts['both'], 2), desserts['unit']])
+    _add_order(db, [(desserts['both'], 1, 0.75), (desserts['fraction'], 7)])
+    db.update_dessert(desserts['both'], 'Рулет', 900.0, 275.0, '')
+    db.update_dessert(desserts['kg'], 'Торт "Прага"', None, 500.0, '')
+
+    assert fallback_pricing.REPRICE_ITEMS_SQL != REPRICE_ITEMS_SQL
+    fallback = _reprice_all(db, fallback_pricing.REPRICE_ITEMS_SQL)
+    assert all(row[-1] is not None for row in fallback)
+    with db.transaction() as conn:
+        conn.execute("UPDATE order_items SET price_type = NULL, unit_price = NULL, "
+                     "line_total = NULL")
+    assert _reprice_all(db, REPRICE_ITEMS_SQL) == fallback
@@ -0,0 +1,197 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from PyQt5.QtCore import QSize, Qt
+from PyQt5.QtGui import QImage, QImageIOHandler, QImageReader, QPixmap
+
+# Предельный размер миниатюр на диске; при превышении удаляются самые старые
+THUMBNAIL_DISK_LIMIT = 64 * 1024 * 1024
+
+# После очистки на диске остается эта доля предела, чтобы не чистить на каждой записи
+THUMBNAIL_DISK_TARGET = 0.8
+
+# Сколько последних миниатюр держать в памяти
+THUMBNAIL_MEMORY_ITEMS = 64
+
+# Качество JPEG для миниатюр без прозрачности
+THUMBNAIL_JPEG_QUALITY = 85
+
+
+def load_scaled_image(path, size):
+    """Чтение изображения сразу в уменьшенном виде, вписанным в size
+
+    QImageReader декодирует JPEG в нужном масштабе, не распаковывая
+    полное изображение. Поворот по EXIF учитывается. Возвращает QImage
+    (пустой, если файл не читается).
+    """
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    original = reader.size()
+    if original.isValid():
+        box = QSize(size)
+        if reader.transformation() & QImageIOHandler.TransformationRotate90:
+            # Масштаб задается до поворота
+            box.transpose()
+        if original.width() > box.width() or original.height() > box.height():
+            reader.setScaledSize(original.scaled(box, Qt.KeepAspectRatio))
+    image = reader.read()
+    if image.isNull():
+        return image
+    if image.width() > size.width() or image.height() > size.height():
+        # Форматы без масштабированного чтения уменьшаются после декодирования
+        image = image.scaled(size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    return image
+
+
+class ThumbnailCache:
+    """Кэш миниатюр фото: LRU в памяти и каталог на диске с ограничением размера
+
+    Миниатюра на диске ищется по пути, размеру и времени изменения
+    исходного файла и по размеру миниатюры, поэтому измененное фото
+    пересоздается. Методы image() можно вызывать из любого потока,
+    pixmap() - только из потока интерфейса.
+    """
+
+    def __init__(self, cache_dir, disk_limit=THUMBNAIL_DISK_LIMIT,
+                 memory_items=THUMBNAIL_MEMORY_ITEMS):
+        self.cache_dir = cache_dir
+        self.disk_limit = disk_limit
+        self.memory_items = memory_items
+        self._lock = threading.Lock()
+        self._pixmaps = OrderedDict()
+        self._disk_usage = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _cache_key(self, path, size):
+        """Ключ миниатюры или None, если исходного файла нет"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        source = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}|" \
+                 f"{size.width()}x{size.height()}"
+        return hashlib.sha1(source.encode('utf-8')).hexdigest()
+
+    def _thumbnail_files(self, key):
+        """Возможные файлы миниатюры на диске (с прозрачностью - PNG)"""
+        base = os.path.join(self.cache_dir, key[:2], key)
+        return base + '.jpg', base + '.png'
+
+    def image(self, path, size):
+        """Миниатюра фото, вписанная в size, в виде QImage (пустой при ошибке)"""
+        key = self._cache_key(path, size)
+        if key is None:
+            return QImage()
+
+        for thumbnail_file in self._thumbnail_files(key):
+            if os.path.exists(thumbnail_file):
+                image = QImage(thumbnail_file)
+                if not image.isNull():
+                    try:
+                        # Время изменения служит отметкой последнего использования
+                        os.utime(thumbnail_file)
+                    except OSError:
+                        pass
+                    with self._lock:
+                        self.disk_hits += 1
+                    return image
+
+        with self._lock:
+            self.misses += 1
+        image = load_scaled_image(path, size)
+        if not image.isNull():
+            self._save(key, image)
+        return image
+
+    def cached_pixmap(self, path, size):
+        """Миниатюра из памяти без обращения к диску: (ключ, QPixmap или None)"""
+        key = self._cache_key(path, size)
+        pixmap = self._pixmaps.get(key) if key else None
+        if pixmap is not None:
+            self._pixmaps.move_to_end(key)
+            self.memory_hits += 1
+        return key, pixmap
+
+    def pixmap(self, path, size):
+        """Миниатюра фото в виде QPixmap из памяти или с диска (None при ошибке)"""
+        key, pixmap = self.cached_pixmap(path, size)
+        if key is None or pixmap is not None:
+            return pixmap
+
+        image = self.image(path, size)
+        if image.isNull():
+            return None
+        pixmap = QPixmap.fromImage(image)
+        self.remember(key, pixmap)
+        return pixmap
+
+    def remember(self, key, pixmap):
+        """Добавление миниатюры в LRU в памяти"""
+        self._pixmaps[key] = pixmap
+        self._pixmaps.move_to_end(key)
+        while len(self._pixmaps) > self.memory_items:
+            self._pixmaps.popitem(last=False)
+
+    def _save(self, key, image):
+        """Запись миниатюры на диск с соблюдением предельного размера каталога"""
+        jpg_file, png_file = self._thumbnail_files(key)
+        thumbnail_file = png_file if image.hasAlphaChannel() else jpg_file
+        temp_file = f"{thumbnail_file}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(thumbnail_file), exist_ok=True)
+            quality = -1 if thumbnail_file == png_file else THUMBNAIL_JPEG_QUALITY
+            if not image.save(temp_file, thumbnail_file[-3:].upper(), quality):
+                return
+            os.replace(temp_file, thumbnail_file)
+            written = os.path.getsize(thumbnail_file)
+        except OSError as e:
+            print(f"⚠️ Не удалось сохранить миниатюру: {e}")
+            return
+
+        with self._lock:
+            if self._disk_usage is None:
+                self._disk_usage = sum(size for _, size, _ in self._disk_files())
+            else:
+                self._disk_usage += written
+            if self._disk_usage > self.disk_limit:
+                self._evict()
+
+    def _disk_files(self):
+        """Файлы миниатюр на диске: (путь, размер, время изменения)"""
+        if not os.path.isdir(self.cache_dir):
+            return
+        for entry in os.scandir(self.cache_dir):
+            if not entry.is_dir():
+                continue
+            for file in os.scandir(entry.path):
+                if file.is_file():
+                    stat = file.stat()
+                    yield file.path, stat.st_size, stat.st_mtime
+
+    def _evict(self):
+        """Удаление давно не использованных миниатюр (вызывается под блокировкой)"""
+        files = sorted(self._disk_files(), key=lambda file: file[2])
+        usage = sum(size for _, size, _ in files)
+        target = self.disk_limit * THUMBNAIL_DISK_TARGET
+        for path, size, _ in files:
+            if usage <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            usage -= size
+        self._disk_usage = usage
+
+    def stats(self):
+        """Счетчики попаданий в память и на диск и промахов"""
+        return {
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'memory_items': len(self._pixmaps),
+        }
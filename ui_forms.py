@@ -0,0 +1,150 @@
+import argparse
+import importlib
+import io
+import os
+import sys
+
+from PyQt5.QtCore import QFile, QIODevice
+
+# Пакет модулей, сгенерированных из .ui: создается при сборке (`python ui_forms.py`),
+# при разработке обновляется, когда .ui новее модуля
+UI_PACKAGE = 'ui_generated'
+UI_PACKAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), UI_PACKAGE)
+
+# Классы форм, уже загруженные в этом процессе: путь к .ui -> класс
+_form_classes = {}
+
+
+def is_resource(path):
+    """Путь ко встроенному ресурсу Qt (":/...")"""
+    return path.startswith(':')
+
+
+def _read_resource(path):
+    """Содержимое встроенного ресурса Qt"""
+    file = QFile(path)
+    if not file.open(QIODevice.ReadOnly):
+        raise OSError(f"Не удалось открыть ресурс {path}")
+    try:
+        return bytes(file.readAll())
+    finally:
+        file.close()
+
+
+def _compile_source(ui_path):
+    """Python-код формы, сгенерированный из .ui"""
+    # uic нужен только при компиляции: при готовом модуле формы он не импортируется
+    from PyQt5 import uic
+
+    source = io.StringIO()
+    if is_resource(ui_path):
+        uic.compileUi(io.BytesIO(_read_resource(ui_path)), source)
+    else:
+        uic.compileUi(ui_path, source)
+    return source.getvalue()
+
+
+def _find_form_class(namespace, ui_path):
+    """Класс Ui_* из кода скомпилированной формы"""
+    for name, value in namespace.items():
+        if name.startswith('Ui_') and isinstance(value, type):
+            return value
+    raise ValueError(f"В форме {ui_path} нет класса Ui_*")
+
+
+def _module_name(ui_path):
+    """Имя модуля формы: имя .ui файла без расширения"""
+    return os.path.splitext(os.path.basename(ui_path))[0]
+
+
+def _is_stale(ui_path, module_file):
+    """Модуль формы отсутствует или старше .ui (встроенный ресурс после сборки не меняется)"""
+    if not os.path.exists(module_file):
+        return True
+    if is_resource(ui_path):
+        return False
+    return os.stat(ui_path).st_mtime_ns > os.stat(module_file).st_mtime_ns
+
+
+def compile_form(ui_path, package_dir=UI_PACKAGE_DIR):
+    """Генерация модуля формы из .ui в пакете форм; возвращает путь к модулю"""
+    module_file = os.path.join(package_dir, f"{_module_name(ui_path)}.py")
+    source = _compile_source(ui_path)
+    os.makedirs(package_dir, exist_ok=True)
+    init_file = os.path.join(package_dir, '__init__.py')
+    if not os.path.exists(init_file):
+        with open(init_file, 'w', encoding='utf-8') as f:
+            f.write("# Модули форм, сгенерированные ui_forms.py из .ui\n")
+    temp_file = f"{module_file}.{os.getpid()}.tmp"
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        f.write(source)
+    os.replace(temp_file, module_file)
+    # Новые файлы пакета должны быть видны импорту в этом же процессе
+    importlib.invalidate_caches()
+    print(f"🛠 Форма {os.path.basename(ui_path)} скомпилирована")
+    return module_file
+
+
+def load_form_class(ui_path):
+    """Класс формы из .ui: из памяти процесса или из пакета сгенерированных модулей
+
+    Путь разрешается один раз за процесс. В собранном приложении модули
+    форм поставляются готовыми и не проверяются (нет модуля - ImportError);
+    при разработке устаревший модуль генерируется заново.
+    """
+    form_class = _form_classes.get(ui_path)
+    if form_class is not None:
+        return form_class
+
+    name = _module_name(ui_path)
+    frozen = getattr(sys, 'frozen', False)
+    try:
+        if not frozen and _is_stale(ui_path, os.path.join(UI_PACKAGE_DIR, f"{name}.py")):
+            compile_form(ui_path)
+        namespace = vars(importlib.import_module(f"{UI_PACKAGE}.{name}"))
+    except (OSError, ImportError) as e:
+        if frozen:
+            # В сборке нет uic (исключен в ConfectioneryApp.spec): компилировать нечем
+            raise ImportError(
+                f"В сборке нет модуля формы {UI_PACKAGE}.{name} для {ui_path}: "
+                f"перед сборкой выполните python ui_forms.py"
+            ) from e
+        # Пакет форм недоступен для записи или не поставлен: форма компилируется в памяти
+        print(f"⚠️ Модуль формы {name} недоступен ({e}), компиляция без сохранения")
+        namespace = {}
+        exec(compile(_compile_source(ui_path), ui_path, 'exec'), namespace)
+
+    form_class = _find_form_class(namespace, ui_path)
+    _form_classes[ui_path] = form_class
+    return form_class
+
+
+def setup_form(widget, ui_path):
+    """Замена uic.loadUi: построение формы в widget из скомпилированного класса
+
+    Как и при uic.loadUi, дочерние виджеты формы становятся атрибутами widget.
+    """
+    form = load_form_class(ui_path)()
+    form.setupUi(widget)
+    for name, value in vars(form).items():
+        setattr(widget, name, value)
+    return form
+
+
+def main(argv=None):
+    """Точка входа командной строки: генерация модулей всех форм (при сборке)"""
+    parser = argparse.ArgumentParser(description="Компиляция форм интерфейса из .ui")
+    parser.add_argument('--ui-dir', default='ui', help="каталог с .ui файлами")
+    parser.add_argument('--package-dir', default=UI_PACKAGE_DIR,
+                        help="каталог пакета сгенерированных модулей")
+    args = parser.parse_args(argv)
+
+    for file_name in sorted(os.listdir(args.ui_dir)):
+        if file_name.endswith('.ui'):
+            module_file = compile_form(os.path.join(args.ui_dir, file_name), args.package_dir)
+            print(f"✅ {file_name} -> {module_file}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())